@@ -0,0 +1,94 @@
+"""Upstream work wasted on reviews whose clients gave up.
+
+A share of the clients (--abandon-rate) time out after --abandon-after
+seconds, like a user closing the page or a frontend fetch timeout, while
+the rest wait for their review. The mock generates at --tokens-per-second,
+so a review takes several seconds. With CANCEL_ON_DISCONNECT=false every
+abandoned review still runs to completion; with it on, the backend closes
+the upstream stream as soon as the client goes away. Reports completion
+output the mock actually generated, streams it saw closed early, and the
+latency of the reviews that were waited for (abandoned ones free their
+upstream slots sooner).
+
+Run from backend/: python -m benchmarks.cancel_bench --requests 48 --concurrency 12
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+import httpx
+from benchmarks.common import run_stack
+from benchmarks.suite import percentile
+
+BACKEND_URL = "http://127.0.0.1:8100"
+SCENARIOS = {"run to completion": {"CANCEL_ON_DISCONNECT": "false"}, "cancel on disconnect": {}}
+
+
+async def run_clients(requests: int, concurrency: int, abandon_rate: float, abandon_after: float) -> dict:
+    chooser = random.Random(7)
+    plan = iter([chooser.random() < abandon_rate for _ in range(requests)])
+    counter = itertools.count()
+    latencies = []
+    abandoned = 0
+
+    async def worker():
+        nonlocal abandoned
+        async with httpx.AsyncClient(base_url=BACKEND_URL, timeout=300) as http:
+            for abandon in plan:
+                code = f"def f_{next(counter)}(x):\n    return x\n"
+                start = time.perf_counter()
+                try:
+                    request = http.post("/api/analyze-code/", data={"code": code})
+                    if abandon:
+                        await asyncio.wait_for(request, abandon_after)
+                    else:
+                        (await request).raise_for_status()
+                        latencies.append(time.perf_counter() - start)
+                        continue
+                except asyncio.TimeoutError:
+                    pass
+                abandoned += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    ordered = sorted(latencies)
+    return {"abandoned": abandoned, "p50": percentile(ordered, 0.5), "p95": percentile(ordered, 0.95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--abandon-rate", type=float, default=0.5)
+    parser.add_argument("--abandon-after", type=float, default=1.5, help="seconds before an impatient client gives up")
+    parser.add_argument("--tokens-per-second", type=float, default=150)
+    parser.add_argument("--upstream-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    mock_env = {"MOCK_LATENCY": "0.2", "MOCK_TOKENS_PER_SECOND": str(args.tokens_per_second)}
+    backend_env = {
+        "LOG_LEVEL": "WARNING",
+        "REVIEW_CACHE_ENABLED": "false",
+        "HISTORY_ENABLED": "false",
+        "REVISIONS_ENABLED": "false",
+        "JOB_DB": "/tmp/cancel-bench-jobs.db",
+        "UPSTREAM_TOKENS_PER_MINUTE": "10000000",
+        "UPSTREAM_MAX_CONCURRENCY": str(args.upstream_concurrency),
+        "UPSTREAM_MIN_CONCURRENCY": str(args.upstream_concurrency),
+        "UPSTREAM_HEDGE_ENABLED": "false",
+    }
+    print(f"{'scenario':<21} {'abandoned':>9} {'generated tok':>13} {'closed early':>12} {'p50':>7} {'p95':>7}")
+    for name, env in SCENARIOS.items():
+        with run_stack(mock_env=mock_env, backend_env={**backend_env, **env}):
+            result = asyncio.run(run_clients(args.requests, args.concurrency, args.abandon_rate, args.abandon_after))
+            # Let abandoned reviews that are still running finish before reading the totals
+            deadline = time.monotonic() + 120
+            while httpx.get("http://127.0.0.1:9100/mock/stats").json()["in_flight"] and time.monotonic() < deadline:
+                time.sleep(0.5)
+            mock = httpx.get("http://127.0.0.1:9100/mock/stats").json()
+        print(f"{name:<21} {result['abandoned']:>9} {mock['streamed_chars'] // 4:>13} {mock['aborted']:>12} "
+              f"{result['p50']:>6.2f}s {result['p95']:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Latency versus file size, with and without the chunked map-reduce pipeline.
+
+The mock upstream's latency grows with prompt size, so a single call on a
+large file is slow while parallel chunk reviews stay close to one chunk's
+latency.
+
+Run from backend/: python -m benchmarks.chunking_bench --sizes 10 50 100 200
+"""
+import argparse
+import time
+import httpx
+from benchmarks.common import run_stack
+
+FUNCTION_TEMPLATE = '''
+def handler_{index}(payload):
+    """Process payload {index}."""
+    result = []
+    for item in payload:
+        if item % {mod} == 0:
+            result.append(item * 2)
+    return result
+'''
+
+
+def synthetic_source(kilobytes: int) -> str:
+    parts = []
+    size = 0
+    index = 0
+    while size < kilobytes * 1024:
+        part = FUNCTION_TEMPLATE.format(index=index, mod=index % 7 + 2)
+        parts.append(part)
+        size += len(part)
+        index += 1
+    return "".join(parts)
+
+
+def measure(sizes: list[int], backend_env: dict, mock_env: dict) -> list[float]:
+    latencies = []
+    with run_stack(mock_env=mock_env, backend_env={"REVIEW_CACHE_ENABLED": "false", **backend_env}):
+        for kilobytes in sizes:
+            source = synthetic_source(kilobytes)
+            start = time.perf_counter()
+            response = httpx.post("http://127.0.0.1:8100/api/analyze-code/",
+                                  files={"file": ("bench.py", source.encode())}, timeout=600)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 200], help="File sizes in KB")
+    parser.add_argument("--latency", type=float, default=0.5, help="Base mock latency in seconds")
+    parser.add_argument("--latency-per-1k", type=float, default=0.05, help="Mock latency per 1,000 prompt chars")
+    args = parser.parse_args()
+
+    mock_env = {"MOCK_LATENCY": str(args.latency), "MOCK_LATENCY_PER_1K_CHARS": str(args.latency_per_1k)}
+    single = measure(args.sizes, {"CHUNK_THRESHOLD_CHARS": str(10 ** 9)}, mock_env)
+    chunked = measure(args.sizes, {}, mock_env)
+
+    print(f"{'size_kb':>8} {'single_s':>9} {'chunked_s':>10}")
+    for kilobytes, single_s, chunked_s in zip(args.sizes, single, chunked):
+        print(f"{kilobytes:>8} {single_s:>9.2f} {chunked_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
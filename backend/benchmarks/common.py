@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+def process_memory_kb(pid: int) -> dict:
+    # Current and peak resident set size of a process, from /proc (Linux only)
+    with open(f"/proc/{pid}/status") as status:
+        fields = dict(line.split(":", 1) for line in status)
+    return {key: int(fields[key].split()[0]) for key in ("VmRSS", "VmHWM")}
+
+
+@contextmanager
+def run_server(app_path: str, port: int, env: dict | None = None, ready_path: str = "/docs",
+               log_path: str | None = None):
+    # Start an app under uvicorn in a subprocess and stop it on exit
+    log_file = open(log_path, "w") if log_path else None
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=log_file,
+        stderr=log_file,
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}{ready_path}")
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            # Still draining long requests; the benchmark is over, so do not wait for them
+            process.kill()
+            process.wait()
+        if log_file:
+            log_file.close()
+
+
+@contextmanager
+def run_stack(mock_port: int = 9100, backend_port: int = 8100, mock_env: dict | None = None,
+              backend_env: dict | None = None, backend_log: str | None = None):
+    # Mock OpenAI API plus the backend pointed at it
+    with run_server("benchmarks.mock_openai:app", mock_port, mock_env) as mock:
+        env = {
+            "OPENAI_API_KEY": "mock-key",
+            "OPENAI_API_MODEL": "mock-model",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_port}/v1",
+            **(backend_env or {}),
+        }
+        with run_server("main:app", backend_port, env, ready_path="/health", log_path=backend_log) as backend:
+            yield mock, backend
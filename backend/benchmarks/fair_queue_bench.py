@@ -0,0 +1,87 @@
+"""Interactive review latency while a bulk batch saturates the upstream.
+
+One tenant ("ci") submits a large /api/analyze-batch/ request while another
+("web") sends single /api/analyze-code/ reviews one after another. The
+upstream concurrency is kept small so calls queue in the limiter. With
+arrival-order queueing (FAIR_QUEUE_ENABLED=false) every interactive review
+waits behind the queued batch files; with weighted fair queueing it goes
+ahead of them, while the batch still uses all the capacity left over.
+
+Run from backend/: python -m benchmarks.fair_queue_bench --batch-files 120 --interactive 20
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from benchmarks.common import run_stack
+from benchmarks.suite import percentile
+
+BACKEND_URL = "http://127.0.0.1:8100"
+TENANTS = json.dumps([
+    {"name": "ci", "keys": ["ci-key"], "weight": 1},
+    {"name": "web", "keys": ["web-key"], "weight": 1},
+])
+SCENARIOS = {"arrival order": {"FAIR_QUEUE_ENABLED": "false"}, "fair queueing": {}}
+
+
+async def run_scenario(batch_files: int, interactive: int) -> dict:
+    files = [("files", (f"src/module_{n}.py", f"def f_{n}(x):\n    return x * {n}\n".encode(), "text/plain"))
+             for n in range(batch_files)]
+    async with httpx.AsyncClient(base_url=BACKEND_URL, timeout=600) as http:
+        start = time.perf_counter()
+        batch = asyncio.create_task(http.post("/api/analyze-batch/", files=files, data={"concurrency": "32"},
+                                              headers={"X-API-Key": "ci-key"}))
+        await asyncio.sleep(0.5)  # let the batch fill the upstream queue
+        latencies = []
+        for n in range(interactive):
+            request_start = time.perf_counter()
+            response = await http.post("/api/analyze-code/", data={"code": f"def g_{n}():\n    return {n}\n"},
+                                       headers={"Authorization": "Bearer web-key"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - request_start)
+        batch_response = await batch
+        batch_response.raise_for_status()
+        batch_elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "interactive_p50": percentile(ordered, 0.5),
+        "interactive_p95": percentile(ordered, 0.95),
+        "batch_s": batch_elapsed,
+        "batch_reviewed": batch_response.json()["summary"]["reviewed"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-files", type=int, default=120)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock latency in seconds")
+    parser.add_argument("--upstream-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    backend_env = {
+        "LOG_LEVEL": "WARNING",
+        "TENANTS": TENANTS,
+        "REVIEW_CACHE_ENABLED": "false",
+        "HISTORY_ENABLED": "false",
+        "REVISIONS_ENABLED": "false",
+        "JOB_DB": "/tmp/fair-bench-jobs.db",
+        "BATCH_PACK_MAX_FILES": "1",
+        "BATCH_TOKENS_PER_MINUTE": "10000000",
+        "UPSTREAM_TOKENS_PER_MINUTE": "10000000",
+        "UPSTREAM_REQUESTS_PER_MINUTE": "100000",
+        "UPSTREAM_MAX_CONCURRENCY": str(args.upstream_concurrency),
+        "UPSTREAM_MIN_CONCURRENCY": str(args.upstream_concurrency),
+        "UPSTREAM_HEDGE_ENABLED": "false",
+    }
+    print(f"{'scenario':<15} {'interactive p50':>15} {'p95':>7} {'batch wall':>10} {'batch ok':>8}")
+    for name, env in SCENARIOS.items():
+        with run_stack(mock_env={"MOCK_LATENCY": str(args.latency)}, backend_env={**backend_env, **env}):
+            result = asyncio.run(run_scenario(args.batch_files, args.interactive))
+        print(f"{name:<15} {result['interactive_p50']:>14.2f}s {result['interactive_p95']:>6.2f}s "
+              f"{result['batch_s']:>9.1f}s {result['batch_reviewed']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Tail latency with and without hedged upstream requests.
+
+The mock upstream answers most completions quickly, but a fraction
+(--slow-rate) take --slow-latency seconds longer. Without hedging every slow
+completion is a slow review; with hedging a duplicate is sent once a call
+outlasts the backend's p95, so the tail shrinks to roughly p95 plus one
+normal completion. Each scenario starts with --warmup unmeasured requests,
+since hedging waits for enough latency samples. The last scenario adds a second mock as an extra
+backend (UPSTREAM_BACKENDS) for the hedges to go to.
+
+Run from backend/: python -m benchmarks.hedge_bench --requests 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import httpx
+from benchmarks.common import run_server, run_stack
+from benchmarks.suite import run_cell
+
+SECOND_BACKEND = json.dumps([{
+    "name": "second", "model": "mock-model", "base_url": "http://127.0.0.1:9101/v1", "api_key": "mock-key",
+    "tokens_per_minute": 10_000_000,
+}])
+SCENARIOS = {
+    "no hedging": {"UPSTREAM_HEDGE_ENABLED": "false"},
+    "hedging": {},
+    "hedging, 2 backends": {"UPSTREAM_BACKENDS": SECOND_BACKEND},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="normal mock latency in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--warmup", type=int, default=32)
+    args = parser.parse_args()
+
+    mock_env = {
+        "MOCK_LATENCY": str(args.latency),
+        "MOCK_SLOW_RATE": str(args.slow_rate),
+        "MOCK_SLOW_LATENCY": str(args.slow_latency),
+    }
+    base_env = {
+        "LOG_LEVEL": "WARNING",
+        "REVIEW_CACHE_ENABLED": "false",
+        "HISTORY_ENABLED": "false",
+        "REVISIONS_ENABLED": "false",
+        "JOB_DB": "/tmp/hedge-bench-jobs.db",
+        # Token budgets high enough that queueing for them does not mask upstream latency
+        "UPSTREAM_TOKENS_PER_MINUTE": "10000000",
+        "UPSTREAM_HEDGE_MIN_SAMPLES": "10",
+        "UPSTREAM_HEDGE_MIN_DELAY": str(args.latency / 2),
+    }
+    print(f"{'scenario':<22} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'rps':>6}  hedges")
+    with run_server("benchmarks.mock_openai:app", 9101, {**mock_env, "MOCK_SEED": "1"}):
+        for name, env in SCENARIOS.items():
+            with run_stack(mock_env=mock_env, backend_env={**base_env, **env}) as (_, backend):
+                counter = itertools.count()
+                asyncio.run(run_cell(backend.pid, args.concurrency, 1, args.warmup, 120, counter))
+                cell = asyncio.run(run_cell(backend.pid, args.concurrency, 1, args.requests, 120, counter))
+                router = httpx.get("http://127.0.0.1:8100/api/upstream/stats").json()["router"]
+            latency = cell["latency_s"]
+            print(f"{name:<22} {latency['p50']:>6.2f}s {latency['p95']:>6.2f}s {latency['p99']:>6.2f}s "
+                  f"{latency['max']:>6.2f}s {cell['throughput_rps']:>6.1f}  "
+                  f"{router['hedges_fired']} fired, {router['hedges_won']} won")
+
+
+if __name__ == "__main__":
+    main()
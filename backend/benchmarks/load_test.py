@@ -0,0 +1,66 @@
+"""Concurrent load test of /api/analyze-code/ against the mock OpenAI API.
+
+Throughput should scale with the number of in-flight requests because the
+upstream call no longer blocks the event loop. Every request submits
+different code and the review cache is off, so each one reaches the mock
+instead of being answered from the cache or coalesced with another.
+
+Run from backend/: python -m benchmarks.load_test --concurrency 1 8 32 64
+"""
+import argparse
+import asyncio
+import itertools
+import time
+import httpx
+from benchmarks.common import run_stack
+
+SAMPLE_CODE = "def add_{n}(a, b):\n    return a + b + {n}\n"
+request_numbers = itertools.count()
+
+
+async def run_level(base_url: str, concurrency: int, requests_per_worker: int) -> dict:
+    latencies = []
+    errors = 0
+
+    async def worker(http: httpx.AsyncClient):
+        nonlocal errors
+        for _ in range(requests_per_worker):
+            start = time.perf_counter()
+            response = await http.post(f"{base_url}/api/analyze-code/", data={"code": SAMPLE_CODE.format(n=next(request_numbers))})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=300) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_latency_s": round(sum(latencies) / len(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests-per-worker", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.0, help="Mock upstream latency in seconds")
+    args = parser.parse_args()
+
+    with run_stack(mock_env={"MOCK_LATENCY": str(args.latency)}, backend_env={"REVIEW_CACHE_ENABLED": "false"}):
+        print(f"{'concurrency':>11} {'requests':>8} {'errors':>6} {'elapsed_s':>9} {'rps':>8} {'mean_s':>8}")
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_level("http://127.0.0.1:8100", concurrency, args.requests_per_worker))
+            print(f"{result['concurrency']:>11} {result['requests']:>8} {result['errors']:>6} "
+                  f"{result['elapsed_s']:>9} {result['throughput_rps']:>8} {result['mean_latency_s']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Requests/sec with the previous synchronous DEBUG logging versus structured async logging.
+
+Reviews are served from the cache so the measurement is dominated by
+per-request overhead, including logging. Server output goes to a file, as it
+would to a container log. Server CPU time per request is reported alongside
+throughput because a local load generator often saturates first.
+
+Run from backend/: python -m benchmarks.logging_bench --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import httpx
+from benchmarks.common import run_stack
+
+PROFILES = {
+    # Approximates the old basicConfig(level=DEBUG): every record, libraries included, written inline
+    "legacy-debug-sync": {"LOG_LEVEL": "DEBUG", "LOG_LIBRARY_LEVEL": "DEBUG", "LOG_ASYNC": "false",
+                          "LOG_SAMPLE_RATES": ""},
+    "json-async-sampled": {"LOG_FORMAT": "json", "LOG_ASYNC": "true",
+                           "LOG_SAMPLE_RATES": "/api/analyze-code/=0.1"},
+}
+
+
+def cpu_seconds(pid: int) -> float:
+    # utime + stime from /proc (Linux only)
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def drive(total: int, concurrency: int) -> float:
+    url = "http://127.0.0.1:8100/api/analyze-code/"
+    remaining = total
+
+    async def worker(http: httpx.AsyncClient):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await http.post(url, data={"code": "print('cached')"})
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency), timeout=60) as http:
+        await http.post(url, data={"code": "print('cached')"})  # warm the cache
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'profile':>20} {'req/s':>8} {'cpu_ms/req':>10} {'log_bytes':>10}")
+    for name, env in PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, "server.log")
+            with run_stack(mock_env={"MOCK_LATENCY": "0.05"}, backend_env=env, backend_log=log_path) as (_, backend):
+                cpu_before = cpu_seconds(backend.pid)
+                rps = asyncio.run(drive(args.requests, args.concurrency))
+                cpu_ms = (cpu_seconds(backend.pid) - cpu_before) * 1000 / args.requests
+            print(f"{name:>20} {rps:>8.1f} {cpu_ms:>10.2f} {os.path.getsize(log_path):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Local stub of the OpenAI API for load tests.
+
+Run with: MOCK_LATENCY=1.0 uvicorn benchmarks.mock_openai:app --port 9100
+"""
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+app = FastAPI(title="Mock OpenAI API")
+
+# Seconds to sleep before answering each completion (spread across chunks when streaming)
+MOCK_LATENCY = float(os.getenv("MOCK_LATENCY", 1.0))
+MOCK_STREAM_CHUNK_CHARS = int(os.getenv("MOCK_STREAM_CHUNK_CHARS", 16))
+# Extra seconds per 1,000 prompt characters, to model latency growing with input size
+MOCK_LATENCY_PER_1K_CHARS = float(os.getenv("MOCK_LATENCY_PER_1K_CHARS", 0.0))
+# Extra seconds per 1,000 completion characters, to model generation time
+MOCK_LATENCY_PER_1K_COMPLETION_CHARS = float(os.getenv("MOCK_LATENCY_PER_1K_COMPLETION_CHARS", 0.0))
+# Per-model base latency overrides, e.g. "mock-light=0.3,mock-model=1.5"
+MOCK_MODEL_LATENCY = {
+    name.strip(): float(value)
+    for name, value in (item.split("=", 1) for item in os.getenv("MOCK_MODEL_LATENCY", "").split(",") if "=" in item)
+}
+
+# Generation speed in completion tokens (~4 chars) per second, added after the base latency, which then
+# acts as time to first token (0 keeps the old behaviour of spreading the base latency over the stream)
+MOCK_TOKENS_PER_SECOND = float(os.getenv("MOCK_TOKENS_PER_SECOND", 0))
+
+# Fault injection: fraction of completions answered with a 500 or a 429
+MOCK_ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", 0))
+MOCK_RATE_LIMIT_RATE = float(os.getenv("MOCK_RATE_LIMIT_RATE", 0))
+# Tail latency: this fraction of completions takes MOCK_SLOW_LATENCY seconds longer
+MOCK_SLOW_RATE = float(os.getenv("MOCK_SLOW_RATE", 0))
+MOCK_SLOW_LATENCY = float(os.getenv("MOCK_SLOW_LATENCY", 10.0))
+fault_random = random.Random(os.getenv("MOCK_SEED", "0"))
+
+# Simulated provider cap: completions beyond this many in flight get a 429 (0 disables)
+MOCK_MAX_CONCURRENCY = int(os.getenv("MOCK_MAX_CONCURRENCY", 0))
+MOCK_RETRY_AFTER = os.getenv("MOCK_RETRY_AFTER", "1")
+# Models answering response_format json_schema with a 400, like those without structured outputs
+MOCK_NO_JSON_SCHEMA_MODELS = {model for model in os.getenv("MOCK_NO_JSON_SCHEMA_MODELS", "").split(",") if model}
+
+in_flight = 0
+stats = {"completions": 0, "rate_limited": 0, "errors": 0, "slow": 0, "packed_files": 0,
+         "prompt_tokens": 0, "completion_tokens": 0, "streamed_chars": 0, "aborted": 0, "rejected_schema": 0, "models": {}}
+# System prompts seen so far, to report prefix-cache hits the way the real API does
+seen_prefixes = set()
+PREFIX_CACHE_MIN_TOKENS = 1024
+PACKED_FILE_HEADER = re.compile(r"^=== File: (.+) ===$", re.MULTILINE)
+
+SCORES = {
+    "overall_score": 7.5,
+    "correctness_functionality": 8.0,
+    "code_quality_maintainability": 7.0,
+    "performance_efficiency": 7.5,
+    "security_vulnerability": 8.0,
+    "code_consistency_style": 7.0,
+    "scalability_extensibility": 7.0,
+    "error_handling_robustness": 6.5,
+}
+
+CANNED_ANALYSIS = {
+    **SCORES,
+    "suggestions": [
+        {"type": "improvement", "category": "quality", "message": "Add docstrings to public functions", "line": None},
+        {"type": "warning", "category": "error_handling", "message": "Catch narrower exception types", "line": 1},
+    ],
+    "dimension_explanations": {
+        key: {
+            "score": score,
+            "explanation": "Canned explanation from the mock server",
+            "key_findings": ["Mock finding"],
+            "improvement_suggestions": ["Mock suggestion"],
+        }
+        for key, score in SCORES.items() if key != "overall_score"
+    },
+    "improvement_summary": {
+        "critical_improvements": [],
+        "recommended_improvements": ["Mock recommendation"],
+        "positive_aspects": ["Mock positive aspect"],
+    },
+    "suggested_implementation": {
+        "code": "def add(a: int, b: int) -> int:\n    \"\"\"Return the sum of a and b.\"\"\"\n    return a + b\n",
+        "improvements": ["Mock improvement"],
+        "benefits": ["Mock benefit"],
+        "explanation": "Canned implementation from the mock server",
+    },
+}
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock-model", "object": "model", "created": 0, "owned_by": "mock"}]}
+
+
+def completion_content(body: dict) -> str:
+    # With structured outputs, answer only the fields the requested schema asks for
+    response_format = body.get("response_format") or {}
+    analysis = CANNED_ANALYSIS
+    if response_format.get("type") == "json_schema":
+        properties = response_format["json_schema"]["schema"]["properties"]
+        if "reviews" in properties:
+            properties = properties["reviews"]["items"]["properties"]
+        analysis = {key: value for key, value in CANNED_ANALYSIS.items() if key in properties}
+    # Packed reviews of several files get one review per "=== File: <path> ===" section
+    prompt = "".join(m.get("content") or "" for m in body.get("messages", []) if m.get("role") == "user")
+    paths = PACKED_FILE_HEADER.findall(prompt)
+    if paths:
+        stats["packed_files"] += len(paths)
+        return json.dumps({"reviews": [{"path": path, **analysis} for path in paths]})
+    return json.dumps(analysis)
+
+
+def completion_latency(body: dict, content: str) -> float:
+    prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+    return (MOCK_MODEL_LATENCY.get(body.get("model"), MOCK_LATENCY) + MOCK_LATENCY_PER_1K_CHARS * prompt_chars / 1000
+            + MOCK_LATENCY_PER_1K_COMPLETION_CHARS * len(content) / 1000)
+
+
+def generation_time(chars: int) -> float:
+    return chars / 4 / MOCK_TOKENS_PER_SECOND if MOCK_TOKENS_PER_SECOND else 0.0
+
+
+def usage_for(body: dict, content: str) -> dict:
+    messages = body.get("messages", [])
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    completion_tokens = len(content) // 4
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+    cached_tokens = 0
+    prefix = messages[0].get("content") or "" if messages else ""
+    if len(prefix) // 4 >= PREFIX_CACHE_MIN_TOKENS:
+        if prefix in seen_prefixes:
+            cached_tokens = len(prefix) // 4
+        seen_prefixes.add(prefix)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+
+async def stream_completion(body: dict, content: str, latency: float):
+    global in_flight
+    pieces = [content[i:i + MOCK_STREAM_CHUNK_CHARS] for i in range(0, len(content), MOCK_STREAM_CHUNK_CHARS)]
+    delay = latency / len(pieces)
+    if MOCK_TOKENS_PER_SECOND:
+        # Wait out the time to first token, then emit at the configured token rate
+        delay = generation_time(MOCK_STREAM_CHUNK_CHARS)
+    chunk = {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "mock-model"),
+    }
+    try:
+        if MOCK_TOKENS_PER_SECOND:
+            await asyncio.sleep(latency)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            choices = [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            # Counted as generated once sent, so closed streams show how much output was wasted
+            stats["streamed_chars"] += len(piece)
+            yield f"data: {json.dumps({**chunk, 'choices': choices})}\n\n"
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage_for(body, content)})}\n\n"
+        yield "data: [DONE]\n\n"
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client closed the stream before it finished
+        stats["aborted"] += 1
+        raise
+    finally:
+        in_flight -= 1
+
+
+def rate_limited_response() -> JSONResponse:
+    stats["rate_limited"] += 1
+    return JSONResponse(
+        status_code=429,
+        content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+        headers={"retry-after": MOCK_RETRY_AFTER},
+    )
+
+
+def server_error_response() -> JSONResponse:
+    stats["errors"] += 1
+    return JSONResponse(
+        status_code=500,
+        content={"error": {"message": "Injected server error", "type": "server_error", "code": None}},
+    )
+
+
+def unsupported_schema_response() -> JSONResponse:
+    stats["rejected_schema"] += 1
+    return JSONResponse(
+        status_code=400,
+        content={"error": {
+            "message": "Invalid parameter: 'response_format' of type 'json_schema' is not supported with this model.",
+            "type": "invalid_request_error",
+            "param": "response_format",
+            "code": None,
+        }},
+    )
+
+
+@app.get("/mock/stats")
+async def mock_stats():
+    return {**stats, "in_flight": in_flight}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    global in_flight
+    if body.get("model") in MOCK_NO_JSON_SCHEMA_MODELS and (body.get("response_format") or {}).get("type") == "json_schema":
+        return unsupported_schema_response()
+    if MOCK_MAX_CONCURRENCY and in_flight >= MOCK_MAX_CONCURRENCY:
+        return rate_limited_response()
+    fault = fault_random.random()
+    if fault < MOCK_ERROR_RATE:
+        return server_error_response()
+    if fault < MOCK_ERROR_RATE + MOCK_RATE_LIMIT_RATE:
+        return rate_limited_response()
+
+    stats["completions"] += 1
+    stats["models"][body.get("model")] = stats["models"].get(body.get("model"), 0) + 1
+    content = completion_content(body)
+    latency = completion_latency(body, content)
+    if fault_random.random() < MOCK_SLOW_RATE:
+        stats["slow"] += 1
+        latency += MOCK_SLOW_LATENCY
+    in_flight += 1
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(body, content, latency), media_type="text/event-stream")
+
+    try:
+        await asyncio.sleep(latency + generation_time(len(content)))
+    finally:
+        in_flight -= 1
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock-model"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": usage_for(body, content),
+    }
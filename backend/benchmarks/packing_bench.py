@@ -0,0 +1,69 @@
+"""Batch review cost with and without packing small same-language files.
+
+Submits a batch of small Python, JavaScript and Go files to
+/api/analyze-batch/, once with packing disabled (BATCH_PACK_MAX_FILES=1)
+and once with the defaults, and reports wall time, upstream completions and
+the prompt and completion tokens the mock was billed for. Packing sends the
+system prompt once per pack instead of once per file.
+
+Run from backend/: python -m benchmarks.packing_bench --files 60 --profile standard
+"""
+import argparse
+import time
+import httpx
+from benchmarks.common import run_stack
+
+SOURCES = {
+    "py": "def handler_{n}(items):\n    total = 0\n    for item in items:\n        total += item * {n}\n    return total\n",
+    "js": "function handler{n}(items) {{\n  let total = 0;\n  for (const item of items) {{\n"
+          "    total += item * {n};\n  }}\n  return total;\n}}\nmodule.exports = handler{n};\n",
+    "go": "package handlers\n\nfunc Handler{n}(items []int) int {{\n\ttotal := 0\n"
+          "\tfor _, item := range items {{\n\t\ttotal += item * {n}\n\t}}\n\treturn total\n}}\n",
+}
+SCENARIOS = {"per file": {"BATCH_PACK_MAX_FILES": "1"}, "packed": {}}
+
+
+def batch_files(count: int) -> list[tuple]:
+    extensions = list(SOURCES)
+    files = []
+    for n in range(count):
+        extension = extensions[n % len(extensions)]
+        files.append(("files", (f"src/handler_{n}.{extension}", SOURCES[extension].format(n=n).encode(), "text/plain")))
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--profile", default="standard")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock base latency in seconds")
+    args = parser.parse_args()
+
+    mock_env = {"MOCK_LATENCY": str(args.latency), "MOCK_LATENCY_PER_1K_CHARS": "0.02"}
+    base_env = {
+        "LOG_LEVEL": "WARNING",
+        "REVIEW_CACHE_ENABLED": "false",
+        "HISTORY_ENABLED": "false",
+        "REVISIONS_ENABLED": "false",
+        "JOB_DB": "/tmp/packing-bench-jobs.db",
+        "BATCH_TOKENS_PER_MINUTE": "10000000",
+        "UPSTREAM_TOKENS_PER_MINUTE": "10000000",
+    }
+    files = batch_files(args.files)
+    print(f"{'scenario':<10} {'wall':>7} {'ok':>4} {'completions':>11} {'prompt tok':>10} {'compl. tok':>10}")
+    for name, env in SCENARIOS.items():
+        with run_stack(mock_env=mock_env, backend_env={**base_env, **env}):
+            start = time.perf_counter()
+            response = httpx.post("http://127.0.0.1:8100/api/analyze-batch/", files=files,
+                                  data={"profile": args.profile, "concurrency": str(args.concurrency)}, timeout=600)
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            mock = httpx.get("http://127.0.0.1:9100/mock/stats").json()
+        summary = response.json()["summary"]
+        print(f"{name:<10} {elapsed:>6.2f}s {summary['reviewed']:>4} {mock['completions']:>11} "
+              f"{mock['prompt_tokens']:>10} {mock['completion_tokens']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Parse success rate and cost for clean and damaged model output.
+
+Compares plain json.loads (the old path, where any failure was a 500 and a
+full re-generation) with extract_json + CodeAnalysis validation on the
+canned mock review in several damaged forms.
+
+Run from backend/: python -m benchmarks.parse_bench --iterations 2000
+"""
+import argparse
+import json
+import time
+from benchmarks.mock_openai import CANNED_ANALYSIS
+from utils.json_repair import extract_json
+from utils.schemas import CodeAnalysis
+
+CLEAN = json.dumps(CANNED_ANALYSIS, indent=2)
+VARIANTS = {
+    "clean": CLEAN,
+    "fenced": f"```json\n{CLEAN}\n```",
+    "prose": f"Here is the review of your code:\n\n{CLEAN}\n\nLet me know if you need anything else.",
+    "truncated 95%": CLEAN[:int(len(CLEAN) * 0.95)],
+    "truncated 60%": CLEAN[:int(len(CLEAN) * 0.6)],
+}
+
+
+def old_path(text: str) -> dict:
+    return json.loads(text)
+
+
+def new_path(text: str) -> dict:
+    return CodeAnalysis.parse_obj(extract_json(text)[0]).dict()
+
+
+def measure(parse, text: str, iterations: int) -> tuple[bool, float]:
+    try:
+        parse(text)
+    except ValueError:
+        return False, 0.0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(text)
+    return True, (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'variant':<14} {'json.loads':>14} {'repair+model':>14}")
+    for name, text in VARIANTS.items():
+        cells = []
+        for parse in (old_path, new_path):
+            ok, micros = measure(parse, text, args.iterations)
+            cells.append(f"{micros:>9.0f} us" if ok else f"{'fails':>12}")
+        print(f"{name:<14} {cells[0]:>14} {cells[1]:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Average latency and upstream cost per review, with and without local pre-analysis.
+
+The fixture corpus mixes small clean files, files with obvious security
+issues, complex modules, files that do not parse and generated code. With
+pre-analysis enabled, unparseable and generated files are rejected locally
+and small clean files go to the light model, which the mock answers faster.
+
+Run from backend/: python -m benchmarks.preanalysis_bench --copies 5
+"""
+import argparse
+import statistics
+import time
+import httpx
+from benchmarks.chunking_bench import synthetic_source
+from benchmarks.common import run_stack
+from benchmarks.profile_bench import token_totals
+
+BACKEND_URL = "http://127.0.0.1:8100"
+
+SMALL_CLEAN = '''
+def add(a: int, b: int) -> int:
+    """Return the sum of a and b."""
+    return a + b
+
+
+def mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+'''
+
+INSECURE = '''
+import subprocess
+
+API_KEY = "sk-live-0123456789abcdef"
+
+
+def run(command):
+    return subprocess.run(command, shell=True, capture_output=True)
+
+
+def lookup(cursor, name):
+    cursor.execute(f"SELECT * FROM users WHERE name = '{name}'")
+    return cursor.fetchall()
+'''
+
+BROKEN = '''
+def parse(line)
+    return line.split(",")
+'''
+
+GENERATED = "# Code generated by protoc. DO NOT EDIT.\n" + "\n".join(
+    f"FIELD_{i} = {i}" for i in range(200)
+)
+
+
+def fixture_corpus(copies: int) -> list[tuple[str, str]]:
+    # Distinct copies so neither the cache nor coalescing hides upstream work
+    corpus = []
+    for copy in range(copies):
+        marker = f"\n# copy {copy}\n"
+        corpus += [(f"clean_{copy}_{i}.py", SMALL_CLEAN + marker + f"# file {i}\n") for i in range(4)]
+        corpus.append((f"insecure_{copy}.py", INSECURE + marker))
+        corpus.append((f"module_{copy}.py", synthetic_source(8) + marker))
+        corpus.append((f"broken_{copy}.py", BROKEN + marker))
+        corpus.append((f"generated_{copy}_pb2.py", GENERATED + marker))
+    return corpus
+
+
+def measure(corpus: list[tuple[str, str]], backend_env: dict, mock_env: dict) -> dict:
+    latencies = []
+    rejected = 0
+    with run_stack(mock_env=mock_env, backend_env={"REVIEW_CACHE_ENABLED": "false", **backend_env}):
+        before = token_totals()
+        for filename, source in corpus:
+            start = time.perf_counter()
+            response = httpx.post(f"{BACKEND_URL}/api/analyze-code/",
+                                  files={"file": (filename, source.encode())}, timeout=600)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code == 422:
+                rejected += 1
+            else:
+                response.raise_for_status()
+        after = token_totals()
+        models = httpx.get("http://127.0.0.1:9100/mock/stats").json()["models"]
+    return {
+        "mean": statistics.mean(latencies),
+        "rejected": rejected,
+        "models": models,
+        "prompt": after.get("prompt", 0) - before.get("prompt", 0),
+        "completion": after.get("completion", 0) - before.get("completion", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=5, help="Copies of the 8-file fixture set")
+    parser.add_argument("--latency", type=float, default=1.5, help="Mock latency of the default model")
+    parser.add_argument("--light-latency", type=float, default=0.4, help="Mock latency of the light model")
+    args = parser.parse_args()
+
+    corpus = fixture_corpus(args.copies)
+    mock_env = {"MOCK_LATENCY": str(args.latency), "MOCK_MODEL_LATENCY": f"mock-light={args.light_latency}"}
+    baseline = measure(corpus, {"PREANALYSIS_ENABLED": "false"}, mock_env)
+    tiered = measure(corpus, {"OPENAI_LIGHT_MODEL": "mock-light"}, mock_env)
+
+    print(f"{len(corpus)} files")
+    print(f"{'mode':<14} {'mean s':>8} {'rejected':>9} {'prompt tok':>11} {'compl tok':>10}  upstream calls by model")
+    for name, result in (("llm-only", baseline), ("pre-analysis", tiered)):
+        print(f"{name:<14} {result['mean']:>8.2f} {result['rejected']:>9} {result['prompt']:>11.0f} "
+              f"{result['completion']:>10.0f}  {result['models']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Tokens and latency per review profile (scores-only, standard, full).
+
+Each profile reviews the same file several times with the cache bypassed.
+Token counts come from the backend's upstream_tokens_total metric, so the
+numbers reflect exactly what was billed. The "cached" column counts prompt
+tokens served from the provider's prefix cache, which only applies once the
+prompt prefix reaches about 1024 tokens: the full profile's system prompt
+does, the compact ones (a few hundred tokens each) never do, so their saving
+is purely the shorter prompt and output.
+
+Run from backend/ against the mock upstream:
+    python -m benchmarks.profile_bench --runs 5
+or against the real API configured in .env:
+    python -m benchmarks.profile_bench --real --runs 3 --file main.py
+"""
+import argparse
+import re
+import statistics
+import time
+from contextlib import contextmanager
+import httpx
+from benchmarks.chunking_bench import synthetic_source
+from benchmarks.common import run_server, run_stack
+
+BACKEND_URL = "http://127.0.0.1:8100"
+TOKEN_METRIC = re.compile(r'^upstream_tokens_total\{kind="(\w+)"\} ([0-9.e+]+)$', re.MULTILINE)
+
+
+def token_totals() -> dict[str, float]:
+    text = httpx.get(f"{BACKEND_URL}/metrics").text
+    return {kind: float(value) for kind, value in TOKEN_METRIC.findall(text)}
+
+
+@contextmanager
+def backend(real: bool):
+    env = {"REVIEW_CACHE_ENABLED": "false", "LOG_LEVEL": "WARNING"}
+    if real:
+        with run_server("main:app", 8100, env, ready_path="/health"):
+            yield
+    else:
+        mock_env = {"MOCK_LATENCY": "0.3", "MOCK_LATENCY_PER_1K_COMPLETION_CHARS": "0.5"}
+        with run_stack(mock_env=mock_env, backend_env=env):
+            yield
+
+
+def measure(profile: str, source: str, runs: int) -> dict:
+    before = token_totals()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = httpx.post(f"{BACKEND_URL}/api/analyze-code/",
+                              data={"code": source, "profile": profile}, timeout=600)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    after = token_totals()
+    per_run = {kind: (after.get(kind, 0) - before.get(kind, 0)) / runs for kind in after}
+    return {
+        "prompt": per_run.get("prompt", 0),
+        "cached": per_run.get("cached_prompt", 0),
+        "completion": per_run.get("completion", 0),
+        "p50": statistics.median(latencies),
+        "max": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["scores-only", "standard", "full"])
+    parser.add_argument("--runs", type=int, default=5, help="Reviews per profile")
+    parser.add_argument("--file", help="Source file to review (default: 4 KB of synthetic Python)")
+    parser.add_argument("--real", action="store_true", help="Use the upstream configured in the environment")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            source = f.read()
+    else:
+        source = synthetic_source(4)
+
+    print(f"{'profile':<12} {'prompt tok':>10} {'cached':>8} {'compl tok':>10} {'p50 s':>8} {'max s':>8}")
+    with backend(args.real):
+        for profile in args.profiles:
+            result = measure(profile, source, args.runs)
+            print(f"{profile:<12} {result['prompt']:>10.0f} {result['cached']:>8.0f} {result['completion']:>10.0f} "
+                  f"{result['p50']:>8.2f} {result['max']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Repository-wide review: a per-file request loop against the dev-diligence CLI client.
+
+A synthetic repository of --files source files is reviewed three ways:
+one request after another on a new connection each (what a CI curl loop
+does), with the SDK's concurrent, pooled client, and with the SDK again
+after --changed files were edited, when the hash manifest skips the rest.
+The review cache is off, so every submitted file reaches the mock API.
+Connections here are local plain HTTP; behind TLS the per-file handshakes
+the loop pays for are larger still.
+
+Run from backend/ with the SDK importable:
+PYTHONPATH=.:../sdk python -m benchmarks.sdk_bench --files 120 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import httpx
+from benchmarks.common import run_stack
+from dev_diligence import Manifest, ReviewClient, review_directory
+
+BACKEND_URL = "http://127.0.0.1:8100"
+
+
+def write_repository(root: str, files: int):
+    os.makedirs(os.path.join(root, "build"))
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("build/\n")
+    for n in range(files):
+        directory = os.path.join(root, f"pkg_{n % 8}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module_{n}.py"), "w") as f:
+            f.write(f"def handler_{n}(items):\n    return [item * {n} for item in items]\n")
+    # Build output the reviews should not pick up
+    for n in range(files // 4):
+        with open(os.path.join(root, "build", f"generated_{n}.py"), "w") as f:
+            f.write(f"VALUE_{n} = {n}\n")
+
+
+def request_loop(root: str) -> int:
+    # One request at a time, a fresh connection for each, every file (no .gitignore either)
+    reviewed = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.endswith(".py"):
+                continue
+            with open(os.path.join(dirpath, name), "rb") as f:
+                response = httpx.post(f"{BACKEND_URL}/api/analyze-code/", files={"file": (name, f.read())},
+                                      timeout=300)
+            response.raise_for_status()
+            reviewed += 1
+    return reviewed
+
+
+async def sdk_run(root: str, concurrency: int, manifest: Manifest) -> dict:
+    counts = {}
+    async with ReviewClient(BACKEND_URL, max_connections=concurrency) as client:
+        async for result in review_directory(client, root, concurrency=concurrency, manifest=manifest):
+            counts[result.status] = counts.get(result.status, 0) + 1
+    manifest.save()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=120)
+    parser.add_argument("--changed", type=int, default=6, help="files edited before the incremental run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.3, help="mock latency in seconds")
+    args = parser.parse_args()
+
+    backend_env = {
+        "LOG_LEVEL": "WARNING",
+        "REVIEW_CACHE_ENABLED": "false",
+        "HISTORY_ENABLED": "false",
+        "REVISIONS_ENABLED": "false",
+        "JOB_DB": "/tmp/sdk-bench-jobs.db",
+        "UPSTREAM_TOKENS_PER_MINUTE": "10000000",
+        "UPSTREAM_REQUESTS_PER_MINUTE": "100000",
+        "UPSTREAM_HEDGE_ENABLED": "false",
+    }
+    with tempfile.TemporaryDirectory() as root, run_stack(mock_env={"MOCK_LATENCY": str(args.latency)},
+                                                          backend_env=backend_env):
+        write_repository(root, args.files)
+        manifest = Manifest(os.path.join(root, ".dev-diligence-manifest.json"))
+        print(f"{'scenario':<22} {'sent':>5} {'unchanged':>9} {'wall':>8}")
+
+        start = time.perf_counter()
+        sent = request_loop(root)
+        print(f"{'request loop':<22} {sent:>5} {0:>9} {time.perf_counter() - start:>7.1f}s")
+
+        start = time.perf_counter()
+        counts = asyncio.run(sdk_run(root, args.concurrency, manifest))
+        print(f"{'sdk, full run':<22} {counts.get('reviewed', 0):>5} {counts.get('unchanged', 0):>9} "
+              f"{time.perf_counter() - start:>7.1f}s")
+
+        for n in range(args.changed):
+            with open(os.path.join(root, f"pkg_{n % 8}", f"module_{n}.py"), "a") as f:
+                f.write(f"\n\ndef extra_{n}():\n    return {n}\n")
+        start = time.perf_counter()
+        counts = asyncio.run(sdk_run(root, args.concurrency, manifest))
+        print(f"{'sdk, after edits':<22} {counts.get('reviewed', 0):>5} {counts.get('unchanged', 0):>9} "
+              f"{time.perf_counter() - start:>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
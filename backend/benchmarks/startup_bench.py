@@ -0,0 +1,89 @@
+"""Import and process-start-to-ready time of the app.
+
+Measures how long `import main` takes, then how long uvicorn (one worker) and
+gunicorn (--workers N) take from spawn until /ready answers 200, with the
+upstream reachable (mock) and unreachable (offline). Upstream verification
+runs in the background, so the offline case should not be slower.
+
+Run from backend/: python -m benchmarks.startup_bench --runs 3 --workers 4
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.common import BACKEND_DIR, run_server
+
+PORT = 8100
+BASE_ENV = {
+    "OPENAI_API_KEY": "mock-key",
+    "OPENAI_API_MODEL": "mock-model",
+    "LOG_LEVEL": "WARNING",
+    "JOB_DB": "/tmp/startup-bench-jobs.db",
+    "REVISIONS_DB": "/tmp/startup-bench-reviews.db",
+}
+UPSTREAMS = {
+    "online": "http://127.0.0.1:9100/v1",
+    # Unroutable address: connections hang until the client's connect timeout
+    "offline": "http://10.255.255.1/v1",
+}
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+
+def import_time(env: dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_to_ready(command: list[str], env: dict, timeout: float = 60) -> float:
+    # One client for all polls; creating a client per poll costs more than the startup being measured
+    http = httpx.Client(timeout=0.5)
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if http.get(f"http://127.0.0.1:{PORT}/ready").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError("Server did not become ready")
+    finally:
+        http.close()
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn worker count")
+    args = parser.parse_args()
+
+    servers = {
+        "uvicorn x1": [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(PORT),
+                       "--log-level", "warning"],
+        f"gunicorn x{args.workers}": [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py",
+                                      "--bind", f"127.0.0.1:{PORT}"],
+    }
+
+    with run_server("benchmarks.mock_openai:app", 9100):
+        for upstream, base_url in UPSTREAMS.items():
+            env = {**os.environ, **BASE_ENV, "OPENAI_BASE_URL": base_url}
+            imports = [import_time(env) for _ in range(args.runs)]
+            print(f"[{upstream}] import main: {statistics.median(imports):.2f}s")
+            for name, command in servers.items():
+                # uvicorn also reads WEB_CONCURRENCY, so only gunicorn gets the worker count
+                server_env = {**env, "WEB_CONCURRENCY": str(args.workers)} if "gunicorn" in command else env
+                times = [time_to_ready(command, server_env) for _ in range(args.runs)]
+                print(f"[{upstream}] {name:<12} spawn to ready: median {statistics.median(times):.2f}s, "
+                      f"max {max(times):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Offline benchmark suite for /api/analyze-code/, with machine-readable results for CI.
+
+Starts the mock OpenAI API and the backend, then drives /api/analyze-code/
+at each combination of concurrency level and file size. Every request sends
+distinct code, so the cache and coalescing do not hide upstream work. For
+each cell it reports p50/p95/p99 latency, throughput, status counts and the
+backend's resident memory (sampled during the run) as JSON.
+
+The mock's behaviour is set from the command line: base latency (time to
+first token when --tokens-per-second is set), generation rate, and the
+fraction of completions that fail with a 500 or a 429.
+
+With --baseline, results are compared with an earlier run and the exit
+status is 1 if any cell's p95 latency rose, or its throughput fell, by more
+than --tolerance, or its error rate rose by more than --tolerance.
+
+Run from backend/:
+    python -m benchmarks.suite --concurrency 1 8 32 --sizes 1 8 --output bench.json
+    python -m benchmarks.suite --baseline bench.json
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import sys
+import time
+import httpx
+from benchmarks.chunking_bench import synthetic_source
+from benchmarks.common import process_memory_kb, run_stack
+
+BACKEND_URL = "http://127.0.0.1:8100"
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+async def sample_rss(pid: int, samples: list[int], stop: asyncio.Event):
+    while not stop.is_set():
+        samples.append(process_memory_kb(pid)["VmRSS"])
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_cell(pid: int, concurrency: int, size_kb: int, requests: int, timeout: float,
+                   counter: itertools.count) -> dict:
+    source = synthetic_source(size_kb)
+    latencies = []
+    statuses = collections.Counter()
+    pending = iter(range(requests))
+
+    async def worker(http: httpx.AsyncClient):
+        for _ in pending:
+            # A unique trailing comment per request keeps every review a cache miss
+            code = f"{source}\n# request {next(counter)}\n"
+            start = time.perf_counter()
+            try:
+                response = await http.post(f"{BACKEND_URL}/api/analyze-code/", data={"code": code})
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    samples = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, samples, stop))
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency), timeout=timeout) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+
+    ordered = sorted(latencies)
+    ok = statuses.get("200", 0)
+    return {
+        "concurrency": concurrency,
+        "size_kb": size_kb,
+        "requests": len(latencies),
+        "ok": ok,
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else 0.0,
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3),
+        "latency_s": {
+            "mean": round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+            "p50": round(percentile(ordered, 0.50), 4),
+            "p95": round(percentile(ordered, 0.95), 4),
+            "p99": round(percentile(ordered, 0.99), 4),
+            "max": round(ordered[-1], 4) if ordered else 0.0,
+        },
+        "rss_mb": {
+            "start": round(samples[0] / 1024, 1),
+            "peak": round(max(samples) / 1024, 1),
+            "end": round(samples[-1] / 1024, 1),
+        },
+    }
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    # Regressions of matching cells; cells missing from either run are ignored
+    previous = {(cell["concurrency"], cell["size_kb"]): cell for cell in baseline}
+    regressions = []
+    for cell in results:
+        old = previous.get((cell["concurrency"], cell["size_kb"]))
+        if not old:
+            continue
+        name = f"concurrency={cell['concurrency']} size_kb={cell['size_kb']}"
+        if cell["latency_s"]["p95"] > old["latency_s"]["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['latency_s']['p95']}s -> {cell['latency_s']['p95']}s")
+        if cell["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old['throughput_rps']} -> {cell['throughput_rps']} rps")
+        if cell["error_rate"] > old["error_rate"] + tolerance:
+            regressions.append(f"{name}: error rate {old['error_rate']} -> {cell['error_rate']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8], help="file sizes in KB")
+    parser.add_argument("--requests", type=int, default=64, help="requests per cell")
+    parser.add_argument("--timeout", type=float, default=120, help="client timeout per request, in seconds")
+    parser.add_argument("--latency", type=float, default=0.5, help="mock base latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="mock generation rate (0: off)")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of completions failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="fraction of completions failing with 429")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    mock_env = {
+        "MOCK_LATENCY": str(args.latency),
+        "MOCK_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "MOCK_ERROR_RATE": str(args.error_rate),
+        "MOCK_RATE_LIMIT_RATE": str(args.rate_limit_rate),
+    }
+    backend_env = {
+        "LOG_LEVEL": "WARNING",
+        "REVIEW_CACHE_DB": "",
+        "JOB_DB": "/tmp/bench-suite-jobs.db",
+        "REVISIONS_DB": "/tmp/bench-suite-reviews.db",
+        "HISTORY_ENABLED": "false",
+    }
+    counter = itertools.count()
+    results = []
+    with run_stack(mock_env=mock_env, backend_env=backend_env) as (mock, backend):
+        for size_kb in args.sizes:
+            for concurrency in args.concurrency:
+                cell = asyncio.run(run_cell(backend.pid, concurrency, size_kb, args.requests, args.timeout, counter))
+                results.append(cell)
+                print(f"concurrency={concurrency:<4} size_kb={size_kb:<4} p50={cell['latency_s']['p50']:.3f}s "
+                      f"p95={cell['latency_s']['p95']:.3f}s p99={cell['latency_s']['p99']:.3f}s "
+                      f"rps={cell['throughput_rps']:.1f} errors={cell['error_rate']:.1%} "
+                      f"rss_peak={cell['rss_mb']['peak']}MB", file=sys.stderr)
+        mock_stats = httpx.get("http://127.0.0.1:9100/mock/stats").json()
+    for path in (backend_env["JOB_DB"], backend_env["REVISIONS_DB"]):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    report = {"config": {**vars(args), "mock": mock_env}, "mock_stats": mock_stats, "results": results}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
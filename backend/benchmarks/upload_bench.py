@@ -0,0 +1,110 @@
+"""Backend peak memory and status codes under many concurrent large uploads.
+
+Sends a mix of in-limit uploads (cp1252-encoded, so they take the fallback
+decode path) and oversized uploads, half with a declared Content-Length and
+half chunked, at once. With the upload limit on, oversized bodies are cut
+off with 413 while they stream in; with it off (MAX_UPLOAD_BYTES=0) every
+body is read, spooled, decoded and reviewed; requests still running after
+--timeout are counted as ReadTimeout. Peak RSS is the backend's VmHWM.
+
+Run from backend/: python -m benchmarks.upload_bench --clients 8 --oversize-mb 4
+"""
+import argparse
+import asyncio
+import collections
+import os
+import time
+import uuid
+import httpx
+from benchmarks.chunking_bench import synthetic_source
+from benchmarks.common import process_memory_kb, run_stack
+
+BACKEND_URL = "http://127.0.0.1:8100"
+SCENARIOS = {
+    "limit on": {},
+    "limit off": {"MAX_UPLOAD_BYTES": "0"},
+}
+
+
+def multipart(filename: str, data: bytes, chunked: bool):
+    boundary = uuid.uuid4().hex
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: text/x-python\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}\r\nContent-Disposition: form-data; name=\"bypass_cache\"\r\n\r\ntrue" \
+           f"\r\n--{boundary}--\r\n".encode()
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if not chunked:
+        return head + data + tail, headers
+
+    async def body():
+        yield head
+        for start in range(0, len(data), 256 * 1024):
+            yield data[start:start + 256 * 1024]
+        yield tail
+    return body(), headers
+
+
+async def upload(client: httpx.AsyncClient, filename: str, data: bytes, chunked: bool) -> tuple[str, float]:
+    content, headers = multipart(filename, data, chunked)
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"{BACKEND_URL}/api/analyze-code/", content=content, headers=headers)
+        status = str(response.status_code)
+    except httpx.HTTPError as e:
+        # The server may close the connection before a chunked sender has finished
+        status = type(e).__name__
+    return status, time.perf_counter() - start
+
+
+async def run_scenario(pid: int, args) -> dict:
+    small = (synthetic_source(args.size_kb) + "\n# café\n").encode("cp1252")
+    large = synthetic_source(args.oversize_mb * 1024).encode()
+    before = process_memory_kb(pid)
+    jobs = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=httpx.Limits(max_connections=args.clients * 2)) as client:
+        for i in range(args.clients):
+            jobs.append(upload(client, f"small_{i}.py", small.replace(b"# caf", f"# {i} caf".encode()), False))
+            jobs.append(upload(client, f"large_{i}.py", large, chunked=i % 2 == 1))
+        start = time.perf_counter()
+        results = await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - start
+    after = process_memory_kb(pid)
+    return {
+        "elapsed": elapsed,
+        "small": collections.Counter(status for status, _ in results[0::2]),
+        "large": collections.Counter(status for status, _ in results[1::2]),
+        "large_p50": sorted(seconds for _, seconds in results[1::2])[len(results) // 4],
+        "rss_before_mb": before["VmRSS"] / 1024,
+        "peak_mb": after["VmHWM"] / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent uploads of each kind")
+    parser.add_argument("--size-kb", type=int, default=32, help="size of the in-limit uploads")
+    parser.add_argument("--oversize-mb", type=int, default=4, help="size of the oversized uploads")
+    parser.add_argument("--timeout", type=float, default=30, help="client timeout per request, in seconds")
+    args = parser.parse_args()
+
+    for name, env in SCENARIOS.items():
+        backend_env = {
+            "LOG_LEVEL": "WARNING",
+            "REVIEW_PROFILE": "scores-only",
+            "JOB_DB": "/tmp/upload-bench-jobs.db",
+            "REVISIONS_DB": "/tmp/upload-bench-reviews.db",
+            **env,
+        }
+        with run_stack(mock_env={"MOCK_LATENCY": "0.2"}, backend_env=backend_env) as (_, backend):
+            result = asyncio.run(run_scenario(backend.pid, args))
+            print(f"[{name}] {result['elapsed']:.1f}s, in-limit {dict(result['small'])}, "
+                  f"oversized {dict(result['large'])} (p50 {result['large_p50']:.2f}s), "
+                  f"RSS {result['rss_before_mb']:.0f} MB -> peak {result['peak_mb']:.0f} MB", flush=True)
+        for path in ("/tmp/upload-bench-jobs.db", "/tmp/upload-bench-reviews.db"):
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
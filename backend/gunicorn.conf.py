@@ -0,0 +1,50 @@
+# Production server: gunicorn managing uvicorn workers
+#   gunicorn main:app -c gunicorn.conf.py
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Reviews are I/O bound, so one worker per CPU is enough to use every core for parsing and serialization
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# main.py splits the upstream rate limits between workers using this
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# On SIGTERM workers stop accepting connections and let in-flight reviews finish for up to this long
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 120))
+timeout = int(os.getenv("WORKER_TIMEOUT", 180))
+keepalive = 75
+# Restart workers periodically to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("ACCESS_LOG") or None
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+# Prometheus metrics are aggregated across workers through a shared directory
+if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+# Import the heavy dependencies once in the master so forked workers start with them loaded.
+# The app itself is not preloaded: its clients, pools and SQLite connections must be per worker.
+if os.getenv("PRELOAD_DEPENDENCIES", "true").lower() == "true":
+    import fastapi  # noqa: F401
+    import openai  # noqa: F401
+    import prometheus_client  # noqa: F401
+
+
+def on_starting(server):
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        # Values left over from a previous run would be summed into the new ones
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
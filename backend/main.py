@@ -1,32 +1,63 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
-from openai import OpenAI
 from utils.templates import get_root_html
+from utils.llm_client import create_async_client, classify_upstream_error, rejects_response_format
 import os
-import json
+import asyncio
+import codecs
+import copy
+import math
+import time
 import httpx
 import logging
-from pydantic import BaseModel
-from typing import List, Literal
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from prompts.code_review import CODE_REVIEW_PROMPT
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+import starlette.datastructures
+from prompts.review_profiles import REVIEW_PROFILES, ReviewProfile, PACKED_INSTRUCTIONS
+from prompts.languages import language_prompt, language_guidance
+from utils.review_cache import ReviewCache, make_cache_key
+from utils.streaming import TopLevelFieldParser, sse_event
+from utils.scoring import SCORE_FIELDS, weighted_scores, merge_analyses
+from utils.chunking import split_code, offset_suggestion_lines
+from utils.languages import detect_language
+from utils.archives import iter_archive_files
+from utils.uploads import UploadLimitMiddleware, UndecodableUpload, decode_upload, decode_bytes
+from utils.rate_limit import TokenBucket, UpstreamLimiter, UpstreamThrottled, QueueFull, WeightedFairQueue, estimate_tokens
+from utils.router import Backend, BackendRouter, parse_backends
+from utils.disconnect import ClientDisconnected, run_until_disconnect
+from utils.tenants import (TenantMiddleware, build_registry, parse_tenants, current_tenant, current_traffic,
+                           current_tenant_name)
+from utils.jobs import JobStore, JobQueue, PRIORITIES, WebhookRejected
+from utils.singleflight import SingleFlight
+from utils.preanalysis import preanalyze, findings_context
+from utils.review_store import ReviewStore
+from utils.review_history import ReviewHistory, code_hash
+from utils.schemas import CodeAnalysis, coerce_score
+from utils.json_repair import extract_json, orjson, JSONExtractionError
+from utils.incremental import diff_opcodes, changed_ranges, review_windows, numbered_lines, carry_over_suggestions
+from utils.metrics import (
+    observe_stage, record_usage, record_error, register_stats, metrics_payload,
+    REVIEWS_IN_FLIGHT, REVIEW_ROUTES, RESPONSE_REPAIRS, UPSTREAM_TTFT_SECONDS, CLIENT_DISCONNECTS, UPSTREAM_CANCELLED
 )
-logger = logging.getLogger(__name__)
+from prometheus_client import CONTENT_TYPE_LATEST
+from utils.logging_config import configure_logging, redact_headers, truncate, RequestContextMiddleware
+from utils.static_assets import StaticManifest, asset_response, HASHED_PREFIX
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Configure logging (LOG_LEVEL, LOG_FORMAT=text|json, LOG_ASYNC, LOG_SAMPLE_RATES)
+configure_logging()
+logger = logging.getLogger(__name__)
+LOG_MAX_RAW_RESPONSE_CHARS = int(os.getenv("LOG_MAX_RAW_RESPONSE_CHARS", 2000))
+
+# Initialize pooled async OpenAI client
+client = create_async_client()
 
 app = FastAPI(
     title="Code Review API",
@@ -40,10 +71,14 @@ os.makedirs(os.path.join(static_dir, "_next/static"), exist_ok=True)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
-try:
-    app.mount("/_next/static", StaticFiles(directory=os.path.join(static_dir, "_next/static")), name="next-static")
-except RuntimeError as e:
-    logger.warning(f"Static files directory not found: {e}")
+
+# Frontend assets (including hashed _next/static bundles) are served from an in-memory manifest
+static_manifest = StaticManifest(
+    static_dir,
+    max_memory_bytes=int(os.getenv("STATIC_MAX_MEMORY_BYTES", 2 * 1024 * 1024)),
+)
+# Seconds between checks for a changed static/ tree; 0 indexes once at startup
+STATIC_RESCAN_INTERVAL = float(os.getenv("STATIC_RESCAN_INTERVAL", 0))
 
 # Configure CORS
 is_production = os.getenv("RAILWAY_ENVIRONMENT") == "production"
@@ -53,14 +88,6 @@ CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", default_c
 logger.info(f"CORS Origins configured: {CORS_ORIGINS}")
 logger.info(f"Production mode: {is_production}")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with your frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # Set OpenAI API key and model from environment variables
 openai_model = os.getenv("OPENAI_API_MODEL")
 
@@ -68,39 +95,243 @@ openai_model = os.getenv("OPENAI_API_MODEL")
 if not openai_model:
     raise ValueError("No OpenAI model specified. Please check your .env file.")
 
+# Sampling temperature for review completions (part of the cache key)
+REVIEW_TEMPERATURE = float(os.getenv("REVIEW_TEMPERATURE", 0.3))
+
+# Review result cache: in-memory LRU, plus an on-disk SQLite tier when REVIEW_CACHE_DB is set
+review_cache = None
+if os.getenv("REVIEW_CACHE_ENABLED", "true").lower() == "true":
+    review_cache = ReviewCache(
+        max_entries=int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", 1024)),
+        ttl=float(os.getenv("REVIEW_CACHE_TTL", 86400)),
+        db_path=os.getenv("REVIEW_CACHE_DB") or None,
+    )
+
+# Server worker processes (set by gunicorn.conf.py); per-process budgets are split between them
+SERVER_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+# API-key tenants with in-memory per-minute quotas, e.g. [{"name": "ci", "keys": ["..."], "weight": 1,
+#   "requests_per_minute": 120, "tokens_per_minute": 400000}, {"name": "web", "weight": 2}]
+# A tenant without keys serves requests that carry none; leaving TENANTS unset keeps the API open
+tenant_registry = build_registry(parse_tenants(os.getenv("TENANTS") or "[]"), SERVER_WORKERS)
+# Weighted fair queueing of upstream calls per tenant and traffic class: interactive reviews outweigh
+# bulk ones (batch and jobs), which get the capacity interactive traffic leaves unused
+FAIR_QUEUE_WEIGHTS = {
+    "interactive": float(os.getenv("FAIR_QUEUE_INTERACTIVE_WEIGHT", 8)),
+    "bulk": float(os.getenv("FAIR_QUEUE_BULK_WEIGHT", 1)),
+}
+BULK_PREFIXES = ("/api/analyze-batch/", "/api/jobs/")
+FAIR_QUEUE_ENABLED = os.getenv("FAIR_QUEUE_ENABLED", "true").lower() == "true"
+fair_queue = WeightedFairQueue()
+
+# Shared limiter for upstream completions: request/token budgets, fair queueing, adaptive concurrency
+upstream_limiter = UpstreamLimiter(
+    requests_per_minute=float(os.getenv("UPSTREAM_REQUESTS_PER_MINUTE", 500)) / SERVER_WORKERS,
+    tokens_per_minute=float(os.getenv("UPSTREAM_TOKENS_PER_MINUTE", 200000)) / SERVER_WORKERS,
+    max_concurrency=max(1, int(os.getenv("UPSTREAM_MAX_CONCURRENCY", 32)) // SERVER_WORKERS),
+    min_concurrency=int(os.getenv("UPSTREAM_MIN_CONCURRENCY", 1)),
+    target_latency=float(os.getenv("UPSTREAM_TARGET_LATENCY", 90)),
+    max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", 4)),
+    max_queue=int(os.getenv("UPSTREAM_MAX_QUEUE", 1000)),
+    on_dispatch=fair_queue.dispatched,
+)
+
+# Upstream backends: the default one (OPENAI_* settings and the limiter above) first, then any
+# listed in UPSTREAM_BACKENDS, e.g. a second provider or a local OpenAI-compatible server:
+# [{"name": "local", "model": "qwen2.5-coder", "base_url": "http://localhost:8080/v1", "api_key": "none",
+#   "max_chars": 8000, "profiles": ["scores-only"], "requests_per_minute": 60, "max_concurrency": 4}]
+UPSTREAM_UNHEALTHY_AFTER = int(os.getenv("UPSTREAM_UNHEALTHY_AFTER", 3))
+UPSTREAM_UNHEALTHY_COOLDOWN = float(os.getenv("UPSTREAM_UNHEALTHY_COOLDOWN", 30))
+
+def build_backend(entry: dict) -> Backend:
+    api_key = entry.get("api_key") or (os.getenv(entry["api_key_env"]) if entry.get("api_key_env") else None)
+    limiter = UpstreamLimiter(
+        requests_per_minute=float(entry.get("requests_per_minute", 500)) / SERVER_WORKERS,
+        tokens_per_minute=float(entry.get("tokens_per_minute", 200000)) / SERVER_WORKERS,
+        max_concurrency=max(1, int(entry.get("max_concurrency", 32)) // SERVER_WORKERS),
+        target_latency=float(os.getenv("UPSTREAM_TARGET_LATENCY", 90)),
+        max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", 4)),
+        max_queue=int(os.getenv("UPSTREAM_MAX_QUEUE", 1000)),
+        on_dispatch=fair_queue.dispatched,
+    )
+    return Backend(
+        entry["name"],
+        entry["model"],
+        create_async_client(entry.get("base_url"), api_key),
+        limiter,
+        max_chars=int(entry.get("max_chars", 0)),
+        profiles=tuple(entry.get("profiles") or ()),
+        unhealthy_after=UPSTREAM_UNHEALTHY_AFTER,
+        cooldown=UPSTREAM_UNHEALTHY_COOLDOWN,
+    )
+
+upstream_backends = [Backend("default", openai_model, client, upstream_limiter,
+                             unhealthy_after=UPSTREAM_UNHEALTHY_AFTER, cooldown=UPSTREAM_UNHEALTHY_COOLDOWN)]
+if os.getenv("UPSTREAM_BACKENDS"):
+    upstream_backends += [build_backend(entry) for entry in parse_backends(os.getenv("UPSTREAM_BACKENDS"))]
+# Hedging: a call still running after the backend's UPSTREAM_HEDGE_PERCENTILE latency gets a duplicate
+upstream_router = BackendRouter(
+    upstream_backends,
+    hedge_percentile=float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", 0.95))
+    if os.getenv("UPSTREAM_HEDGE_ENABLED", "true").lower() == "true" else None,
+    hedge_min_samples=int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", 20)),
+    hedge_min_delay=float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", 1.0)),
+)
+
+# Coalesces concurrent reviews of identical code onto one upstream call
+review_flights = SingleFlight()
+# Cancel a review when its client disconnects; a coalesced review keeps running while other requests wait on it
+CANCEL_ON_DISCONNECT = os.getenv("CANCEL_ON_DISCONNECT", "true").lower() == "true"
+
+# Expected completion size, added to the prompt estimate when spending the token budget
+UPSTREAM_COMPLETION_TOKENS = int(os.getenv("UPSTREAM_COMPLETION_TOKENS", 1500))
+
+# Review profiles trade detail for tokens: scores-only, standard or full
+REVIEW_PROFILE = os.getenv("REVIEW_PROFILE", "full")
+if REVIEW_PROFILE not in REVIEW_PROFILES:
+    raise ValueError(f"REVIEW_PROFILE must be one of: {', '.join(REVIEW_PROFILES)}")
+# json_schema (structured outputs), json_object (JSON mode) or none for servers that support neither
+REVIEW_RESPONSE_FORMAT = os.getenv("REVIEW_RESPONSE_FORMAT", "json_schema").lower()
+# Models that rejected json_schema; their calls fall back to json_object
+schema_unsupported_models: set[str] = set()
+
+# Batch reviews: parallel fan-out per request and a shared upstream token budget
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 32))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 200))
+BATCH_MAX_FILE_BYTES = int(os.getenv("BATCH_MAX_FILE_BYTES", 512 * 1024))
+batch_token_budget = TokenBucket(float(os.getenv("BATCH_TOKENS_PER_MINUTE", 200000)) / SERVER_WORKERS)
+# Files of at most BATCH_PACK_FILE_MAX_CHARS in the same language are packed into one upstream request,
+# up to BATCH_PACK_MAX_FILES files and BATCH_PACK_MAX_CHARS in total (BATCH_PACK_MAX_FILES=1 disables)
+BATCH_PACK_FILE_MAX_CHARS = int(os.getenv("BATCH_PACK_FILE_MAX_CHARS", 2000))
+BATCH_PACK_MAX_FILES = int(os.getenv("BATCH_PACK_MAX_FILES", 6))
+BATCH_PACK_MAX_CHARS = int(os.getenv("BATCH_PACK_MAX_CHARS", 10000))
+
+# Request body limits, enforced while the body streams in (0 disables). Uploads larger than
+# UPLOAD_SPOOL_BYTES go to a temp file instead of memory; non-UTF-8 text is tried against the fallbacks.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 2 * 1024 * 1024))
+BATCH_MAX_UPLOAD_BYTES = int(os.getenv("BATCH_MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+# The multipart parser creates Starlette's UploadFile, not FastAPI's subclass, so the limit is set there
+starlette.datastructures.UploadFile.spool_max_size = int(os.getenv("UPLOAD_SPOOL_BYTES", 256 * 1024))
+UPLOAD_FALLBACK_ENCODINGS = [name.strip() for name in os.getenv("UPLOAD_FALLBACK_ENCODINGS", "cp1252").split(",")
+                             if name.strip()]
+for encoding in UPLOAD_FALLBACK_ENCODINGS:
+    codecs.lookup(encoding)  # fail at startup, not on the first upload
+
+# Large files are split at syntactic boundaries and reviewed as parallel chunks
+CHUNK_THRESHOLD_CHARS = int(os.getenv("CHUNK_THRESHOLD_CHARS", 24000))
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", 12000))
+CHUNK_MAX_CHUNKS = int(os.getenv("CHUNK_MAX_CHUNKS", 16))
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", 4))
+
+# Local pre-analysis before the model: reject unparseable or generated input, route simple files to a cheaper model
+PREANALYSIS_WORKERS = int(os.getenv("PREANALYSIS_WORKERS", 2))
+preanalysis_pool = None
+if os.getenv("PREANALYSIS_ENABLED", "true").lower() == "true":
+    preanalysis_pool = ProcessPoolExecutor(max_workers=PREANALYSIS_WORKERS)
+PREANALYSIS_REJECT_INVALID = os.getenv("PREANALYSIS_REJECT_INVALID", "true").lower() == "true"
+# A "generated by"/"do not edit" header alone also matches hand-edited files; only long ones are refused
+GENERATED_REJECT_MIN_LINES = int(os.getenv("GENERATED_REJECT_MIN_LINES", 1000))
+OPENAI_LIGHT_MODEL = os.getenv("OPENAI_LIGHT_MODEL") or None
+LIGHT_MODEL_MAX_CHARS = int(os.getenv("LIGHT_MODEL_MAX_CHARS", 4000))
+LIGHT_MODEL_MAX_COMPLEXITY = int(os.getenv("LIGHT_MODEL_MAX_COMPLEXITY", 10))
+
+# Stored review revisions, the base for incremental re-reviews of changed code
+review_store = None
+if os.getenv("REVISIONS_ENABLED", "true").lower() == "true":
+    review_store = ReviewStore(os.getenv("REVISIONS_DB", "reviews.db"))
+REVISION_MAX_AGE = float(os.getenv("REVISION_MAX_AGE", 30 * 86400))
+INCREMENTAL_CONTEXT_LINES = int(os.getenv("INCREMENTAL_CONTEXT_LINES", 20))
+# Above this fraction of changed lines, a full review is cheaper than many hunks
+INCREMENTAL_MAX_CHANGED_FRACTION = float(os.getenv("INCREMENTAL_MAX_CHANGED_FRACTION", 0.3))
+
+# History of delivered reviews for the dashboard (same database file as the revisions by default)
+review_history = None
+if os.getenv("HISTORY_ENABLED", "true").lower() == "true":
+    review_history = ReviewHistory(os.getenv("HISTORY_DB", os.getenv("REVISIONS_DB", "reviews.db")))
+HISTORY_MAX_AGE = float(os.getenv("HISTORY_MAX_AGE", 365 * 86400))
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", 50))
+HISTORY_MAX_PAGE_SIZE = 500
+HISTORY_BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+# Asynchronous review jobs; JOB_WORKERS=0 makes this process enqueue only (see worker.py)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_DB = os.getenv("JOB_DB", "jobs.db")
+JOB_DRAIN_TIMEOUT = float(os.getenv("JOB_DRAIN_TIMEOUT", 30))
+# Webhook hosts jobs may call (exact names, or ".example.com" for subdomains; empty allows any public host).
+# Hosts resolving to loopback, link-local or private addresses are refused unless JOB_WEBHOOK_ALLOW_PRIVATE is set.
+JOB_WEBHOOK_ALLOWED_HOSTS = tuple(host.strip().lower() for host in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",")
+                                  if host.strip())
+JOB_WEBHOOK_ALLOW_PRIVATE = os.getenv("JOB_WEBHOOK_ALLOW_PRIVATE", "false").lower() == "true"
+
+# Readiness: set once startup has finished, cleared as soon as shutdown begins
+UPSTREAM_VERIFY_ON_STARTUP = os.getenv("UPSTREAM_VERIFY_ON_STARTUP", "true").lower() == "true"
+READY_REQUIRES_UPSTREAM = os.getenv("READY_REQUIRES_UPSTREAM", "false").lower() == "true"
+readiness = {"ready": False, "upstream": "unverified", "upstream_error": None}
+
 # Get port from environment or default to 8000 to match Dockerfile
 port = int(os.getenv("PORT", 8000))
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Reviews are serialized with orjson when it is installed
+AnalysisResponse = ORJSONResponse if orjson else JSONResponse
+
+# Middleware added later wraps what was added before, so the outermost layers are registered last.
+# Reject oversized bodies before they are read into the form parser
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={"/api/analyze-batch/": BATCH_MAX_UPLOAD_BYTES, "/api/": MAX_UPLOAD_BYTES}
+)
+
+# Authenticate API keys and apply tenant request quotas before any body is read
+app.add_middleware(TenantMiddleware, registry=tenant_registry, bulk_prefixes=BULK_PREFIXES)
 
-# Define the structure for suggestions
-class Suggestion(BaseModel):
-    type: Literal["improvement", "warning", "error"]
-    category: Literal["overall", "correctness", "quality", "performance", "security", 
-                     "consistency", "scalability", "error_handling"]
-    message: str
-
-# Define the structure for code analysis
-class CodeAnalysis(BaseModel):
-    overall_score: float
-    correctness_functionality: float
-    code_quality_maintainability: float
-    performance_efficiency: float
-    security_vulnerability: float
-    code_consistency_style: float
-    scalability_extensibility: float
-    error_handling_robustness: float
-    suggestions: List[Suggestion]
-    dimension_explanations: dict | None = None
-    improvement_summary: dict | None = None
-
-# Add trusted hosts middleware
+# Add trusted hosts middleware (comma-separated host names, "*" allows any); checked before authentication
 app.add_middleware(
     TrustedHostMiddleware,
-    allowed_hosts=["*"]  # In production, you might want to restrict this
+    allowed_hosts=[host.strip() for host in os.getenv("ALLOWED_HOSTS", "*").split(",") if host.strip()]
+)
+
+# Outside the API-key and upload checks, so their 401/413/429 answers carry CORS headers the browser can read
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
 )
 
+# Bind route and request id to log records (outermost, so every log line gets them)
+app.add_middleware(RequestContextMiddleware)
+
+async def watch_static_assets():
+    while True:
+        await asyncio.sleep(STATIC_RESCAN_INTERVAL)
+        try:
+            if await asyncio.to_thread(static_manifest.rebuild_if_changed):
+                logger.info(f"Static assets changed, re-indexed {len(static_manifest.assets)} assets")
+        except OSError as e:
+            logger.warning(f"Failed to re-index static assets: {e}")
+
+async def verify_upstream():
+    # Runs in the background so startup never waits on (or fails with) the network
+    delay = 1.0
+    while True:
+        try:
+            await client.models.list()
+            readiness.update(upstream="verified", upstream_error=None)
+            logger.info("✓ OpenAI API key verified successfully")
+            return
+        except Exception as e:
+            readiness.update(upstream="failed", upstream_error=str(e))
+            kind, retry_after = classify_upstream_error(e)
+            if kind is None:
+                logger.error(f"✗ OpenAI API key verification failed: {str(e)}")
+                return
+            wait = retry_after or delay
+            logger.warning(f"OpenAI API not reachable yet, retrying in {wait:.0f}s: {str(e)}")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, 60)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting application...")
@@ -109,12 +340,49 @@ async def startup_event():
     logger.info(f"Static directory exists: {os.path.exists(static_dir)}")
     logger.info(f"CORS origins: {CORS_ORIGINS}")
     
+    await asyncio.to_thread(static_manifest.build)
+    logger.info(f"Indexed {len(static_manifest.assets)} static assets")
+    if STATIC_RESCAN_INTERVAL > 0:
+        asyncio.create_task(watch_static_assets())
+    
     # Verify OpenAI API key
-    try:
-        models = client.models.list()
-        logger.info("✓ OpenAI API key verified successfully")
-    except Exception as e:
-        logger.error(f"✗ OpenAI API key verification failed: {str(e)}")
+    if UPSTREAM_VERIFY_ON_STARTUP:
+        asyncio.create_task(verify_upstream())
+    
+    # Start the pre-analysis processes now rather than on the first review
+    if preanalysis_pool:
+        for _ in range(PREANALYSIS_WORKERS):
+            preanalysis_pool.submit(preanalyze, "")
+    
+    if review_store:
+        pruned = await asyncio.to_thread(review_store.prune, REVISION_MAX_AGE)
+        if pruned:
+            logger.info(f"Pruned {pruned} expired review revisions")
+    if review_history:
+        pruned = await asyncio.to_thread(review_history.prune, HISTORY_MAX_AGE)
+        if pruned:
+            logger.info(f"Pruned {pruned} expired history entries")
+    await job_queue.start()
+    readiness["ready"] = True
+    logger.info(f"Ready (worker pid {os.getpid()})")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # In-flight requests have completed by now; finish queued jobs, then release resources
+    readiness["ready"] = False
+    await job_queue.stop(JOB_DRAIN_TIMEOUT)
+    job_store.close()
+    if preanalysis_pool:
+        preanalysis_pool.shutdown(cancel_futures=True)
+    logger.info("Closing OpenAI client...")
+    for backend in upstream_backends:
+        await backend.client.close()
+    if review_cache:
+        review_cache.close()
+    if review_store:
+        review_store.close()
+    if review_history:
+        review_history.close()
 
 @app.get("/health")
 async def health_check():
@@ -133,7 +401,7 @@ async def health_check():
                 content={"status": "unhealthy", "detail": "Static directory not found"}
             )
             
-        logger.info("Health check passed")
+        logger.debug("Health check passed")
         return {"status": "healthy", "version": "1.0.0"}
         
     except Exception as e:
@@ -143,6 +411,20 @@ async def health_check():
             content={"status": "unhealthy", "detail": str(e)}
         )
 
+@app.get("/ready")
+async def readiness_check():
+    # Unlike /health, reports whether this worker should receive traffic right now
+    ready = readiness["ready"] and (readiness["upstream"] == "verified" or not READY_REQUIRES_UPSTREAM)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "upstream": readiness["upstream"],
+            "upstream_error": readiness["upstream_error"],
+            "pid": os.getpid(),
+        },
+    )
+
 @app.get("/api-docs", response_class=HTMLResponse)
 async def api_docs():
     return get_root_html()
@@ -150,141 +432,1034 @@ async def api_docs():
 @app.get("/models")
 async def list_models():
     try:
-        models = client.models.list()
-        model_list = [model.id for model in models]
+        model_list = [model.id async for model in client.models.list()]
         logger.info(f"Available models: {model_list}")
         return {"available_models": model_list}
     except Exception as e:
         logger.error(f"Error listing models: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def normalize_field(key: str, value, analysis: dict):
+    # Round numeric scores
+    if key in SCORE_FIELDS:
+        return coerce_score(value)
+    
+    # Keep explanation scores consistent with the main scores
+    if key == "dimension_explanations" and value:
+        for dimension, explanation in value.items():
+            if dimension in analysis and "score" in explanation:
+                if abs(explanation["score"] - analysis[dimension]) > 0.01:  # Allow for small floating-point differences
+                    logger.warning(f"Score mismatch in {dimension}: {explanation['score']} != {analysis[dimension]}")
+                    explanation["score"] = analysis[dimension]  # Force consistency
+    return value
+
+def finalize_analysis(analysis: dict, profile: ReviewProfile | None = None) -> dict:
+    # Validate and coerce through the CodeAnalysis model; compact profiles may leave out the suggestions
+    if (profile is None or "suggestions" in profile.fields) and "suggestions" not in analysis:
+        raise ValueError("Missing required field: suggestions")
+    return CodeAnalysis.parse_obj(analysis).dict()
+
+def extract_analysis(content: str) -> dict:
+    # Tolerates markdown fences, surrounding prose and truncated output instead of failing the review
+    analysis, repair = extract_json(content)
+    if repair:
+        RESPONSE_REPAIRS.labels(repair).inc()
+        logger.warning(f"Repaired {repair} JSON in model response")
+    return analysis
+
+def parse_analysis(content: str, profile: ReviewProfile | None = None) -> dict:
+    with observe_stage("parse"):
+        analysis = extract_analysis(content)
+    with observe_stage("validate"):
+        return finalize_analysis(analysis, profile)
+
+def get_review_profile(name: str | None) -> ReviewProfile:
+    profile = REVIEW_PROFILES.get(name or REVIEW_PROFILE)
+    if profile is None:
+        raise HTTPException(status_code=400, detail=f"Invalid profile. Use one of: {', '.join(REVIEW_PROFILES)}")
+    return profile
+
+def review_messages(code_content: str, context: str = "", profile: ReviewProfile | None = None, notes: str = "",
+                    language: str | None = None) -> list:
+    # The system prompt is identical for every request of a profile and language-specific guidance goes in
+    # the user message, so a prompt long enough for provider prefix caching (~1024 tokens; only "full") is reused
+    profile = profile or REVIEW_PROFILES[REVIEW_PROFILE]
+    prompt = language_prompt(language)
+    subject = f"this {prompt.label} code" if prompt else "this code"
+    return [
+        {"role": "system", "content": profile.prompt},
+        {"role": "user", "content": f"Review {subject}{context}:\n\n{code_content}{notes}{language_guidance(language)}"}
+    ]
+
+def packed_review_messages(files: list[tuple[str, str, str]], profile: ReviewProfile, language: str | None) -> list:
+    # files are (path, code, notes); each file is introduced by its path so reviews can be matched back
+    prompt = language_prompt(language)
+    subject = f"{len(files)} {prompt.label} files" if prompt else f"{len(files)} files"
+    sections = "\n\n".join(f"=== File: {path} ===\n{code_content}{notes}" for path, code_content, notes in files)
+    return [
+        {"role": "system", "content": profile.prompt},
+        {"role": "user", "content": f"Review these {subject}:\n\n{sections}{language_guidance(language)}\n\n{PACKED_INSTRUCTIONS}"}
+    ]
+
+def completion_options(profile: ReviewProfile, files: int = 1, model: str | None = None) -> dict:
+    options = {}
+    mode = REVIEW_RESPONSE_FORMAT
+    if mode == "json_schema" and model in schema_unsupported_models:
+        mode = "json_object"
+    response_format = profile.response_format(mode, packed=files > 1)
+    if response_format:
+        options["response_format"] = response_format
+    if profile.max_tokens:
+        options["max_tokens"] = profile.max_tokens * files
+    return options
+
+def review_token_estimate(messages: list, profile: ReviewProfile | None = None, files: int = 1) -> int:
+    completion_tokens = UPSTREAM_COMPLETION_TOKENS
+    if profile and profile.max_tokens:
+        completion_tokens = min(profile.max_tokens, completion_tokens)
+    return sum(estimate_tokens(message["content"]) for message in messages) + completion_tokens * files
+
+def upstream_http_error(error: Exception) -> HTTPException | None:
+    # Overload surfaces as 429/503 with Retry-After instead of a generic 500
+    if isinstance(error, UpstreamThrottled):
+        logger.warning(f"OpenAI API rate limited: {error}")
+        return HTTPException(
+            status_code=429,
+            detail="OpenAI API rate limit exceeded, please retry later",
+            headers={"Retry-After": str(math.ceil(error.retry_after))}
+        )
+    if isinstance(error, QueueFull):
+        logger.warning(f"Upstream queue full: {error}")
+        return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "5"})
+    return None
+
+async def upstream_order(tokens: int) -> tuple | None:
+    # Spends the tenant's token quota and returns the call's place in the fair queue (None: arrival order).
+    # Interactive callers over quota get a 429; bulk callers wait for the quota to refill.
+    tenant = current_tenant.get()
+    traffic = current_traffic.get()
+    if tenant:
+        retry_after = await tenant.spend_tokens(tokens, wait=traffic == "bulk")
+        if retry_after:
+            record_error("tenant_token_quota")
+            raise HTTPException(
+                status_code=429,
+                detail=f"Token quota exceeded for tenant {tenant.name}",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    if not FAIR_QUEUE_ENABLED:
+        return None
+    weight = (tenant.weight if tenant else 1.0) * FAIR_QUEUE_WEIGHTS[traffic]
+    return fair_queue.order(f"{tenant.name if tenant else ''}:{traffic}", tokens, weight)
+
+async def create_completion(messages: list, profile: ReviewProfile, model: str, backend: Backend, files: int = 1):
+    # Models without structured outputs answer json_schema with a 400; they are switched to JSON mode
+    # for the rest of the process, and the call is retried once
+    for attempt in range(2):
+        try:
+            return await backend.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=REVIEW_TEMPERATURE,
+                stream=True,
+                stream_options={"include_usage": True},
+                **completion_options(profile, files, model)
+            )
+        except Exception as api_error:
+            if (attempt or REVIEW_RESPONSE_FORMAT != "json_schema" or model in schema_unsupported_models
+                    or not rejects_response_format(api_error)):
+                raise
+            logger.warning(f"Model {model} rejected the json_schema response format, using json_object: {api_error}")
+            schema_unsupported_models.add(model)
+
+async def complete_review(messages: list, profile: ReviewProfile, model: str, backend: Backend, files: int = 1) -> str:
+    # Stream the completion internally so time-to-first-token and usage can be recorded
+    with observe_stage("upstream"):
+        start = time.perf_counter()
+        stream = await create_completion(messages, profile, model, backend, files)
+        parts = []
+        # Closing the response on cancellation (client gone, hedge lost) stops the upstream generating
+        async with stream:
+            try:
+                async for chunk in stream:
+                    if chunk.usage:
+                        record_usage(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not parts:
+                            UPSTREAM_TTFT_SECONDS.observe(time.perf_counter() - start)
+                        parts.append(chunk.choices[0].delta.content)
+            except asyncio.CancelledError:
+                UPSTREAM_CANCELLED.inc()
+                raise
+    return "".join(parts)
+
+async def request_review(code_content: str, context: str = "", profile: ReviewProfile | None = None,
+                         model: str | None = None, notes: str = "", language: str | None = None) -> dict:
+    # Make OpenAI API call
+    profile = profile or REVIEW_PROFILES[REVIEW_PROFILE]
+    with observe_stage("prompt"):
+        messages = review_messages(code_content, context, profile, notes, language)
+    tokens = review_token_estimate(messages, profile)
+    order = await upstream_order(tokens)
+    try:
+        content = await upstream_router.call(
+            lambda backend, backend_model: complete_review(messages, profile, backend_model, backend),
+            tokens,
+            classify_upstream_error,
+            chars=len(code_content),
+            profile=profile.name,
+            model=model,
+            order=order
+        )
+    except (UpstreamThrottled, QueueFull) as e:
+        record_error(type(e).__name__)
+        raise upstream_http_error(e)
+    except Exception as api_error:
+        record_error(f"upstream_{type(api_error).__name__}")
+        logger.error(f"OpenAI API error: {str(api_error)}")
+        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(api_error)}")
+    
+    # Parse the response
+    try:
+        analysis = parse_analysis(content, profile)
+        logger.debug("Successfully parsed response")
+        return analysis
+    except JSONExtractionError as e:
+        record_error("invalid_json")
+        logger.error(f"Failed to parse JSON response: {e}")
+        logger.error(f"Raw response: {truncate(content, LOG_MAX_RAW_RESPONSE_CHARS)}")
+        raise HTTPException(status_code=500, detail="Invalid response format from AI model")
+    except (ValueError, TypeError, AttributeError) as e:
+        record_error("invalid_analysis")
+        logger.error(f"Invalid analysis structure: {e}")
+        raise HTTPException(status_code=500, detail=f"Invalid response format from AI model: {str(e)}")
+
+async def request_packed_review(files: list[tuple[str, str, str]], profile: ReviewProfile,
+                                language: str | None) -> list[dict | None]:
+    # One upstream call for several small files of one language; returns their analyses in order,
+    # with None for any file the response leaves out or gets wrong so it can be reviewed on its own
+    with observe_stage("prompt"):
+        messages = packed_review_messages(files, profile, language)
+    tokens = review_token_estimate(messages, profile, len(files))
+    order = await upstream_order(tokens)
+    try:
+        content = await upstream_router.call(
+            lambda backend, backend_model: complete_review(messages, profile, backend_model, backend, len(files)),
+            tokens,
+            classify_upstream_error,
+            chars=sum(len(code_content) for _, code_content, _ in files),
+            profile=profile.name,
+            order=order
+        )
+    except (UpstreamThrottled, QueueFull) as e:
+        record_error(type(e).__name__)
+        raise upstream_http_error(e)
+    except Exception as api_error:
+        record_error(f"upstream_{type(api_error).__name__}")
+        logger.error(f"OpenAI API error: {str(api_error)}")
+        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(api_error)}")
+    
+    try:
+        with observe_stage("parse"):
+            reviews = extract_analysis(content).get("reviews")
+        if not isinstance(reviews, list):
+            raise ValueError("Missing required field: reviews")
+    except (JSONExtractionError, ValueError, AttributeError) as e:
+        record_error("invalid_packed_analysis")
+        logger.error(f"Invalid packed review response: {e}")
+        return [None] * len(files)
+    
+    # Match by path, falling back to position when the model rewrote the paths
+    by_path = {review.get("path"): review for review in reviews if isinstance(review, dict)}
+    analyses = []
+    for index, (path, _, _) in enumerate(files):
+        review = by_path.get(path)
+        if review is None and len(reviews) == len(files) and isinstance(reviews[index], dict):
+            review = reviews[index]
+        if review is None:
+            logger.warning(f"Packed review response has no review for {path}")
+            analyses.append(None)
+            continue
+        try:
+            with observe_stage("validate"):
+                analyses.append(finalize_analysis({k: v for k, v in review.items() if k != "path"}, profile))
+        except (ValueError, TypeError, AttributeError) as e:
+            record_error("invalid_analysis")
+            logger.warning(f"Packed review of {path} is unusable: {e}")
+            analyses.append(None)
+    return analyses
+
+async def run_preanalysis(code_content: str, filename: str | None) -> dict | None:
+    # Parsing and pattern scans are CPU-bound, so they run in the process pool
+    if preanalysis_pool is None:
+        return None
+    with observe_stage("preanalysis"):
+        report = await asyncio.get_running_loop().run_in_executor(preanalysis_pool, preanalyze, code_content, filename)
+    if PREANALYSIS_REJECT_INVALID:
+        if report["syntax_error"]:
+            REVIEW_ROUTES.labels("rejected").inc()
+            error = report["syntax_error"]
+            raise HTTPException(status_code=422, detail=f"Syntax error at line {error['line']}: {error['message']}")
+        if report["minified"] or (report["generated"] and report["lines"] >= GENERATED_REJECT_MIN_LINES):
+            REVIEW_ROUTES.labels("rejected").inc()
+            raise HTTPException(status_code=422, detail="Generated or minified code is not reviewed; submit the source instead")
+    return report
+
+def select_model(code_content: str, report: dict | None) -> str | None:
+    # Small files with no local findings and low complexity, and generated files short enough to be
+    # reviewed at all, go to the cheaper model; None leaves the choice to the upstream router
+    if OPENAI_LIGHT_MODEL and report is not None and (report["generated"] or (
+            not report["findings"] and len(code_content) <= LIGHT_MODEL_MAX_CHARS
+            and (report["max_complexity"] or 1) <= LIGHT_MODEL_MAX_COMPLEXITY)):
+        REVIEW_ROUTES.labels("light_model").inc()
+        return OPENAI_LIGHT_MODEL
+    REVIEW_ROUTES.labels("default_model").inc()
+    return None
+
+def review_cache_key(code_content: str, profile: ReviewProfile, language: str | None = None) -> str:
+    # The language's prompt fragment is part of the prompt, so it versions the key like the profile does
+    prompt = language_prompt(language)
+    version = f"{profile.version}:{language}:{prompt.version}" if prompt else profile.version
+    return make_cache_key(code_content, openai_model, version, REVIEW_TEMPERATURE)
+
+async def review_in_chunks(code_content: str, filename: str | None, profile: ReviewProfile,
+                           language: str | None = None) -> dict:
+    # Map-reduce: review syntactic chunks in parallel, then merge weighted by chunk size
+    chunks = split_code(code_content, CHUNK_MAX_CHARS, CHUNK_MAX_CHUNKS, filename)
+    logger.info(f"Reviewing {len(code_content)} chars in {len(chunks)} chunks")
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+    
+    async def review_chunk(index: int, start: int, end: int, text: str) -> dict:
+        context = f" (part {index + 1} of {len(chunks)}, lines {start}-{end}" + (f" of {filename}" if filename else "")
+        context += "; count suggestion lines from 1 at the start of this part)"
+        async with semaphore:
+            analysis = await request_review(text, context, profile, language=language)
+        return offset_suggestion_lines(analysis, start, end)
+    
+    analyses = await asyncio.gather(*(
+        review_chunk(index, start, end, text) for index, (start, end, text) in enumerate(chunks)
+    ))
+    return merge_analyses([(analysis, len(text)) for analysis, (_, _, text) in zip(analyses, chunks)])
+
+async def run_review(code_content: str, bypass_cache: bool = False, filename: str | None = None,
+                     profile: ReviewProfile | None = None) -> tuple[dict, str]:
+    # Serve repeated submissions from the cache; bypass skips the lookup but refreshes the entry
+    profile = profile or REVIEW_PROFILES[REVIEW_PROFILE]
+    language = detect_language(code_content, filename)
+    cache_key = review_cache_key(code_content, profile, language)
+    if review_cache and not bypass_cache:
+        cached = await review_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Serving review from cache")
+            return cached, "HIT"
+    
+    async def review_and_cache() -> dict:
+        report = await run_preanalysis(code_content, filename)
+        if len(code_content) > CHUNK_THRESHOLD_CHARS:
+            REVIEW_ROUTES.labels("default_model").inc()
+            analysis = await review_in_chunks(code_content, filename, profile, language)
+        else:
+            analysis = await request_review(
+                code_content,
+                profile=profile,
+                model=select_model(code_content, report),
+                notes=findings_context(report) if report else "",
+                language=language
+            )
+        if review_cache:
+            # The upstream work is paid for by now, so the cache fill survives a disconnect
+            await asyncio.shield(review_cache.set(cache_key, analysis))
+        return analysis
+    
+    # Identical reviews already in flight share one upstream call
+    analysis, shared = await review_flights.do(cache_key, review_and_cache)
+    if shared:
+        logger.info("Coalesced review with an identical in-flight request")
+        return copy.deepcopy(analysis), "COALESCED"
+    return analysis, "BYPASS" if bypass_cache else "MISS"
+
+async def save_revision(code_content: str, analysis: dict, profile: ReviewProfile,
+                        filename: str | None = None, parent_id: str | None = None) -> str | None:
+    # Content-addressed, so resubmitting the same code reuses its revision
+    if not review_store:
+        return None
+    revision_id = review_cache_key(code_content, profile)[:32]
+    await asyncio.to_thread(review_store.save, revision_id, code_content, analysis, profile.name, filename, parent_id)
+    return revision_id
+
+async def record_review(code_content: str, analysis: dict, profile: ReviewProfile, project: str | None = None,
+                        filename: str | None = None, revision_id: str | None = None) -> int | None:
+    # History is best effort: a failed write is logged and never fails the review itself
+    if not review_history:
+        return None
+    try:
+        return await asyncio.to_thread(review_history.add, code_hash(code_content), analysis, profile.name,
+                                       project or "", filename, revision_id, current_tenant_name())
+    except Exception as e:
+        logger.error(f"Failed to record review history: {str(e)}")
+        return None
+
+def set_review_headers(headers: dict, revision_id: str | None, review_id: int | None):
+    if revision_id:
+        headers["X-Revision-Id"] = revision_id
+    if review_id:
+        headers["X-Review-Id"] = str(review_id)
+
+async def until_disconnect(request: Request, awaitable, endpoint: str):
+    # Abandoned reviews release their upstream slot instead of running to completion for nobody
+    if not CANCEL_ON_DISCONNECT:
+        return await awaitable
+    try:
+        return await run_until_disconnect(request, awaitable)
+    except ClientDisconnected:
+        CLIENT_DISCONNECTS.labels(endpoint).inc()
+        logger.info("Client disconnected, cancelled its review")
+        raise HTTPException(status_code=499, detail="Client closed request")
+
+async def read_code_input(file: UploadFile | None, code: str | None) -> str:
+    # Get code content
+    if file:
+        try:
+            code_content = await decode_upload(file, UPLOAD_FALLBACK_ENCODINGS)
+        except UndecodableUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.debug("Successfully read file content")
+    elif code:
+        code_content = code
+        logger.debug("Using direct code input")
+    else:
+        raise HTTPException(status_code=400, detail="No code provided")
+    # Nothing to review; refuse before pre-analysis or an upstream call is spent on it
+    if not code_content.strip():
+        raise HTTPException(status_code=400, detail="Code is empty")
+    return code_content
+
 @app.post("/api/analyze-code/")
 async def analyze_code(
     request: Request,
     file: UploadFile = File(default=None),
-    code: str = Form(default=None)
+    code: str = Form(default=None),
+    bypass_cache: bool = Form(default=False),
+    profile: str = Form(default=None),
+    project: str = Form(default=None)
 ):
     logger.info("Received analyze-code request")
-    logger.info(f"Request headers: {request.headers}")
-    logger.info(f"Request origin: {request.headers.get('origin')}")
-    logger.info(f"CORS_ORIGINS: {CORS_ORIGINS}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Request headers: {redact_headers(request.headers)}")
     
     try:
-        # Get code content
-        if file:
-            code_content = (await file.read()).decode('utf-8')
-            logger.info("Successfully read file content")
-        elif code:
-            code_content = code
-            logger.info("Using direct code input")
-        else:
-            raise HTTPException(status_code=400, detail="No code provided")
-
-        # Make OpenAI API call
-        try:
-            system_message = CODE_REVIEW_PROMPT
-
-            response = client.chat.completions.create(
-                model=openai_model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": f"Review this code:\n\n{code_content}"}
-                ],
-                temperature=0.3
+        with REVIEWS_IN_FLIGHT.labels("analyze").track_inprogress():
+            review_profile = get_review_profile(profile)
+            with observe_stage("read"):
+                code_content = await read_code_input(file, code)
+            bypass_cache = bypass_cache or "no-cache" in request.headers.get("cache-control", "")
+            filename = file.filename if file else None
+            analysis, cache_status = await until_disconnect(
+                request, run_review(code_content, bypass_cache, filename, review_profile), "analyze"
             )
-            
-            # Parse the response
-            try:
-                analysis = json.loads(response.choices[0].message.content)
-                logger.info("Successfully parsed response")
-                
-                # Validate response structure
-                required_fields = [
-                    "overall_score", "correctness_functionality", "code_quality_maintainability", 
-                    "performance_efficiency", "security_vulnerability", "code_consistency_style", 
-                    "scalability_extensibility", "error_handling_robustness", "suggestions"
-                ]
-                for field in required_fields:
-                    if field not in analysis:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                # Round numeric scores
-                for key in [
-                    "overall_score", "correctness_functionality", "code_quality_maintainability", 
-                    "performance_efficiency", "security_vulnerability", "code_consistency_style", 
-                    "scalability_extensibility", "error_handling_robustness"
-                ]:
-                    analysis[key] = round(float(analysis[key]), 1)
-                
-                # Set default values for optional fields if they don't exist
-                if "dimension_explanations" not in analysis:
-                    analysis["dimension_explanations"] = None
-                if "improvement_summary" not in analysis:
-                    analysis["improvement_summary"] = None
-                
-                # Add this validation in the analyze_code function after parsing the response
-                if "dimension_explanations" in analysis:
-                    for key, explanation in analysis["dimension_explanations"].items():
-                        if key in analysis and "score" in explanation:
-                            if abs(explanation["score"] - analysis[key]) > 0.01:  # Allow for small floating-point differences
-                                logger.warning(f"Score mismatch in {key}: {explanation['score']} != {analysis[key]}")
-                                explanation["score"] = analysis[key]  # Force consistency
-                
-                return JSONResponse(content=analysis, status_code=200)
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {e}")
-                logger.error(f"Raw response: {response.choices[0].message.content}")
-                raise HTTPException(status_code=500, detail="Invalid response format from AI model")
-            
-        except Exception as api_error:
-            logger.error(f"OpenAI API error: {str(api_error)}")
-            raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(api_error)}")
+            headers = {"X-Cache": cache_status}
+            revision_id = await save_revision(code_content, analysis, review_profile, filename)
+            review_id = await record_review(code_content, analysis, review_profile, project, filename, revision_id)
+            set_review_headers(headers, revision_id, review_id)
+            with observe_stage("serialize"):
+                return AnalysisResponse(content=analysis, status_code=200, headers=headers)
 
-    except HTTPException:
+    except HTTPException as e:
+        if e.status_code < 500:
+            record_error(f"http_{e.status_code}")
         raise
     except Exception as e:
+        record_error(type(e).__name__)
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/")
-async def root():
+async def review_changes(base_code: str, base_analysis: dict, code_content: str,
+                         filename: str | None, profile: ReviewProfile) -> tuple[dict, str, int]:
+    # Re-review only the changed hunks (with context) and merge them into the base analysis.
+    # Returns (analysis, mode, changed line count).
+    lines = code_content.splitlines(keepends=True)
+    opcodes = diff_opcodes(base_code.splitlines(keepends=True), lines)
+    ranges = changed_ranges(opcodes, len(lines))
+    if not ranges:
+        return copy.deepcopy(base_analysis), "unchanged", 0
+    
+    changed = len({line for start, end in ranges for line in range(start, end + 1)})
+    if changed > INCREMENTAL_MAX_CHANGED_FRACTION * max(len(lines), 1):
+        analysis, _ = await run_review(code_content, False, filename, profile)
+        return analysis, "full", changed
+    
+    windows = review_windows(ranges, len(lines), INCREMENTAL_CONTEXT_LINES)
+    language = detect_language(code_content, filename)
+    logger.info(f"Re-reviewing {changed} changed lines in {len(windows)} hunks")
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+    
+    async def review_hunk(start: int, end: int) -> dict:
+        inner = ", ".join(f"{a}-{b}" for a, b in ranges if a <= end and b >= start)
+        context = f" (lines {start}-{end}" + (f" of {filename}" if filename else "")
+        context += f", changed lines {inner}; lines are numbered, report issues in the changed lines only)"
+        async with semaphore:
+            return await request_review(numbered_lines(lines, start, end), context, profile, language=language)
+    
+    hunks = await asyncio.gather(*(review_hunk(start, end) for start, end in windows))
+    
+    # Suggestions on unchanged lines carry over; scores move towards the hunk scores by the changed fraction
+    base = {**base_analysis, "suggestions": carry_over_suggestions(base_analysis.get("suggestions") or [], opcodes)}
+    fraction = changed / len(lines)
+    hunk_sizes = [end - start + 1 for start, end in windows]
+    weighted = [(base, 1 - fraction)] + [
+        (hunk, fraction * size / sum(hunk_sizes)) for hunk, size in zip(hunks, hunk_sizes)
+    ]
+    return merge_analyses(weighted), "incremental", changed
+
+@app.post("/api/analyze-code/incremental")
+async def analyze_code_incremental(
+    request: Request,
+    file: UploadFile = File(default=None),
+    code: str = Form(default=None),
+    base_revision: str = Form(default=None),
+    base_code: str = Form(default=None),
+    base_analysis: str = Form(default=None),
+    profile: str = Form(default=None),
+    project: str = Form(default=None)
+):
+    logger.info("Received incremental analyze-code request")
+    review_profile = get_review_profile(profile)
+    
+    # The base is either a stored revision or a previous result submitted with its code
+    if base_revision:
+        if not review_store:
+            raise HTTPException(status_code=400, detail="Review revisions are disabled; submit base_code and base_analysis")
+        revision = await asyncio.to_thread(review_store.get, base_revision)
+        if not revision:
+            raise HTTPException(status_code=404, detail="Base revision not found")
+        base_code, previous = revision["code"], revision["analysis"]
+        review_profile = REVIEW_PROFILES.get(revision["profile"], review_profile)
+    elif base_code is not None and base_analysis:
+        try:
+            previous = finalize_analysis(extract_json(base_analysis)[0], review_profile)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid base_analysis: {str(e)}")
+    else:
+        raise HTTPException(status_code=400, detail="Provide base_revision, or base_code with base_analysis")
+    
+    with REVIEWS_IN_FLIGHT.labels("incremental").track_inprogress():
+        code_content = await read_code_input(file, code)
+        filename = file.filename if file else None
+        await run_preanalysis(code_content, filename)
+        analysis, mode, changed = await until_disconnect(
+            request, review_changes(base_code, previous, code_content, filename, review_profile), "incremental"
+        )
+    
+    headers = {"X-Review-Mode": mode, "X-Changed-Lines": str(changed)}
+    revision_id = await save_revision(code_content, analysis, review_profile, filename, parent_id=base_revision)
+    review_id = await record_review(code_content, analysis, review_profile, project, filename, revision_id)
+    set_review_headers(headers, revision_id, review_id)
+    return AnalysisResponse(content=analysis, status_code=200, headers=headers)
+
+async def stream_review(code_content: str, bypass_cache: bool, profile: ReviewProfile, report: dict | None,
+                        filename: str | None = None, project: str | None = None):
+    # Emit each top-level field of the analysis as soon as the model has finished generating it
+    language = detect_language(code_content, filename)
+    cache_key = review_cache_key(code_content, profile, language)
+    if review_cache and not bypass_cache:
+        cached = await review_cache.get(cache_key)
+        if cached is not None:
+            for key, value in cached.items():
+                yield sse_event("field", {"key": key, "value": value})
+            review_id = await record_review(code_content, cached, profile, project, filename)
+            yield sse_event("done", {"analysis": cached, "cache": "HIT", "review_id": review_id})
+            return
+    
+    messages = review_messages(code_content, profile=profile, notes=findings_context(report) if report else "",
+                               language=language)
+    # Streams are not hedged: fields are already on their way to the client once the first token arrives
+    backend, model = upstream_router.pick(len(code_content), profile.name, select_model(code_content, report))
+    tokens = review_token_estimate(messages, profile)
+    try:
+        order = await upstream_order(tokens)
+    except HTTPException as e:
+        yield sse_event("error", {"detail": e.detail, "status": e.status_code, "retry_after": e.headers["Retry-After"]})
+        return
+    parser = TopLevelFieldParser()
+    analysis = {}
+    # Raw text is kept so a malformed or truncated stream can still be repaired at the end
+    content = []
+    parse_failed = False
+    in_flight = REVIEWS_IN_FLIGHT.labels("stream")
+    in_flight.inc()
     try:
-        # Serve index.html directly
-        index_path = os.path.join(static_dir, "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
+        # Hold the upstream slot for the whole stream
+        async with backend.limiter.slot(tokens, order):
+            start = time.monotonic()
+            try:
+                stream = await create_completion(messages, profile, model, backend)
+            except Exception as api_error:
+                upstream_router.record(backend, error=api_error, classify=classify_upstream_error)
+                kind, retry_after = classify_upstream_error(api_error)
+                if kind == "throttled":
+                    backend.limiter.record_throttle(retry_after)
+                    raise UpstreamThrottled(retry_after or backend.limiter.backoff(0)) from api_error
+                raise
+            
+            # Closing the response when the client disconnects stops the upstream generating
+            async with stream:
+                async for chunk in stream:
+                    if chunk.usage:
+                        record_usage(chunk.usage)
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    if not content:
+                        UPSTREAM_TTFT_SECONDS.observe(time.monotonic() - start)
+                    content.append(chunk.choices[0].delta.content)
+                    if parse_failed:
+                        continue
+                    try:
+                        fields = parser.feed(chunk.choices[0].delta.content)
+                    except ValueError:
+                        parse_failed = True
+                        continue
+                    for key, value in fields:
+                        analysis[key] = normalize_field(key, value, analysis)
+                        yield sse_event("field", {"key": key, "value": analysis[key]})
+            backend.limiter.record_success(time.monotonic() - start)
+            upstream_router.record(backend, time.monotonic() - start)
+        
+        if parse_failed or not parser.done:
+            analysis = extract_analysis("".join(content))
+        analysis = finalize_analysis(analysis, profile)
+    except (UpstreamThrottled, QueueFull) as e:
+        record_error(type(e).__name__)
+        error = upstream_http_error(e)
+        yield sse_event("error", {"detail": error.detail, "status": error.status_code, "retry_after": error.headers["Retry-After"]})
+        return
+    except (ValueError, TypeError, AttributeError) as e:
+        record_error("invalid_analysis")
+        logger.error(f"Invalid streamed analysis: {e}")
+        yield sse_event("error", {"detail": f"Invalid response format from AI model: {str(e)}"})
+        return
+    except Exception as api_error:
+        record_error(f"upstream_{type(api_error).__name__}")
+        logger.error(f"OpenAI API error: {str(api_error)}")
+        yield sse_event("error", {"detail": f"OpenAI API error: {str(api_error)}"})
+        return
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client disconnected; the upstream stream is closed on the way out
+        CLIENT_DISCONNECTS.labels("stream").inc()
+        if content:
+            UPSTREAM_CANCELLED.inc()
+        raise
+    finally:
+        in_flight.dec()
+    
+    if review_cache:
+        await review_cache.set(cache_key, analysis)
+    review_id = await record_review(code_content, analysis, profile, project, filename)
+    yield sse_event("done", {"analysis": analysis, "cache": "BYPASS" if bypass_cache else "MISS", "review_id": review_id})
+
+@app.post("/api/analyze-code/stream")
+async def analyze_code_stream(
+    request: Request,
+    file: UploadFile = File(default=None),
+    code: str = Form(default=None),
+    bypass_cache: bool = Form(default=False),
+    profile: str = Form(default=None),
+    project: str = Form(default=None)
+):
+    logger.info("Received analyze-code stream request")
+    review_profile = get_review_profile(profile)
+    code_content = await read_code_input(file, code)
+    bypass_cache = bypass_cache or "no-cache" in request.headers.get("cache-control", "")
+    filename = file.filename if file else None
+    report = await run_preanalysis(code_content, filename)
+    return StreamingResponse(
+        stream_review(code_content, bypass_cache, review_profile, report, filename, project),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def iter_batch_files(archive: UploadFile | None, files: List[UploadFile] | None):
+    # Yield (path, raw bytes) for each submitted file, pulling archive members lazily off the event loop
+    if archive:
+        members = iter_archive_files(archive.file, BATCH_MAX_FILE_BYTES)
+        while True:
+            member = await asyncio.to_thread(next, members, None)
+            if member is None:
+                return
+            yield member
+    for upload in files or []:
+        data = await upload.read(BATCH_MAX_FILE_BYTES + 1)
+        yield upload.filename, data
+
+@app.post("/api/analyze-batch/")
+async def analyze_batch(
+    request: Request,
+    archive: UploadFile = File(default=None),
+    files: List[UploadFile] = File(default=None),
+    concurrency: int = Form(default=None),
+    bypass_cache: bool = Form(default=False),
+    profile: str = Form(default=None),
+    project: str = Form(default=None)
+):
+    logger.info("Received analyze-batch request")
+    if not archive and not files:
+        raise HTTPException(status_code=400, detail="No archive or files provided")
+    review_profile = get_review_profile(profile)
+    
+    # The semaphore bounds both in-flight reviews and the number of files held in memory
+    semaphore = asyncio.Semaphore(max(1, min(concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)))
+    batch_in_flight = REVIEWS_IN_FLIGHT.labels("batch")
+    tasks = []
+    skipped = []
+    # Small files waiting to be packed, per language: (position in the batch, path, code)
+    packs = {}
+    accepted = 0
+    
+    async def review_one(path: str, code_content: str) -> dict:
+        try:
+            analysis, cache_status = await run_review(code_content, bypass_cache, path, review_profile)
+            review_id = await record_review(code_content, analysis, review_profile, project, path)
+            return {"path": path, "status": "ok", "cache": cache_status, "size": len(code_content),
+                    "review_id": review_id, "analysis": analysis}
+        except HTTPException as e:
+            return {"path": path, "status": "error", "detail": e.detail}
+    
+    async def review_file(index: int, path: str, code_content: str) -> list[tuple[int, dict]]:
+        batch_in_flight.inc()
+        try:
+            await batch_token_budget.acquire(estimate_tokens(review_profile.prompt) + estimate_tokens(code_content))
+            return [(index, await review_one(path, code_content))]
+        finally:
+            batch_in_flight.dec()
+            semaphore.release()
+    
+    async def review_pack(language: str, members: list[tuple[int, str, str]]) -> list[tuple[int, dict]]:
+        # The system prompt is paid for once per pack instead of once per file
+        batch_in_flight.inc()
+        try:
+            await batch_token_budget.acquire(
+                estimate_tokens(review_profile.prompt) + sum(estimate_tokens(code) for _, _, code in members)
+            )
+            reports = await asyncio.gather(*(run_preanalysis(code, path) for _, path, code in members),
+                                           return_exceptions=True)
+            results = {}
+            packed = []
+            for (index, path, code_content), report in zip(members, reports):
+                if isinstance(report, HTTPException):
+                    results[index] = {"path": path, "status": "error", "detail": report.detail}
+                elif isinstance(report, BaseException):
+                    raise report
+                else:
+                    packed.append((index, path, code_content, findings_context(report) if report else ""))
+            
+            analyses = [None] * len(packed)
+            if len(packed) > 1:
+                try:
+                    analyses = await request_packed_review(
+                        [(path, code_content, notes) for _, path, code_content, notes in packed], review_profile, language
+                    )
+                except HTTPException as e:
+                    for index, path, _, _ in packed:
+                        results[index] = {"path": path, "status": "error", "detail": e.detail}
+                    return list(results.items())
+            
+            # Files the packed response did not cover are reviewed on their own
+            fallbacks = [(index, path, code_content) for (index, path, code_content, _), analysis
+                         in zip(packed, analyses) if analysis is None]
+            for (index, path, code_content), result in zip(fallbacks, await asyncio.gather(
+                    *(review_one(path, code_content) for _, path, code_content in fallbacks))):
+                results[index] = result
+            for (index, path, code_content, _), analysis in zip(packed, analyses):
+                if analysis is None:
+                    continue
+                if review_cache:
+                    await review_cache.set(review_cache_key(code_content, review_profile, language), analysis)
+                review_id = await record_review(code_content, analysis, review_profile, project, path)
+                results[index] = {"path": path, "status": "ok", "cache": "BYPASS" if bypass_cache else "MISS",
+                                  "packed": len(packed), "size": len(code_content), "review_id": review_id,
+                                  "analysis": analysis}
+            return list(results.items())
+        finally:
+            batch_in_flight.dec()
+            semaphore.release()
+    
+    async def flush_pack(language: str):
+        members = packs.pop(language)
+        await semaphore.acquire()
+        if len(members) == 1:
+            tasks.append(asyncio.create_task(review_file(*members[0])))
         else:
-            return HTMLResponse(content="<h1>Dev Diligence API</h1><p>API is running.</p>")
-    except Exception as e:
-        logger.error(f"Error serving root route: {str(e)}")
-        return HTMLResponse(content="<h1>Error</h1><p>Internal server error</p>", status_code=500)
+            tasks.append(asyncio.create_task(review_pack(language, members)))
+    
+    async def packable(code_content: str, path: str) -> str | None:
+        # Language to pack a file under, or None to review it on its own (cached reviews are served as usual)
+        if BATCH_PACK_MAX_FILES < 2 or len(code_content) > BATCH_PACK_FILE_MAX_CHARS:
+            return None
+        language = detect_language(code_content, path)
+        if language and review_cache and not bypass_cache:
+            if await review_cache.get(review_cache_key(code_content, review_profile, language)) is not None:
+                return None
+        return language
+    
+    async def review_all() -> list[dict]:
+        nonlocal accepted
+        try:
+            async for path, data in iter_batch_files(archive, files):
+                if data is None or len(data) > BATCH_MAX_FILE_BYTES:
+                    skipped.append({"path": path, "reason": "File too large"})
+                    continue
+                try:
+                    code_content = decode_bytes(data, UPLOAD_FALLBACK_ENCODINGS)
+                except UndecodableUpload as e:
+                    skipped.append({"path": path, "reason": str(e)})
+                    continue
+                if not code_content.strip():
+                    skipped.append({"path": path, "reason": "Empty file"})
+                    continue
+                if accepted >= BATCH_MAX_FILES:
+                    skipped.append({"path": path, "reason": f"Batch limit of {BATCH_MAX_FILES} files reached"})
+                    continue
+                index = accepted
+                accepted += 1
+                
+                language = await packable(code_content, path)
+                if language is None:
+                    await semaphore.acquire()
+                    tasks.append(asyncio.create_task(review_file(index, path, code_content)))
+                    continue
+                pending = packs.get(language, [])
+                if pending and sum(len(code) for _, _, code in pending) + len(code_content) > BATCH_PACK_MAX_CHARS:
+                    await flush_pack(language)
+                packs.setdefault(language, []).append((index, path, code_content))
+                if len(packs[language]) >= BATCH_PACK_MAX_FILES:
+                    await flush_pack(language)
+            for language in list(packs):
+                await flush_pack(language)
+            return [result for _, result in sorted(pair for pairs in await asyncio.gather(*tasks) for pair in pairs)]
+        finally:
+            # On a bad archive or a disconnect, files still queued or in review are dropped
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    try:
+        results = await until_disconnect(request, review_all(), "batch")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    reviewed = [result for result in results if result["status"] == "ok"]
+    return {
+        "files": results,
+        "skipped": skipped,
+        "summary": {
+            "reviewed": len(reviewed),
+            "failed": len(results) - len(reviewed),
+            "skipped": len(skipped),
+            # Repository score: per-file scores weighted by file size
+            "scores": weighted_scores([(result["analysis"], result["size"]) for result in reviewed]),
+        },
+    }
+
+async def run_job(payload: dict) -> dict:
+    profile = get_review_profile(payload.get("profile"))
+    # Jobs run outside the submitting request, so they are scheduled as bulk traffic of the submitting tenant
+    tenant_token = current_tenant.set(tenant_registry.get(payload.get("tenant")))
+    traffic_token = current_traffic.set("bulk")
+    try:
+        with REVIEWS_IN_FLIGHT.labels("job").track_inprogress():
+            analysis, _ = await run_review(
+                payload["code"],
+                payload.get("bypass_cache", False),
+                payload.get("filename"),
+                profile
+            )
+        # Recorded under the submitting tenant, like a review made in the request itself
+        await record_review(payload["code"], analysis, profile, payload.get("project"), payload.get("filename"))
+    finally:
+        current_tenant.reset(tenant_token)
+        current_traffic.reset(traffic_token)
+    return analysis
+
+job_store = JobStore(JOB_DB)
+job_queue = JobQueue(
+    job_store,
+    run_job,
+    concurrency=JOB_WORKERS,
+    poll_interval=float(os.getenv("JOB_POLL_INTERVAL", 1.0)),
+    stale_after=float(os.getenv("JOB_STALE_AFTER", 900)),
+    webhook_secret=os.getenv("JOB_WEBHOOK_SECRET") or None,
+    webhook_allowed_hosts=JOB_WEBHOOK_ALLOWED_HOSTS,
+    webhook_allow_private=JOB_WEBHOOK_ALLOW_PRIVATE,
+)
+
+@app.post("/api/jobs/", status_code=202)
+async def submit_job(
+    request: Request,
+    file: UploadFile = File(default=None),
+    code: str = Form(default=None),
+    priority: str = Form(default="normal"),
+    webhook_url: str = Form(default=None),
+    bypass_cache: bool = Form(default=False),
+    profile: str = Form(default=None),
+    project: str = Form(default=None)
+):
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority. Use one of: {', '.join(PRIORITIES)}")
+    if webhook_url:
+        try:
+            await job_queue.check_webhook(webhook_url)
+        except WebhookRejected as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    review_profile = get_review_profile(profile)
+    
+    code_content = await read_code_input(file, code)
+    job = await job_queue.submit(
+        {
+            "code": code_content,
+            "filename": file.filename if file else None,
+            "bypass_cache": bypass_cache,
+            "profile": review_profile.name,
+            "project": project,
+            "tenant": current_tenant_name() or None,
+        },
+        priority,
+        webhook_url
+    )
+    logger.info(f"Queued job {job['id']} with priority {priority}")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": str(request.url_for("get_job", job_id=job["id"])),
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    # Another tenant's job is reported as missing, not forbidden, so job ids cannot be probed
+    if not job or (job["payload"].get("tenant") or "") != current_tenant_name():
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "priority": next(name for name, value in PRIORITIES.items() if value == job["priority"]),
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+@app.get("/api/jobs/")
+async def job_stats():
+    return {"counts": await asyncio.to_thread(job_store.counts), "workers": job_queue.concurrency}
+
+def require_history() -> ReviewHistory:
+    if not review_history:
+        raise HTTPException(status_code=404, detail="Review history is disabled")
+    return review_history
+
+@app.get("/api/reviews/")
+async def list_reviews(
+    project: str = None,
+    code_hash: str = None,
+    min_score: float = None,
+    max_score: float = None,
+    before: int = None,
+    limit: int = None
+):
+    # Newest first; pass next_before back as before to fetch the following page
+    history = require_history()
+    limit = max(1, min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE))
+    reviews = await asyncio.to_thread(history.search, project, code_hash, min_score, max_score, before, limit,
+                                      current_tenant_name())
+    return {"reviews": reviews, "next_before": reviews[-1]["id"] if len(reviews) == limit else None}
+
+@app.get("/api/reviews/trends")
+async def review_trends(project: str = None, days: float = 30, bucket: str = "day"):
+    history = require_history()
+    if bucket not in HISTORY_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket. Use one of: {', '.join(HISTORY_BUCKETS)}")
+    since = time.time() - days * 86400
+    trends = await asyncio.to_thread(history.score_trends, project, since, HISTORY_BUCKETS[bucket],
+                                     current_tenant_name())
+    return {"project": project, "bucket": bucket, "trends": trends}
+
+@app.get("/api/reviews/categories")
+async def review_categories(project: str = None, days: float = 30, limit: int = 10):
+    history = require_history()
+    since = time.time() - days * 86400
+    categories = await asyncio.to_thread(history.top_categories, project, since, max(1, min(limit, 50)),
+                                         current_tenant_name())
+    return {"project": project, "categories": categories}
+
+@app.get("/api/reviews/{review_id}")
+async def get_review(review_id: int):
+    review = await asyncio.to_thread(require_history().get, review_id, current_tenant_name())
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return AnalysisResponse(content=review)
+
+register_stats("review_cache", "Review cache statistic", lambda: review_cache.stats() if review_cache else {})
+register_stats("upstream_limiter", "Upstream limiter statistic", upstream_limiter.stats)
+register_stats("upstream_router", "Upstream router statistic", upstream_router.stats)
+register_stats("review_coalescing", "Review coalescing statistic", review_flights.stats)
+register_stats("fair_queue", "Upstream fair queue statistic", fair_queue.stats)
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/upstream/stats")
+async def upstream_stats():
+    return {**upstream_limiter.stats(), "coalescing": review_flights.stats(), "router": upstream_router.stats(),
+            "fair_queue": fair_queue.stats(), "tenants": tenant_registry.stats()}
+
+@app.get("/api/review-profiles")
+async def review_profiles():
+    return {
+        "default": REVIEW_PROFILE,
+        "profiles": {
+            name: {"version": profile.version, "fields": list(profile.fields), "max_tokens": profile.max_tokens}
+            for name, profile in REVIEW_PROFILES.items()
+        },
+    }
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    if not review_cache:
+        return {"enabled": False}
+    return {"enabled": True, **review_cache.stats()}
+
+FALLBACK_HTML = "<h1>Dev Diligence API</h1><p>API is running.</p>"
+
+@app.get("/")
+async def root(request: Request):
+    # Serve index.html from memory
+    if static_manifest.index:
+        return asset_response(static_manifest.index, request.headers)
+    return HTMLResponse(content=FALLBACK_HTML)
 
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
+async def serve_frontend(full_path: str, request: Request):
     # Don't handle API routes
     if full_path.startswith("api/"):
         raise HTTPException(status_code=404, detail="Not Found")
-        
-    try:
-        logger.info(f"Serving path: {full_path}")
-        # First try to serve from static directory
-        static_file = os.path.join(static_dir, full_path)
-        if os.path.exists(static_file) and os.path.isfile(static_file):
-            logger.info(f"Serving static file: {static_file}")
-            return FileResponse(static_file)
-        
-        # If file not found, serve index.html for client-side routing
-        index_path = os.path.join(static_dir, "index.html")
-        if os.path.exists(index_path):
-            logger.info("Falling back to index.html")
-            return FileResponse(index_path)
-        
-        # If even index.html is not found, return a simple response
-        return HTMLResponse(content="<h1>Dev Diligence API</h1><p>API is running.</p>")
-    except Exception as e:
-        logger.error(f"Error serving path {full_path}: {str(e)}")
-        return HTMLResponse(content="<h1>Error</h1><p>Internal server error</p>", status_code=500)
+    
+    # First try to serve from the static manifest
+    asset = static_manifest.lookup(full_path)
+    if asset:
+        return asset_response(asset, request.headers)
+    
+    # Missing hashed bundles are real 404s, not client-side routes
+    if full_path.startswith(HASHED_PREFIX):
+        raise HTTPException(status_code=404, detail="Not Found")
+    
+    # If file not found, serve index.html for client-side routing
+    if static_manifest.index:
+        return asset_response(static_manifest.index, request.headers)
+    
+    # If even index.html is not found, return a simple response
+    return HTMLResponse(content=FALLBACK_HTML)
 
 if __name__ == "__main__":
     import uvicorn
@@ -12,7 +12,8 @@ CODE_REVIEW_PROMPT = """You are a code review assistant. Analyze the provided co
         {
             "type": "improvement" | "warning" | "error",
             "category": "overall" | "correctness" | "quality" | "performance" | "security" | "consistency" | "scalability" | "error_handling",
-            "message": "detailed suggestion"
+            "message": "detailed suggestion",
+            "line": line number the suggestion refers to, or null if it applies to the whole file
         }
     ],
     "dimension_explanations": {
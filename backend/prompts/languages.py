@@ -0,0 +1,61 @@
+import hashlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class LanguagePrompt:
+    label: str
+    focus: str
+
+    @property
+    def version(self) -> str:
+        return hashlib.sha256(f"{self.label}\0{self.focus}".encode("utf-8")).hexdigest()[:12]
+
+
+# Appended to the user message rather than the system prompt, so each profile keeps one system prompt
+# (the full profile's is long enough for provider prefix caching)
+LANGUAGE_PROMPTS = {
+    "python": LanguagePrompt("Python", "PEP 8 and idiomatic constructs, type hints, mutable default arguments, "
+                             "bare or overly broad except clauses, resource handling with context managers, "
+                             "blocking calls inside async code."),
+    "javascript": LanguagePrompt("JavaScript", "== versus ===, unhandled promise rejections and missing await, "
+                                 "var hoisting, prototype pollution, unsanitised HTML (XSS), callback error handling."),
+    "typescript": LanguagePrompt("TypeScript", "use of any and unchecked type assertions, strict null handling, "
+                                 "unhandled promise rejections and missing await, exhaustive union handling."),
+    "java": LanguagePrompt("Java", "null handling and Optional, resource leaks without try-with-resources, "
+                           "equals/hashCode contracts, thread safety of shared state, swallowed exceptions."),
+    "kotlin": LanguagePrompt("Kotlin", "!! assertions, platform types from Java, coroutine scope and cancellation, "
+                             "mutable shared state, idiomatic data and sealed classes."),
+    "go": LanguagePrompt("Go", "ignored error returns, goroutine leaks and missing context cancellation, "
+                         "data races on shared state, defer in loops, nil map and interface pitfalls."),
+    "rust": LanguagePrompt("Rust", "unwrap/expect on fallible paths, unsafe blocks and their invariants, "
+                           "needless clones and allocations, error propagation with ?, lifetime complexity."),
+    "c": LanguagePrompt("C", "buffer overflows and bounds checks, unchecked malloc results, memory leaks and "
+                        "double frees, format string bugs, integer overflow, undefined behaviour."),
+    "cpp": LanguagePrompt("C++", "RAII and smart pointers over raw new/delete, dangling references and iterator "
+                          "invalidation, rule of three/five, exception safety, undefined behaviour."),
+    "csharp": LanguagePrompt("C#", "IDisposable and using, async void and blocking on tasks, null reference "
+                             "handling, LINQ performance, swallowed exceptions."),
+    "ruby": LanguagePrompt("Ruby", "idiomatic blocks and enumerables, nil handling, mass assignment and injection "
+                           "in Rails code, monkey patching, rescue of overly broad exceptions."),
+    "php": LanguagePrompt("PHP", "SQL injection without prepared statements, XSS from unescaped output, loose "
+                          "comparisons, include of user-controlled paths, error suppression with @."),
+    "swift": LanguagePrompt("Swift", "force unwraps and force casts, retain cycles in closures, main-thread UI "
+                            "updates, error handling with throws and Result."),
+    "scala": LanguagePrompt("Scala", "null versus Option, blocking inside Futures, partial functions and "
+                            "non-exhaustive matches, mutable collections in shared state."),
+    "shell": LanguagePrompt("shell", "unquoted variable expansions, missing set -euo pipefail, unchecked exit "
+                            "codes, unsafe temp files, command injection through eval or unvalidated input."),
+    "sql": LanguagePrompt("SQL", "missing or unusable indexes, SELECT *, implicit conversions in predicates, "
+                          "unbounded result sets, transaction and locking behaviour."),
+}
+
+
+def language_prompt(language: str | None) -> LanguagePrompt | None:
+    return LANGUAGE_PROMPTS.get(language) if language else None
+
+
+def language_guidance(language: str | None) -> str:
+    # Empty for unknown languages, which keep the generic prompt
+    prompt = language_prompt(language)
+    return f"\n\n{prompt.label} review focus: {prompt.focus}" if prompt else ""
@@ -0,0 +1,139 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from prompts.code_review import CODE_REVIEW_PROMPT
+
+SCORE_PROPERTIES = [
+    "overall_score", "correctness_functionality", "code_quality_maintainability",
+    "performance_efficiency", "security_vulnerability", "code_consistency_style",
+    "scalability_extensibility", "error_handling_robustness"
+]
+
+# Shared by every compact prompt. These prompts stay well under the ~1024-token minimum for provider
+# prefix caching; they save tokens by being short, not by being cached
+SCORING_RULES = """Score each dimension from 0 to 10 with one decimal place:
+- correctness_functionality: logic errors, bugs, edge cases
+- code_quality_maintainability: readability, naming, structure, documentation
+- performance_efficiency: complexity, wasted work, data structures, resource use
+- security_vulnerability: input validation, injection, secrets, unsafe APIs (10 = no risks)
+- code_consistency_style: formatting, conventions, consistent naming
+- scalability_extensibility: modularity, bottlenecks, ease of change
+- error_handling_robustness: exceptions, failure modes, error messages
+- overall_score: weighted average; weight security and correctness most, style least
+1-4 = major issues, 5-7 = moderate issues, 8-10 = good to excellent."""
+
+SUGGESTION_RULES = """Suggestions: at most 10, most important first. type is "error" (must fix),
+"warning" (should fix) or "improvement" (minor). category is one of overall, correctness,
+quality, performance, security, consistency, scalability, error_handling. Messages are one
+or two actionable sentences. line is the line number the suggestion refers to, or null if it
+applies to the whole file."""
+
+SCORES_ONLY_PROMPT = f"""You are a code review assistant. Respond with a JSON object containing only the scores.
+
+{SCORING_RULES}"""
+
+STANDARD_PROMPT = f"""You are a code review assistant. Respond with a JSON object containing the scores, suggestions and an improvement summary.
+
+{SCORING_RULES}
+
+{SUGGESTION_RULES}
+
+improvement_summary lists short items: critical_improvements (security, correctness, major performance),
+recommended_improvements (maintainability, scalability, minor performance) and positive_aspects."""
+
+
+def _object(properties: dict) -> dict:
+    # Strict structured outputs require every property and no extras
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+STRING_LIST = {"type": "array", "items": {"type": "string"}}
+SCORES_SCHEMA = {name: {"type": "number"} for name in SCORE_PROPERTIES}
+SUGGESTIONS_SCHEMA = {
+    "type": "array",
+    "items": _object({
+        "type": {"type": "string", "enum": ["improvement", "warning", "error"]},
+        "category": {"type": "string", "enum": ["overall", "correctness", "quality", "performance", "security",
+                                                "consistency", "scalability", "error_handling"]},
+        "message": {"type": "string"},
+        "line": {"type": ["integer", "null"]},
+    }),
+}
+IMPROVEMENT_SUMMARY_SCHEMA = _object({
+    "critical_improvements": STRING_LIST,
+    "recommended_improvements": STRING_LIST,
+    "positive_aspects": STRING_LIST,
+})
+DIMENSION_EXPLANATIONS_SCHEMA = _object({
+    name: _object({
+        "score": {"type": "number"},
+        "explanation": {"type": "string"},
+        "key_findings": STRING_LIST,
+        "improvement_suggestions": STRING_LIST,
+    })
+    for name in SCORE_PROPERTIES[1:]
+})
+SUGGESTED_IMPLEMENTATION_SCHEMA = _object({
+    "code": {"type": "string"},
+    "improvements": STRING_LIST,
+    "benefits": STRING_LIST,
+    "explanation": {"type": "string"},
+})
+
+
+@dataclass(frozen=True)
+class ReviewProfile:
+    name: str
+    prompt: str
+    schema: dict
+    max_tokens: int | None = None
+    fields: tuple = field(default=())
+
+    @property
+    def version(self) -> str:
+        # Changes whenever the prompt or schema changes, so cached reviews are not reused across versions
+        digest = hashlib.sha256((self.prompt + json.dumps(self.schema, sort_keys=True)).encode("utf-8"))
+        return f"{self.name}:{digest.hexdigest()[:12]}"
+
+    @property
+    def packed_schema(self) -> dict:
+        # Several files reviewed in one request: one review per file, tagged with its path
+        return _object({"reviews": {"type": "array", "items": _object({"path": {"type": "string"}, **self.schema["properties"]})}})
+
+    def response_format(self, mode: str, packed: bool = False) -> dict | None:
+        if mode == "json_schema":
+            name = f"code_review_{self.name.replace('-', '_')}" + ("_packed" if packed else "")
+            schema = self.packed_schema if packed else self.schema
+            return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+        if mode == "json_object":
+            return {"type": "json_object"}
+        return None
+
+
+PACKED_INSTRUCTIONS = """These files are reviewed together. Review each one independently, as if it were submitted
+alone, with line numbers counted from the start of that file. Respond with a JSON object whose "reviews" array holds
+one review per file, in the order given; each review has a "path" field with the file's path and all the fields
+described above."""
+
+
+def _profile(name: str, prompt: str, max_tokens: int | None, **properties) -> ReviewProfile:
+    schema = _object({**SCORES_SCHEMA, **properties})
+    return ReviewProfile(name, prompt, schema, max_tokens, tuple(schema["properties"]))
+
+
+REVIEW_PROFILES = {
+    "scores-only": _profile("scores-only", SCORES_ONLY_PROMPT, 200),
+    "standard": _profile(
+        "standard", STANDARD_PROMPT, 2000,
+        suggestions=SUGGESTIONS_SCHEMA,
+        improvement_summary=IMPROVEMENT_SUMMARY_SCHEMA,
+    ),
+    # The original long-form review, including per-dimension explanations and a rewrite
+    "full": _profile(
+        "full", CODE_REVIEW_PROMPT, None,
+        suggestions=SUGGESTIONS_SCHEMA,
+        dimension_explanations=DIMENSION_EXPLANATIONS_SCHEMA,
+        improvement_summary=IMPROVEMENT_SUMMARY_SCHEMA,
+        suggested_implementation=SUGGESTED_IMPLEMENTATION_SCHEMA,
+    ),
+}
@@ -0,0 +1,39 @@
+from utils.chunking import split_code, offset_suggestion_lines
+
+
+def equal_functions(count: int) -> str:
+    return "".join(f"def function_{n:02d}(x):\n    return x + {n:02d}\n\n\n" for n in range(count))
+
+
+def test_max_chunks_caps_chunk_count():
+    code = equal_functions(31)
+    chunks = split_code(code, 10, max_chunks=16, filename="module.py")
+    assert len(chunks) <= 16
+    assert "".join(text for _, _, text in chunks) == code
+
+
+def test_chunks_stay_contiguous_after_merging():
+    chunks = split_code(equal_functions(31), 100, max_chunks=4, filename="module.py")
+    assert len(chunks) == 4
+    assert chunks[0][0] == 1
+    for (_, end, _), (start, _, _) in zip(chunks, chunks[1:]):
+        assert start == end + 1
+
+
+def test_line_windows_respect_max_chunks():
+    code = "".join(f"value_{n} = {n}\n" for n in range(500))
+    chunks = split_code(code, 50, max_chunks=8, filename="data.txt")
+    assert len(chunks) <= 8
+    assert "".join(text for _, _, text in chunks) == code
+
+
+def test_chunk_suggestion_lines_are_mapped_to_file_lines():
+    analysis = {"overall_score": 7, "suggestions": [
+        {"message": "relative", "line": 3},
+        {"message": "absolute", "line": 140},
+        {"message": "outside", "line": 400},
+        {"message": "file-level", "line": None},
+    ]}
+    lines = [suggestion["line"] for suggestion in offset_suggestion_lines(analysis, 101, 150)["suggestions"]]
+    assert lines == [103, 140, None, None]
+    assert analysis["suggestions"][0]["line"] == 3
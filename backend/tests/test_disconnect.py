@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from starlette.requests import Request
+from utils.disconnect import ClientDisconnected, run_until_disconnect
+
+
+def make_request(receive) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": []}, receive)
+
+
+def test_result_is_returned_while_the_client_waits():
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "review"
+
+    async def run():
+        return await run_until_disconnect(make_request(receive), work())
+
+    assert asyncio.run(run()) == "review"
+
+
+def test_disconnect_cancels_the_work():
+    cancelled = False
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def work():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run():
+        await run_until_disconnect(make_request(receive), work())
+
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(run())
+    assert cancelled
+
+
+def test_work_continues_when_disconnects_cannot_be_detected():
+    async def receive():
+        raise RuntimeError("receive unavailable")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "review"
+
+    async def run():
+        return await run_until_disconnect(make_request(receive), work())
+
+    assert asyncio.run(run()) == "review"
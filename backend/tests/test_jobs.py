@@ -0,0 +1,59 @@
+import asyncio
+import time
+import httpx
+import pytest
+from utils.jobs import JobQueue, JobStore, WebhookRejected, check_webhook_url, pinned_request
+
+
+def test_private_webhook_addresses_are_rejected():
+    for url in ("http://127.0.0.1/hook", "http://169.254.169.254/latest", "http://[::ffff:10.0.0.1]/hook"):
+        with pytest.raises(WebhookRejected):
+            asyncio.run(check_webhook_url(url))
+
+
+def test_webhook_check_returns_the_address_to_connect_to():
+    assert asyncio.run(check_webhook_url("https://93.184.216.34:8443/hook")) == "93.184.216.34"
+    assert asyncio.run(check_webhook_url("http://127.0.0.1/hook", allow_private=True)) is None
+
+
+def test_pinned_request_keeps_host_and_server_name():
+    url, headers, extensions = pinned_request("https://hooks.example.com:8443/a?b=1", "93.184.216.34")
+    assert url == "https://93.184.216.34:8443/a?b=1"
+    assert headers == {"Host": "hooks.example.com:8443"}
+    assert extensions == {"sni_hostname": "hooks.example.com"}
+
+    url, headers, extensions = pinned_request("http://hooks.example.com/a", "2606:2800:220:1::1")
+    assert url == "http://[2606:2800:220:1::1]/a"
+    assert headers == {"Host": "hooks.example.com"}
+    assert extensions == {}
+
+
+def test_slow_webhook_does_not_hold_up_the_worker(tmp_path):
+    delivered = []
+
+    async def receiver(request):
+        await asyncio.sleep(0.5)
+        delivered.append(request.url.path)
+        return httpx.Response(200)
+
+    async def handler(payload):
+        return {"n": payload["n"]}
+
+    async def run():
+        store = JobStore(str(tmp_path / "jobs.db"))
+        queue = JobQueue(store, handler, concurrency=1, poll_interval=0.05, webhook_allow_private=True)
+        await queue.start()
+        await queue._http.aclose()
+        queue._http = httpx.AsyncClient(transport=httpx.MockTransport(receiver))
+        jobs = [await queue.submit({"n": n}, webhook_url=f"http://127.0.0.1/hook/{n}") for n in range(3)]
+        start = time.monotonic()
+        while any(store.get(job["id"])["status"] != "completed" for job in jobs):
+            await asyncio.sleep(0.01)
+        finished = time.monotonic() - start
+        await queue.stop(drain_timeout=5)
+        store.close()
+        return finished
+
+    # One worker, three jobs: with inline delivery the last would wait for two slow webhooks
+    assert asyncio.run(run()) < 0.5
+    assert sorted(delivered) == ["/hook/0", "/hook/1", "/hook/2"]
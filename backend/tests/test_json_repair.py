@@ -0,0 +1,31 @@
+import pytest
+from utils.json_repair import JSONExtractionError, extract_json
+
+
+def test_clean_json_needs_no_repair():
+    assert extract_json('{"overall_score": 7.5, "suggestions": []}') == ({"overall_score": 7.5, "suggestions": []}, None)
+
+
+def test_fenced_and_surrounded_json():
+    assert extract_json('```json\n{"a": 1}\n```') == ({"a": 1}, "fenced")
+    assert extract_json('Here is the review: {"a": "}"} Hope it helps.') == ({"a": "}"}, "surrounded")
+
+
+def test_truncated_json_is_closed():
+    value, repair = extract_json('{"overall_score": 6, "summary": "Fine \\"mostly')
+    assert repair == "truncated"
+    assert value == {"overall_score": 6, "summary": 'Fine "mostly'}
+
+
+def test_truncated_json_drops_the_incomplete_element():
+    value, repair = extract_json('{"scores": {"a": 1, "b": 2}, "suggestions": [{"line": 3, "message": "x"}, {"line": 4, "mess')
+    assert repair == "truncated"
+    assert value["scores"] == {"a": 1, "b": 2}
+    assert value["suggestions"][0] == {"line": 3, "message": "x"}
+
+
+def test_unrecoverable_output_raises():
+    with pytest.raises(JSONExtractionError):
+        extract_json("I cannot review this code.")
+    with pytest.raises(JSONExtractionError):
+        extract_json('{"a": 1,, "b": 2}')
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from utils.rate_limit import QueueFull, TokenBucket, UpstreamLimiter, UpstreamThrottled, WeightedFairQueue
+
+
+def make_limiter(concurrency: int = 1, **kwargs) -> UpstreamLimiter:
+    return UpstreamLimiter(6000000, 6000000, max_concurrency=concurrency, min_concurrency=concurrency,
+                           base_backoff=0.001, **kwargs)
+
+
+def test_token_bucket_reports_the_wait():
+    bucket = TokenBucket(60, capacity=2)
+    assert bucket.try_acquire(2) == 0.0
+    assert bucket.try_acquire(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_fair_queue_puts_an_idle_flow_ahead_of_a_backlog():
+    queue = WeightedFairQueue()
+    backlog = [queue.order("bulk", 100) for _ in range(5)]
+    interactive = queue.order("interactive", 100)
+    assert interactive < backlog[1]
+    # A heavier weight advances the flow's clock more slowly
+    assert queue.order("heavy", 100, weight=4) < queue.order("light", 100)
+
+
+def test_waiters_get_slots_in_tag_order():
+    limiter = make_limiter()
+    granted = []
+
+    async def call(name: str, order: tuple):
+        async with limiter.slot(1, order):
+            granted.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        holder = asyncio.create_task(call("holder", (0,)))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(call(name, (tag,))) for name, tag in [("c", 3), ("a", 1), ("b", 2)]]
+        await asyncio.sleep(0)
+        assert limiter.saturated
+        await asyncio.gather(holder, *waiters)
+
+    asyncio.run(run())
+    assert granted == ["holder", "a", "b", "c"]
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = make_limiter()
+
+    async def hold(seconds: float):
+        async with limiter.slot(1):
+            await asyncio.sleep(seconds)
+
+    async def run():
+        holder = asyncio.create_task(hold(0.02))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold(0))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(holder, waiter, return_exceptions=True)
+        await asyncio.wait_for(hold(0), 1)
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+
+
+def test_queue_limit():
+    limiter = make_limiter(max_queue=1)
+
+    async def hold():
+        async with limiter.slot(1):
+            await asyncio.sleep(0.01)
+
+    async def run():
+        return await asyncio.gather(hold(), hold(), hold(), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [type(None), type(None), QueueFull]
+
+
+def test_throttled_calls_are_retried_then_reported():
+    limiter = make_limiter(max_retries=2)
+    attempts = 0
+
+    async def completion():
+        nonlocal attempts
+        attempts += 1
+        raise RuntimeError("429")
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 2:
+            raise RuntimeError("503")
+        return "ok"
+
+    with pytest.raises(UpstreamThrottled):
+        asyncio.run(limiter.call(completion, 1, lambda e: ("throttled", None)))
+    assert attempts == 3
+
+    attempts = 0
+    assert asyncio.run(limiter.call(flaky, 1, lambda e: ("transient", None))) == "ok"
+    assert limiter.stats()["retries"] == 3
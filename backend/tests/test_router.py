@@ -0,0 +1,70 @@
+import asyncio
+from utils.rate_limit import UpstreamLimiter
+from utils.router import Backend, BackendRouter
+
+
+def make_router(concurrency: int) -> BackendRouter:
+    limiter = UpstreamLimiter(6000000, 6000000, max_concurrency=concurrency, min_concurrency=concurrency)
+    backend = Backend("primary", "model", client=None, limiter=limiter)
+    return BackendRouter([backend], hedge_percentile=0.95, hedge_min_samples=20, hedge_min_delay=0.01)
+
+
+def no_errors(error):
+    return None, None
+
+
+def test_queueing_in_the_limiter_does_not_trigger_hedges():
+    router = make_router(2)
+
+    async def completion(backend, model):
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        for _ in range(20):
+            await router.call(completion, 1, no_errors, chars=10)
+        return await asyncio.gather(*(router.call(completion, 1, no_errors, chars=10) for _ in range(20)))
+
+    assert asyncio.run(run()) == ["ok"] * 20
+    assert router.stats()["hedges_fired"] == 0
+
+
+def test_slow_call_is_hedged_when_the_backend_has_capacity():
+    router = make_router(4)
+    calls = 0
+
+    async def completion(backend, model):
+        nonlocal calls
+        calls += 1
+        # The 21st call stalls; its hedge answers at the usual speed
+        await asyncio.sleep(5 if calls == 21 else 0.02)
+        return calls
+
+    async def run():
+        for _ in range(20):
+            await router.call(completion, 1, no_errors, chars=10)
+        return await asyncio.wait_for(router.call(completion, 1, no_errors, chars=10), 2)
+
+    assert asyncio.run(run()) == 22
+    assert router.stats()["hedges_fired"] == 1
+    assert router.stats()["hedges_won"] == 1
+
+
+def test_no_hedge_into_a_saturated_limiter():
+    router = make_router(1)
+    calls = 0
+
+    async def completion(backend, model):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2 if calls == 21 else 0.01)
+        return "ok"
+
+    async def run():
+        for _ in range(20):
+            await router.call(completion, 1, no_errors, chars=10)
+        return await router.call(completion, 1, no_errors, chars=10)
+
+    assert asyncio.run(run()) == "ok"
+    assert router.stats()["hedges_fired"] == 0
+    assert router.stats()["hedges_skipped"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"score": 7}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert all(result == {"score": 7} for result, _ in results)
+    assert flights.stats() == {"leaders": 1, "coalesced": 4, "cancelled": 0, "in_flight": 0}
+
+
+def test_exceptions_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(run())] == ["upstream failed"] * 3
+
+
+def test_cancelled_waiter_leaves_the_shared_call_running():
+    flights = SingleFlight()
+
+    async def run():
+        done = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            done.set()
+            return "ok"
+
+        leader = asyncio.create_task(flights.do("key", work))
+        follower = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, done.is_set()
+
+    assert asyncio.run(run()) == (("ok", True), True)
+    assert flights.stats()["cancelled"] == 0
+
+
+def test_last_waiter_cancelling_cancels_the_call():
+    flights = SingleFlight()
+    cancelled = False
+
+    async def work():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run():
+        waiter = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        return flights.in_flight()
+
+    assert asyncio.run(run()) == 0
+    assert cancelled
+    assert flights.stats()["cancelled"] == 1
@@ -0,0 +1,25 @@
+import json
+from utils.streaming import TopLevelFieldParser, sse_event
+
+
+def test_sse_event_format():
+    assert sse_event("score", {"value": 7}) == 'event: score\ndata: {"value": 7}\n\n'
+
+
+def test_fields_are_returned_as_soon_as_they_complete():
+    parser = TopLevelFieldParser()
+    assert parser.feed('```json\n{"overall_score": 8') == []
+    assert parser.feed('.5, "scores": {"a": 1, ') == [("overall_score", 8.5)]
+    assert parser.feed('"b": [1, 2]}, "summary": "a, b') == [("scores", {"a": 1, "b": [1, 2]})]
+    assert parser.feed(' and \\"c}\\"", ') == [("summary", 'a, b and "c}"')]
+    assert parser.feed('"suggestions": []}\n```') == [("suggestions", [])]
+    assert parser.done
+
+
+def test_one_character_at_a_time_matches_the_whole_object():
+    document = {"overall_score": 6, "suggestions": [{"line": 2, "message": "use {} not dict()"}], "summary": "ok"}
+    parser = TopLevelFieldParser()
+    fields = []
+    for ch in json.dumps(document) + " trailing text {":
+        fields.extend(parser.feed(ch))
+    assert dict(fields) == document
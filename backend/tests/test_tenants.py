@@ -0,0 +1,57 @@
+import asyncio
+import httpx
+import pytest
+from utils.tenants import TenantMiddleware, build_registry, current_tenant_name, current_traffic, parse_tenants
+
+
+async def echo(scope, receive, send):
+    body = f"{current_tenant_name()}:{current_traffic.get()}".encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def send_requests(entries: list[dict], *requests: tuple) -> list[httpx.Response]:
+    app = TenantMiddleware(echo, build_registry(entries), bulk_prefixes=("/api/batch",))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return [await client.request(method, path, headers=headers) for method, path, headers in requests]
+
+    return asyncio.run(run())
+
+
+def test_keys_select_the_tenant():
+    entries = [{"name": "acme", "key": "k-acme"}, {"name": "globex", "keys": ["k-globex"]}]
+    acme, globex, missing, wrong, health = send_requests(
+        entries,
+        ("GET", "/api/x", {"Authorization": "Bearer k-acme"}),
+        ("POST", "/api/batch/", {"X-API-Key": "k-globex"}),
+        ("GET", "/api/x", {}),
+        ("GET", "/api/x", {"X-API-Key": "wrong"}),
+        ("GET", "/health", {}),
+    )
+    assert (acme.status_code, acme.text) == (200, "acme:interactive")
+    assert (globex.status_code, globex.text) == (200, "globex:bulk")
+    assert missing.status_code == 401 and missing.headers["www-authenticate"] == "Bearer"
+    assert wrong.json() == {"detail": "Invalid API key"}
+    # Paths outside the API prefix are not authenticated
+    assert (health.status_code, health.text) == (200, ":interactive")
+
+
+def test_request_quota_applies_to_posts():
+    first, read, throttled = send_requests(
+        [{"name": "anonymous", "requests_per_minute": 1}],
+        ("POST", "/api/x", {}), ("GET", "/api/x", {}), ("POST", "/api/x", {}),
+    )
+    assert (first.status_code, read.status_code, throttled.status_code) == (200, 200, 429)
+    assert int(throttled.headers["retry-after"]) >= 1
+
+
+def test_registry_configuration_errors():
+    with pytest.raises(ValueError):
+        parse_tenants('[{"name": "a"}, {"name": "a"}]')
+    with pytest.raises(ValueError):
+        build_registry([{"name": "a"}, {"name": "b"}])
+    with pytest.raises(ValueError):
+        build_registry([{"name": "a", "key": "k"}, {"name": "b", "key": "k"}])
+    assert not build_registry([]).enabled
@@ -0,0 +1,50 @@
+import asyncio
+import httpx
+from utils.uploads import UploadLimitMiddleware
+
+
+async def read_body(scope, receive, send):
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+
+def post(path: str, content) -> httpx.Response:
+    app = UploadLimitMiddleware(read_body, {"/api/": 100, "/api/batch": 1000, "/api/open": 0})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(path, content=content)
+
+    return asyncio.run(run())
+
+
+def chunks(count: int, size: int):
+    async def generate():
+        for _ in range(count):
+            yield b"x" * size
+    return generate()
+
+
+def test_declared_length_over_the_limit_is_rejected():
+    response = post("/api/analyze", b"x" * 101)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body exceeds the 100 byte limit"}
+    assert post("/api/analyze", b"x" * 100).text == "100"
+
+
+def test_longest_prefix_wins():
+    assert post("/api/batch/", b"x" * 500).text == "500"
+    assert post("/api/open", b"x" * 5000).text == "5000"
+
+
+def test_chunked_body_is_cut_off_at_the_limit():
+    assert post("/api/analyze", chunks(3, 40)).status_code == 413
+    assert post("/api/analyze", chunks(2, 40)).text == "80"
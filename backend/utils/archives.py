@@ -0,0 +1,39 @@
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterator
+
+
+def looks_binary(data: bytes) -> bool:
+    return b"\0" in data[:8192]
+
+
+def iter_archive_files(fileobj: BinaryIO, max_file_bytes: int) -> Iterator[tuple[str, bytes | None]]:
+    # Yield (path, content) one member at a time so only a single file is held in memory.
+    # Content is None for members that are skipped for being too large.
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.file_size > max_file_bytes:
+                    yield info.filename, None
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member.read(max_file_bytes + 1)
+        return
+
+    fileobj.seek(0)
+    try:
+        # Stream mode reads members sequentially without seeking back
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                if info.size > max_file_bytes:
+                    yield info.name, None
+                    continue
+                member = archive.extractfile(info)
+                yield info.name, member.read() if member else None
+    except tarfile.ReadError as e:
+        raise ValueError(f"Unsupported archive format: {e}")
@@ -0,0 +1,119 @@
+import ast
+import math
+
+PYTHON_EXTENSIONS = (".py", ".pyi", ".pyw")
+
+
+def line_windows(lines: list[str], first_line: int, max_chars: int) -> list[tuple[int, int, str]]:
+    # Fallback splitter: consecutive lines packed up to max_chars, preferring to break on blank lines
+    chunks = []
+    current = []
+    size = 0
+    start = first_line
+    for offset, line in enumerate(lines):
+        if current and size + len(line) > max_chars:
+            cut = len(current)
+            for i in range(len(current) - 1, len(current) // 2, -1):
+                if not current[i].strip():
+                    cut = i + 1
+                    break
+            chunks.append((start, start + cut - 1, "".join(current[:cut])))
+            start += cut
+            current = current[cut:]
+            size = sum(len(kept) for kept in current)
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append((start, first_line + len(lines) - 1, "".join(current)))
+    return chunks
+
+
+def python_segments(code: str, lines: list[str]) -> list[tuple[int, int]] | None:
+    # Line ranges starting at each top-level statement, so functions and classes stay whole
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    starts = []
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        starts.append(min([node.lineno] + [d.lineno for d in decorators]))
+    if not starts:
+        return None
+    starts[0] = 1
+    ends = [start - 1 for start in starts[1:]] + [len(lines)]
+    return list(zip(starts, ends))
+
+
+def merge_adjacent(chunks: list[tuple[int, int, str]], max_chunks: int) -> list[tuple[int, int, str]]:
+    # Greedy packing can leave more chunks than allowed; join the smallest neighbouring pair until it fits
+    chunks = list(chunks)
+    while len(chunks) > max(max_chunks, 1):
+        i = min(range(len(chunks) - 1), key=lambda i: len(chunks[i][2]) + len(chunks[i + 1][2]))
+        (start, _, first), (_, end, second) = chunks[i], chunks[i + 1]
+        chunks[i:i + 2] = [(start, end, first + second)]
+    return chunks
+
+
+def split_code(code: str, max_chars: int, max_chunks: int | None = None,
+               filename: str | None = None) -> list[tuple[int, int, str]]:
+    """Split source into (start_line, end_line, text) chunks of at most roughly max_chars.
+
+    Python is split at top-level statement boundaries; other languages, and
+    Python that does not parse, fall back to line windows. With max_chunks,
+    chunks grow beyond max_chars as needed so there are never more than that.
+    """
+    if not max_chunks:
+        return pack_chunks(code, max_chars, filename)
+    max_chars = max(max_chars, math.ceil(len(code) / max_chunks))
+    return merge_adjacent(pack_chunks(code, max_chars, filename), max_chunks)
+
+
+def pack_chunks(code: str, max_chars: int, filename: str | None) -> list[tuple[int, int, str]]:
+    lines = code.splitlines(keepends=True)
+
+    segments = None
+    if filename is None or filename.endswith(PYTHON_EXTENSIONS):
+        segments = python_segments(code, lines)
+    if segments is None:
+        return line_windows(lines, 1, max_chars)
+
+    chunks = []
+    current_start = None
+    current_end = None
+    size = 0
+    for start, end in segments:
+        segment_size = sum(len(line) for line in lines[start - 1:end])
+        if current_start is not None and size + segment_size > max_chars:
+            chunks.append((current_start, current_end, "".join(lines[current_start - 1:current_end])))
+            current_start = None
+            size = 0
+        if segment_size > max_chars:
+            # A single oversized definition is split into line windows
+            chunks.extend(line_windows(lines[start - 1:end], start, max_chars))
+            continue
+        if current_start is None:
+            current_start = start
+        current_end = end
+        size += segment_size
+    if current_start is not None:
+        chunks.append((current_start, current_end, "".join(lines[current_start - 1:current_end])))
+    return chunks
+
+
+def offset_suggestion_lines(analysis: dict, start: int, end: int) -> dict:
+    # Chunks are reviewed as standalone text, so suggestion lines count from 1 within the chunk; map them
+    # to file lines. A line already inside start..end but past the chunk's length was reported against
+    # the file; anything else cannot be placed and becomes file-level.
+    length = end - start + 1
+    suggestions = []
+    for suggestion in analysis.get("suggestions") or []:
+        line = suggestion.get("line")
+        if isinstance(line, int) and not isinstance(line, bool):
+            if 1 <= line <= length:
+                line += start - 1
+            elif not start <= line <= end:
+                line = None
+            suggestion = {**suggestion, "line": line}
+        suggestions.append(suggestion)
+    return {**analysis, "suggestions": suggestions} if "suggestions" in analysis else analysis
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Awaitable
+from starlette.requests import Request
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before its review finished."""
+
+
+async def wait_for_disconnect(request: Request):
+    # Once the body has been read, the server's next message is the disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_until_disconnect(request: Request, awaitable: Awaitable):
+    """Await awaitable, cancelling it if the client disconnects first.
+
+    Call only after the request body has been read (e.g. from an endpoint
+    with form parameters). On disconnect the work is cancelled and awaited,
+    so limiter slots and upstream connections are released before
+    ClientDisconnected is raised.
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.create_task(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if work.done():
+            return work.result()
+        if watcher.exception() is not None:
+            # Disconnects cannot be detected on this connection; just wait for the work
+            return await work
+        work.cancel()
+        await asyncio.wait({work})
+        if not work.cancelled():
+            # Finished (or failed) while being cancelled; the client is gone either way
+            work.exception()
+        raise ClientDisconnected()
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
@@ -0,0 +1,54 @@
+import difflib
+
+
+def diff_opcodes(old_lines: list[str], new_lines: list[str]) -> list[tuple]:
+    return difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes()
+
+
+def changed_ranges(opcodes: list[tuple], total_lines: int) -> list[tuple[int, int]]:
+    # 1-based inclusive ranges of new lines that were inserted or replaced; a pure
+    # deletion marks the lines on either side of where the old lines used to be
+    ranges = []
+    for tag, _, _, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        if j2 > j1:
+            ranges.append((j1 + 1, j2))
+        elif total_lines:
+            ranges.append((max(1, j1), min(j1 + 1, total_lines)))
+    return ranges
+
+
+def review_windows(ranges: list[tuple[int, int]], total_lines: int, context: int) -> list[tuple[int, int]]:
+    # Changed ranges padded with surrounding context, overlapping windows merged
+    windows = []
+    for start, end in sorted(ranges):
+        start, end = max(1, start - context), min(total_lines, end + context)
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def numbered_lines(lines: list[str], start: int, end: int) -> str:
+    # Line numbers let the model report suggestions against the whole file
+    return "".join(f"{number:>5} | {lines[number - 1]}" for number in range(start, end + 1))
+
+
+def carry_over_suggestions(suggestions: list[dict], opcodes: list[tuple]) -> list[dict]:
+    # Keep prior suggestions on unchanged lines (renumbered) and file-level ones; drop the rest
+    line_map = {}
+    for tag, i1, i2, j1, _ in opcodes:
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                line_map[i1 + offset + 1] = j1 + offset + 1
+
+    kept = []
+    for suggestion in suggestions:
+        line = suggestion.get("line")
+        if not isinstance(line, int):
+            kept.append(suggestion)
+        elif line in line_map:
+            kept.append({**suggestion, "line": line_map[line]})
+    return kept
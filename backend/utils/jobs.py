@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Lower value is claimed first
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+
+class WebhookRejected(ValueError):
+    """A webhook URL the job worker must not call."""
+
+
+def host_allowed(host: str, allowed_hosts: tuple[str, ...]) -> bool:
+    # "example.com" matches only itself, ".example.com" matches its subdomains
+    return any(host == pattern or (pattern.startswith(".") and host.endswith(pattern)) for pattern in allowed_hosts)
+
+
+async def check_webhook_url(url: str, allowed_hosts: tuple[str, ...] = (),
+                            allow_private: bool = False) -> str | None:
+    """Raise WebhookRejected unless url is an http(s) URL the worker may call.
+
+    With allowed_hosts, the host must match one of them. Unless
+    allow_private is set, every address the host resolves to must be public,
+    so submitters cannot point the worker at loopback, link-local (cloud
+    metadata) or private-network services. Returns the checked address to
+    connect to (None with allow_private), so a second lookup at connect
+    time cannot swap in another one.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookRejected("webhook_url must be an http(s) URL")
+    if parts.username or parts.password:
+        raise WebhookRejected("webhook_url must not contain credentials")
+    host = parts.hostname.lower().rstrip(".")
+    if allowed_hosts and not host_allowed(host, allowed_hosts):
+        raise WebhookRejected(f"webhook_url host {host} is not allowed")
+    if allow_private:
+        return None
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, ValueError) as e:
+        raise WebhookRejected(f"webhook_url host {host} does not resolve: {e}") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise WebhookRejected(f"webhook_url host {host} resolves to a non-public address")
+    return infos[0][4][0]
+
+
+def pinned_request(url: str, address: str | None) -> tuple[str, dict, dict]:
+    """URL, headers and request extensions that reach url's host at a checked address.
+
+    The connection goes to address while the Host header and the TLS server
+    name (SNI and certificate check) stay those of the original host.
+    """
+    if address is None:
+        return url, {}, {}
+    parts = urlsplit(url)
+    netloc = f"[{address}]" if ":" in address else address
+    if parts.port:
+        netloc += f":{parts.port}"
+    extensions = {"sni_hostname": parts.hostname} if parts.scheme == "https" else {}
+    return parts._replace(netloc=netloc).geturl(), {"Host": parts.netloc}, extensions
+
+
+class JobStore:
+    """SQLite-backed job table shared by API and worker processes."""
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.Lock()
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, webhook_url TEXT, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, worker_id TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority, created_at)")
+
+    def create(self, payload: dict, priority: int, webhook_url: str | None) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, priority, payload, webhook_url, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, priority, json.dumps(payload), webhook_url, time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self, worker_id: str) -> dict | None:
+        # BEGIN IMMEDIATE takes the write lock, so concurrent workers never claim the same job
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority, created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET status = 'running', worker_id = ?, started_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker_id, time.time(), row["id"]),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def finish(self, job_id: str, result: dict | None = None, error: str | None = None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "completed", json.dumps(result) if result is not None else None,
+                 error, time.time(), job_id),
+            )
+
+    def requeue(self, job_ids: list[str]):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL WHERE id = ? AND status = 'running'",
+                [(job_id,) for job_id in job_ids],
+            )
+
+    def requeue_stale(self, older_than: float) -> int:
+        # Jobs left running by a crashed worker go back to the queue
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL WHERE status = 'running' AND started_at < ?",
+                (time.time() - older_than,),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class JobQueue:
+    """Pool of async workers that claim jobs from a JobStore and run them through a handler.
+
+    With concurrency=0 the process only enqueues jobs, leaving execution to
+    separate worker processes sharing the same store.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[dict], Awaitable[dict]], concurrency: int = 4,
+                 poll_interval: float = 1.0, stale_after: float = 900, webhook_secret: str | None = None,
+                 webhook_allowed_hosts: tuple[str, ...] = (), webhook_allow_private: bool = False):
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.webhook_secret = webhook_secret
+        self.webhook_allowed_hosts = webhook_allowed_hosts
+        self.webhook_allow_private = webhook_allow_private
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+        self._running: set[str] = set()
+        # Webhook deliveries run apart from the workers, so a slow receiver never holds up a job
+        self._deliveries: set[asyncio.Task] = set()
+        self._http = None
+
+    async def start(self):
+        if self.concurrency <= 0:
+            return
+        requeued = await asyncio.to_thread(self.store.requeue_stale, self.stale_after)
+        if requeued:
+            logger.info(f"Requeued {requeued} stale jobs")
+        # Redirects are not followed, so an allowed webhook cannot bounce the worker to an internal host
+        self._http = httpx.AsyncClient(timeout=10, follow_redirects=False)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        logger.info(f"Started {self.concurrency} job workers ({self.worker_id})")
+
+    async def stop(self, drain_timeout: float = 30):
+        if not self._workers:
+            return
+        # Let running jobs finish, then hand anything still running back to the queue
+        deadline = time.monotonic() + drain_timeout
+        self.concurrency = 0
+        while self._running and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        unfinished = list(self._running)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if unfinished:
+            await asyncio.to_thread(self.store.requeue, unfinished)
+        # Webhooks still being delivered get what is left of the drain timeout
+        if self._deliveries:
+            await asyncio.wait(self._deliveries, timeout=max(0.0, deadline - time.monotonic()))
+            for delivery in self._deliveries:
+                delivery.cancel()
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+        await self._http.aclose()
+        self._workers = []
+
+    async def check_webhook(self, url: str) -> str | None:
+        return await check_webhook_url(url, self.webhook_allowed_hosts, self.webhook_allow_private)
+
+    async def submit(self, payload: dict, priority: str = "normal", webhook_url: str | None = None) -> dict:
+        job = await asyncio.to_thread(self.store.create, payload, PRIORITIES[priority], webhook_url)
+        self._wakeup.set()
+        return job
+
+    async def _work(self):
+        while self.concurrency > 0:
+            job = await asyncio.to_thread(self.store.claim, self.worker_id)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._running.add(job["id"])
+            try:
+                result = await self.handler(job["payload"])
+                await asyncio.to_thread(self.store.finish, job["id"], result)
+                logger.info(f"Job {job['id']} completed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                logger.error(f"Job {job['id']} failed: {detail}")
+                await asyncio.to_thread(self.store.finish, job["id"], None, str(detail))
+            finally:
+                self._running.discard(job["id"])
+
+            if job["webhook_url"]:
+                delivery = asyncio.create_task(self._notify(await asyncio.to_thread(self.store.get, job["id"])))
+                self._deliveries.add(delivery)
+                delivery.add_done_callback(self._deliveries.discard)
+
+    async def _notify(self, job: dict, attempts: int = 3):
+        body = json.dumps({
+            "job_id": job["id"], "status": job["status"], "result": job["result"], "error": job["error"]
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.webhook_secret:
+            signature = hmac.new(self.webhook_secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers["X-Signature-256"] = f"sha256={signature}"
+
+        # Checked again at delivery, since the host may resolve differently than when the job was submitted,
+        # and every attempt connects to the address that passed the check
+        try:
+            address = await self.check_webhook(job["webhook_url"])
+        except WebhookRejected as e:
+            logger.error(f"Not calling webhook for job {job['id']}: {e}")
+            return
+        url, host_headers, extensions = pinned_request(job["webhook_url"], address)
+        headers.update(host_headers)
+
+        for attempt in range(attempts):
+            try:
+                response = await self._http.post(url, content=body, headers=headers, extensions=extensions)
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError as e:
+                logger.warning(f"Webhook for job {job['id']} failed: {e}")
+            await asyncio.sleep(2 ** attempt + random.random())
+        logger.error(f"Giving up on webhook for job {job['id']}")
@@ -0,0 +1,88 @@
+import json
+
+# orjson is optional; the standard library parser is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONExtractionError(ValueError):
+    """The model output contains no recoverable JSON object."""
+
+
+def loads(text: str):
+    return orjson.loads(text) if orjson else json.loads(text)
+
+
+def _scan(text: str, start: int) -> tuple[int | None, list[str], bool]:
+    # Walk one JSON value from text[start] ("{"). Returns the index just past its closing
+    # brace (None if truncated), the stack of still-open brackets and whether it ended inside a string.
+    stack = []
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack or stack.pop() != char:
+                return None, stack, False
+            if not stack:
+                return index + 1, stack, False
+    return None, stack, in_string
+
+
+def _repair_truncated(body: str) -> dict:
+    # Close whatever is still open; if that does not parse, drop the last (incomplete)
+    # element and try again
+    candidate = body
+    for _ in range(64):
+        end, stack, in_string = _scan(candidate, 0)
+        if end is not None:
+            closed = candidate[:end]
+        else:
+            closed = (candidate + ('"' if in_string else "")).rstrip().rstrip(",:") + "".join(reversed(stack))
+        try:
+            return loads(closed)
+        except ValueError:
+            pass
+        cut = candidate.rfind(",")
+        if cut <= 0:
+            break
+        candidate = candidate[:cut]
+    raise JSONExtractionError("Unrepairable truncated JSON in model response")
+
+
+def extract_json(text: str) -> tuple[dict, str | None]:
+    """Parse the JSON object in a model response, repairing common damage.
+
+    Returns (object, repair) where repair is None for clean output, or
+    "fenced", "surrounded" or "truncated" describing what was fixed.
+    """
+    try:
+        value = loads(text)
+        if isinstance(value, dict):
+            return value, None
+    except ValueError:
+        pass
+
+    start = text.find("{")
+    if start < 0:
+        raise JSONExtractionError("No JSON object in model response")
+    end, _, _ = _scan(text, start)
+    if end is None:
+        return _repair_truncated(text[start:].rstrip().removesuffix("```")), "truncated"
+    try:
+        value = loads(text[start:end])
+    except ValueError as e:
+        raise JSONExtractionError(f"Invalid JSON in model response: {e}") from e
+    return value, "fenced" if "```" in text[:start] else "surrounded"
@@ -0,0 +1,92 @@
+import os
+import re
+from utils.chunking import PYTHON_EXTENSIONS
+
+EXTENSIONS = {
+    **{extension: "python" for extension in PYTHON_EXTENSIONS},
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript", ".mts": "typescript", ".cts": "typescript",
+    ".java": "java",
+    ".kt": "kotlin", ".kts": "kotlin",
+    ".go": "go",
+    ".rs": "rust",
+    ".c": "c", ".h": "c",
+    ".cc": "cpp", ".cpp": "cpp", ".cxx": "cpp", ".hh": "cpp", ".hpp": "cpp", ".hxx": "cpp",
+    ".cs": "csharp",
+    ".rb": "ruby",
+    ".php": "php",
+    ".swift": "swift",
+    ".scala": "scala",
+    ".sh": "shell", ".bash": "shell", ".zsh": "shell",
+    ".sql": "sql",
+}
+FILENAMES = {"dockerfile": "dockerfile", "makefile": "makefile", "gemfile": "ruby", "rakefile": "ruby"}
+SHEBANGS = {"python": "python", "node": "javascript", "deno": "typescript", "bash": "shell", "sh": "shell",
+            "zsh": "shell", "ruby": "ruby", "php": "php"}
+
+# (language, pattern); each match is one vote, so a single stray keyword does not decide
+CONTENT_PATTERNS = [
+    ("python", re.compile(r"^\s*(?:async\s+)?def \w+\(.*\)\s*(?:->.*)?:\s*$", re.MULTILINE)),
+    ("python", re.compile(r"^\s*(?:from [\w.]+ )?import [\w., ]+$", re.MULTILINE)),
+    ("python", re.compile(r"^\s*(?:elif .*|else|try|except.*|finally):\s*$", re.MULTILINE)),
+    ("javascript", re.compile(r"\b(?:const|let)\s+\w+\s*=|\bfunction\s*\w*\s*\(|=>\s*[{(]|\brequire\(['\"]")),
+    ("typescript", re.compile(r"^\s*(?:export\s+)?(?:interface|type)\s+\w+.*[={]|:\s*(?:string|number|boolean)\b",
+                              re.MULTILINE)),
+    ("java", re.compile(r"^\s*(?:public|private|protected)\s+(?:static\s+)?(?:final\s+)?(?:class|void|[A-Z]\w*)\s",
+                        re.MULTILINE)),
+    ("go", re.compile(r"^package \w+$|^func (?:\(\w+ \*?\w+\) )?\w+\(|:= ", re.MULTILINE)),
+    ("rust", re.compile(r"^\s*(?:pub\s+)?fn \w+|\blet mut\b|\bimpl\b.*\{|^use \w+::", re.MULTILINE)),
+    ("c", re.compile(r"^#include\s*[<\"]|\bmalloc\(|\bprintf\(", re.MULTILINE)),
+    ("cpp", re.compile(r"\bstd::|\btemplate\s*<|^#include <(?:iostream|vector|string|memory)>", re.MULTILINE)),
+    ("csharp", re.compile(r"^using System|^\s*namespace [\w.]+|\{ get; (?:private )?set; \}", re.MULTILINE)),
+    ("php", re.compile(r"<\?php|\$\w+\s*=")),
+    ("ruby", re.compile(r"^\s*(?:def \w+[?!]?(?:\(.*\))?|end|require ['\"].*['\"]|module \w+)\s*$", re.MULTILINE)),
+    ("shell", re.compile(r"^\s*(?:if \[|fi$|esac$|done$|export \w+=)", re.MULTILINE)),
+    ("sql", re.compile(r"^\s*(?:SELECT|INSERT INTO|UPDATE|DELETE FROM|CREATE TABLE)\b", re.MULTILINE | re.IGNORECASE)),
+]
+CONTENT_SAMPLE_CHARS = 8000
+MIN_VOTES = 2
+
+
+def language_from_filename(filename: str) -> str | None:
+    name = os.path.basename(filename).lower()
+    if name in FILENAMES:
+        return FILENAMES[name]
+    return EXTENSIONS.get(os.path.splitext(name)[1])
+
+
+def language_from_content(code: str) -> str | None:
+    # Shebang first, then keyword votes over the start of the file
+    first_line = code.lstrip()[:200].split("\n", 1)[0]
+    if first_line.startswith("#!"):
+        words = first_line[2:].replace("/usr/bin/env", " ").split()
+        interpreter = os.path.basename(words[0]).rstrip("0123456789.") if words else ""
+        if interpreter in SHEBANGS:
+            return SHEBANGS[interpreter]
+    sample = code[:CONTENT_SAMPLE_CHARS]
+    votes = {}
+    for language, pattern in CONTENT_PATTERNS:
+        count = len(pattern.findall(sample))
+        if count:
+            votes[language] = votes.get(language, 0) + count
+    # TypeScript is a superset of JavaScript and C++ of C: the narrower language wins when it has evidence
+    if votes.get("typescript") and votes.get("javascript"):
+        votes["typescript"] += votes.pop("javascript")
+    if votes.get("cpp") and votes.get("c"):
+        votes["cpp"] += votes.pop("c")
+    if not votes:
+        return None
+    language, count = max(votes.items(), key=lambda item: item[1])
+    return language if count >= MIN_VOTES else None
+
+
+def detect_language(code: str, filename: str | None = None) -> str | None:
+    """Language of a source file: from its name when known, otherwise guessed from its content.
+
+    Returns None when neither gives a confident answer.
+    """
+    if filename:
+        language = language_from_filename(filename)
+        if language:
+            return language
+    return language_from_content(code)
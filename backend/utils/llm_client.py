@@ -0,0 +1,72 @@
+import os
+import time
+from email.utils import parsedate_to_datetime
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+
+def create_async_client(base_url: str | None = None, api_key: str | None = None) -> AsyncOpenAI:
+    # One pooled HTTP client shared by every request in this worker, so reviews
+    # run concurrently on the event loop instead of blocking it. Defaults to the OPENAI_* settings.
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 30)),
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("OPENAI_TIMEOUT", 120)),
+        connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", 10)),
+    )
+
+    return AsyncOpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+        timeout=timeout,
+        # Retries are handled by the shared UpstreamLimiter so they respect the global budgets
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", 0)),
+        http_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+    )
+
+
+def retry_after_seconds(response: httpx.Response | None) -> float | None:
+    if response is None:
+        return None
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_upstream_error(error: Exception) -> tuple[str | None, float | None]:
+    # Tell the limiter whether an OpenAI error is throttling, transient or final
+    if isinstance(error, openai.RateLimitError):
+        if getattr(error, "code", None) == "insufficient_quota":
+            return None, None
+        return "throttled", retry_after_seconds(error.response)
+    if isinstance(error, openai.InternalServerError):
+        return "transient", retry_after_seconds(error.response)
+    if isinstance(error, openai.APIConnectionError):
+        return "transient", None
+    return None, None
+
+
+def rejects_response_format(error: Exception) -> bool:
+    # 400 from a model without structured outputs (e.g. "Invalid parameter: 'response_format' of type
+    # 'json_schema' is not supported with this model")
+    if not isinstance(error, openai.BadRequestError):
+        return False
+    return getattr(error, "param", None) == "response_format" or "response_format" in str(error)
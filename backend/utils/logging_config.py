@@ -0,0 +1,148 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+
+# Route and request id of the request being handled, attached to every log record
+request_route = contextvars.ContextVar("request_route", default=None)
+request_id = contextvars.ContextVar("request_id", default=None)
+
+SENSITIVE_HEADERS = {"authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key"}
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def truncate(text, limit: int) -> str:
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+
+def redact_headers(headers, max_value_chars: int = 256) -> dict:
+    return {
+        key: "[REDACTED]" if key.lower() in SENSITIVE_HEADERS else truncate(value, max_value_chars)
+        for key, value in headers.items()
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including request context and extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        route = getattr(record, "route", None)
+        if route:
+            entry["route"] = route
+            entry["request_id"] = getattr(record, "request_id", None)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in ("route", "request_id"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tags records with the current request and samples sub-WARNING records per route.
+
+    sample_rates maps route prefixes to keep-probabilities; the longest
+    matching prefix wins and unmatched routes are always kept.
+    """
+
+    def __init__(self, sample_rates: dict[str, float]):
+        super().__init__()
+        self.prefixes = sorted(sample_rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        route = request_route.get()
+        record.route = route
+        record.request_id = request_id.get()
+        if route is None or record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.prefixes:
+            if route.startswith(prefix):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: records are dropped when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    # "/static/=0.01,/_next/=0,/health=0.1"
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            prefix, rate = item.rsplit("=", 1)
+            rates[prefix.strip()] = float(rate)
+    return rates
+
+
+def configure_logging():
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    handler = output
+    if os.getenv("LOG_ASYNC", "true").lower() == "true":
+        # Formatting and stdout writes happen on a background thread
+        log_queue = queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+        handler = DroppingQueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+    handler.addFilter(RequestContextFilter(parse_sample_rates(
+        os.getenv("LOG_SAMPLE_RATES", "/static/=0.01,/_next/=0.01,/health=0.1,/metrics=0")
+    )))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    # Library debug output (httpx, httpcore, openai) is only useful when explicitly asked for
+    for name in ("httpx", "httpcore", "openai", "multipart"):
+        logging.getLogger(name).setLevel(os.getenv("LOG_LIBRARY_LEVEL", "WARNING").upper())
+
+
+class RequestContextMiddleware:
+    """ASGI middleware that binds the route and a request id for log records."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route_token = request_route.set(scope["path"])
+        id_token = request_id.set(uuid.uuid4().hex[:12])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_route.reset(route_token)
+            request_id.reset(id_token)
@@ -0,0 +1,91 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+# Set by gunicorn.conf.py when running several worker processes
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+# Component stats are read live from the worker serving the scrape
+STATS_REGISTRY = CollectorRegistry() if MULTIPROCESS else REGISTRY
+
+# Stages of a single review, in request order
+STAGES = ["read", "preanalysis", "prompt", "upstream", "parse", "validate", "serialize"]
+
+STAGE_SECONDS = Histogram(
+    "review_stage_seconds",
+    "Time spent in each stage of a review",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120),
+)
+UPSTREAM_TTFT_SECONDS = Histogram(
+    "upstream_time_to_first_token_seconds",
+    "Time from sending a completion request to its first content token",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+UPSTREAM_TOKENS = Counter("upstream_tokens_total", "Tokens reported in completion usage", ["kind"])
+REVIEWS_IN_FLIGHT = Gauge("reviews_in_flight", "Reviews currently being processed", ["endpoint"],
+                          multiprocess_mode="livesum")
+REVIEW_ERRORS = Counter("review_errors_total", "Review failures by error type", ["type"])
+REVIEW_ROUTES = Counter("review_routes_total", "Reviews by local pre-analysis outcome", ["route"])
+RESPONSE_REPAIRS = Counter("response_repairs_total", "Model responses repaired before parsing", ["kind"])
+CLIENT_DISCONNECTS = Counter("client_disconnects_total", "Reviews abandoned by a client disconnect", ["endpoint"])
+UPSTREAM_CANCELLED = Counter("upstream_cancelled_total", "Upstream completions closed before they finished")
+
+# Pre-bound children keep label lookups off the hot path
+_stage_histograms = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+_prompt_tokens = UPSTREAM_TOKENS.labels("prompt")
+_completion_tokens = UPSTREAM_TOKENS.labels("completion")
+_cached_prompt_tokens = UPSTREAM_TOKENS.labels("cached_prompt")
+
+
+@contextmanager
+def observe_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_histograms[stage].observe(time.perf_counter() - start)
+
+
+def record_usage(usage):
+    if usage is None:
+        return
+    _prompt_tokens.inc(usage.prompt_tokens or 0)
+    _completion_tokens.inc(usage.completion_tokens or 0)
+    # Prompt tokens served from the provider's prefix cache
+    details = getattr(usage, "prompt_tokens_details", None)
+    _cached_prompt_tokens.inc(getattr(details, "cached_tokens", None) or 0)
+
+
+def record_error(error_type: str):
+    REVIEW_ERRORS.labels(error_type).inc()
+
+
+class StatsCollector:
+    """Exposes the numeric values of a component's stats() dict as gauges at scrape time."""
+
+    def __init__(self, prefix: str, documentation: str, stats: Callable[[], dict]):
+        self.prefix = prefix
+        self.documentation = documentation
+        self.stats = stats
+
+    def collect(self):
+        for key, value in self.stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            yield GaugeMetricFamily(f"{self.prefix}_{key}", f"{self.documentation}: {key}", value=value)
+
+
+def register_stats(prefix: str, documentation: str, stats: Callable[[], dict]):
+    STATS_REGISTRY.register(StatsCollector(prefix, documentation, stats))
+
+
+def metrics_payload() -> bytes:
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    # Histograms and counters summed across all workers
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry) + generate_latest(STATS_REGISTRY)
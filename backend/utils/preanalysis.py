@@ -0,0 +1,108 @@
+import ast
+import re
+from utils.chunking import PYTHON_EXTENSIONS
+from utils.languages import detect_language
+
+GENERATED_MARKERS = re.compile(r"(?:auto-?generated|do not edit|generated by)", re.IGNORECASE)
+MINIFIED_LINE_CHARS = 1000
+
+# (category, pattern, message); deliberately cheap and high-signal, the model does the real review
+SECURITY_PATTERNS = [
+    ("secret", re.compile(r"AKIA[0-9A-Z]{16}"), "Hard-coded AWS access key"),
+    ("secret", re.compile(r"-----BEGIN (?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----"), "Embedded private key"),
+    ("secret", re.compile(r"""(?i)\b(?:password|passwd|secret|api_?key|token)\s*[:=]\s*["'][^"'\s]{8,}["']"""),
+     "Hard-coded credential"),
+    ("injection", re.compile(r"\b(?:eval|exec)\s*\("), "Dynamic code execution with eval/exec"),
+    ("injection", re.compile(r"shell\s*=\s*True"), "Subprocess call with shell=True"),
+    ("injection", re.compile(r"\bos\.system\s*\("), "Shell command via os.system"),
+    ("injection", re.compile(r"""(?i)\.execute\s*\(\s*(?:f["']|["'][^"']*["']\s*(?:%|\+|\.format))"""),
+     "SQL built with string formatting"),
+    ("deserialization", re.compile(r"\bpickle\.loads?\s*\("), "Unpickling data that may be untrusted"),
+    ("deserialization", re.compile(r"\byaml\.load\s*\((?![^)]*Loader)"), "yaml.load without a safe Loader"),
+    ("crypto", re.compile(r"\bhashlib\.(?:md5|sha1)\s*\("), "Weak hash algorithm"),
+    ("transport", re.compile(r"verify\s*=\s*False"), "TLS certificate verification disabled"),
+]
+
+BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith,
+                ast.ExceptHandler, ast.IfExp, ast.comprehension, ast.Assert, ast.match_case)
+
+
+def cyclomatic_complexity(node: ast.AST) -> int:
+    complexity = 1
+    for child in ast.walk(node):
+        if isinstance(child, BRANCH_NODES):
+            complexity += 1
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+    return complexity
+
+
+def python_metrics(code: str) -> dict:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError) as e:
+        return {"syntax_error": {"line": getattr(e, "lineno", None), "message": getattr(e, "msg", str(e))}}
+
+    functions = [node for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    complexities = sorted(((cyclomatic_complexity(f), f.name, f.lineno) for f in functions), reverse=True)
+    return {
+        "syntax_error": None,
+        "functions": len(functions),
+        "classes": sum(isinstance(node, ast.ClassDef) for node in ast.walk(tree)),
+        "max_complexity": complexities[0][0] if complexities else 1,
+        "complex_functions": [
+            {"name": name, "line": line, "complexity": complexity}
+            for complexity, name, line in complexities[:5] if complexity > 10
+        ],
+    }
+
+
+def preanalyze(code: str, filename: str | None = None, max_findings: int = 20) -> dict:
+    """Fast local checks run before the model sees the code.
+
+    Pure function of its arguments so it can run in a process pool.
+    """
+    lines = code.splitlines()
+    report = {
+        # Pasted snippets that match no language are still tried as Python
+        "language": detect_language(code, filename) or ("python" if filename is None else None),
+        "lines": len(lines),
+        "chars": len(code),
+        "max_line_chars": max((len(line) for line in lines), default=0),
+        "generated": bool(GENERATED_MARKERS.search("\n".join(lines[:5]))),
+        "syntax_error": None,
+        "max_complexity": None,
+        "findings": [],
+    }
+    report["minified"] = report["max_line_chars"] > MINIFIED_LINE_CHARS and len(lines) < 20
+
+    if report["language"] == "python":
+        metrics = python_metrics(code)
+        if metrics["syntax_error"] and not (filename and filename.endswith(PYTHON_EXTENSIONS)):
+            # Only a .py name makes a syntax error certain; guessed Python may be another language
+            report["language"] = None
+        else:
+            report.update(metrics)
+
+    findings = report["findings"]
+    for number, line in enumerate(lines, 1):
+        for category, pattern, message in SECURITY_PATTERNS:
+            if pattern.search(line):
+                findings.append({"line": number, "category": category, "message": message})
+        if len(findings) >= max_findings:
+            break
+    for function in report.get("complex_functions", []):
+        findings.append({"line": function["line"], "category": "complexity",
+                         "message": f"{function['name']} has cyclomatic complexity {function['complexity']}"})
+    return report
+
+
+def findings_context(report: dict, limit: int = 10) -> str:
+    # Compact summary appended to the prompt; the model is asked to verify rather than trust it
+    summary = f"{report['lines']} lines"
+    if report.get("functions") is not None:
+        summary += f", {report['functions']} functions, max cyclomatic complexity {report['max_complexity']}"
+    items = [f"- line {f['line']}: [{f['category']}] {f['message']}" for f in report["findings"][:limit]]
+    if not items:
+        return f"\n\nLocal static analysis: {summary}, no findings."
+    return f"\n\nLocal static analysis ({summary}); verify before reporting:\n" + "\n".join(items)
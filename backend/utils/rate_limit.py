@@ -0,0 +1,241 @@
+import asyncio
+import heapq
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough token estimate (~4 characters per token) without a tokenizer dependency
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Refilling token budget, e.g. tokens-per-minute for upstream calls."""
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float):
+        # Requests larger than the bucket are clamped so they can still run once it is full
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+    def try_acquire(self, amount: float) -> float:
+        # Spend without waiting: returns 0 on success, otherwise the seconds until amount is available
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+
+class WeightedFairQueue:
+    """Weighted fair queueing tags for callers sharing an UpstreamLimiter.
+
+    Each flow (e.g. a tenant's interactive or bulk traffic) gets a virtual
+    finish time of max(virtual time, its previous finish) + cost / weight,
+    and the limiter grants slots in tag order. A flow with a backlog runs
+    ahead of the virtual clock and waits behind flows that were idle, so
+    heavy traffic only gets the capacity others leave unused. The virtual
+    clock follows the tag of the last call granted a slot (self-clocked).
+    """
+
+    def __init__(self, max_flows: int = 10000):
+        self.virtual_time = 0.0
+        self.max_flows = max_flows
+        self._finish: dict[str, float] = {}
+
+    def order(self, flow: str, cost: float, weight: float = 1.0) -> tuple:
+        start = max(self.virtual_time, self._finish.get(flow, 0.0))
+        finish = start + cost / max(weight, 1e-9)
+        self._finish[flow] = finish
+        if len(self._finish) > self.max_flows:
+            # Flows behind the clock would restart from it anyway
+            self._finish = {name: tag for name, tag in self._finish.items() if tag > self.virtual_time}
+        return (finish,)
+
+    def dispatched(self, order: tuple):
+        if order:
+            self.virtual_time = max(self.virtual_time, order[0])
+
+    def stats(self) -> dict:
+        backlogged = sum(1 for tag in self._finish.values() if tag > self.virtual_time)
+        return {"virtual_time": round(self.virtual_time, 1), "backlogged_flows": backlogged}
+
+
+class UpstreamThrottled(Exception):
+    """Raised when the upstream keeps rate limiting after all retries."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream rate limit exceeded, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class QueueFull(Exception):
+    """Raised when too many callers are already waiting for an upstream slot."""
+
+
+class UpstreamLimiter:
+    """Shared admission control for upstream completion calls.
+
+    Callers queue in order for a concurrency slot, then spend request and
+    token budgets. The concurrency limit adapts AIMD-style: it grows by about
+    one per window of successful calls and halves on throttling or when
+    latency exceeds the target. Retry-After pauses every caller, not just the
+    one that was throttled, so a burst does not turn into a retry storm.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int = 32,
+                 min_concurrency: int = 1, target_latency: float = 90.0, max_retries: int = 4,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0, max_queue: int = 1000,
+                 on_dispatch: Callable[[tuple], None] | None = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max(min_concurrency, max_concurrency // 2))
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_queue = max_queue
+        # Told the order of every call granted a slot, e.g. WeightedFairQueue.dispatched
+        self.on_dispatch = on_dispatch
+        self.in_flight = 0
+        self._waiters: list[tuple[tuple, int, asyncio.Future]] = []
+        self._sequence = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency = None
+        self._counters = {"succeeded": 0, "throttled": 0, "retries": 0, "rejected": 0, "failed": 0}
+
+    async def _acquire(self, order: tuple):
+        if len(self._waiters) >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise QueueFull("Too many reviews waiting for the upstream API")
+
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (order, self._sequence, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we were cancelled; hand it on
+                self._release()
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            order, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+            if self.on_dispatch:
+                self.on_dispatch(order)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, order: tuple | None = None):
+        # Default ordering is arrival order (the sequence number breaks ties)
+        await self._acquire(order if order is not None else ())
+        try:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self.requests.acquire(1)
+            await self.tokens.acquire(tokens)
+            yield
+        finally:
+            self._release()
+
+    @property
+    def saturated(self) -> bool:
+        # Another call now would have to queue for a slot
+        return self.in_flight >= int(self.limit) or any(not future.done() for _, _, future in self._waiters)
+
+    def record_success(self, latency: float):
+        self._counters["succeeded"] += 1
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if latency > self.target_latency:
+            self._decrease(0.9)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def record_throttle(self, retry_after: float | None):
+        self._counters["throttled"] += 1
+        self._decrease(0.5)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def _decrease(self, factor: float):
+        # One multiplicative decrease per round trip, however many calls in it were throttled
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * factor)
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        # Exponential backoff with jitter, never shorter than the server's Retry-After
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        return max(delay, retry_after or 0.0)
+
+    async def call(self, fn: Callable[[], Awaitable], tokens: int, classify: Callable[[Exception], tuple[str | None, float | None]],
+                   order: tuple | None = None):
+        # classify(exc) returns ("throttled" | "transient" | None, retry_after)
+        retry_after = None
+        for attempt in range(self.max_retries + 1):
+            async with self.slot(tokens, order):
+                start = time.monotonic()
+                try:
+                    result = await fn()
+                except Exception as e:
+                    kind, retry_after = classify(e)
+                    if kind is None or attempt == self.max_retries:
+                        self._counters["failed"] += 1
+                        if kind == "throttled":
+                            self.record_throttle(retry_after)
+                            raise UpstreamThrottled(retry_after or self.backoff(attempt)) from e
+                        raise
+                    if kind == "throttled":
+                        self.record_throttle(retry_after)
+                else:
+                    self.record_success(time.monotonic() - start)
+                    return result
+            self._counters["retries"] += 1
+            await asyncio.sleep(self.backoff(attempt, retry_after))
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "latency_ewma": round(self._latency, 3) if self._latency is not None else None,
+        }
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from utils.review_cache import normalize_code
+from utils.scoring import SCORE_FIELDS
+
+SCORE_COLUMNS = ", ".join(SCORE_FIELDS)
+SUMMARY_COLUMNS = f"id, code_hash, project, filename, profile, revision_id, created_at, {SCORE_COLUMNS}"
+# Indexes from before rows were scoped by tenant; replaced by the tenant-leading ones below
+LEGACY_INDEXES = ["idx_history_project", "idx_history_trend", "idx_history_trend_all", "idx_suggestions_category",
+                  "idx_suggestions_category_all", *(f"idx_history_{field}" for field in SCORE_FIELDS)]
+
+
+def code_hash(code: str) -> str:
+    # Identifies the code alone, so the same file reviewed under different profiles or models groups together
+    return hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()
+
+
+class ReviewHistory:
+    """SQLite-backed history of every delivered review, queried by the dashboard.
+
+    Listing uses keyset pagination on the row id and the aggregates read
+    covering indexes, so neither scans the table as it grows. Suggestion
+    categories live in their own table to be counted without parsing the
+    stored analyses. Every row belongs to a tenant ("" when API keys are not
+    configured) and every read is confined to one.
+    """
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.Lock()
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        score_columns = ", ".join(f"{field} REAL NOT NULL" for field in SCORE_FIELDS)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS review_history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, code_hash TEXT NOT NULL, project TEXT NOT NULL, "
+            "filename TEXT, profile TEXT NOT NULL, revision_id TEXT, created_at REAL NOT NULL, "
+            f"{score_columns}, analysis TEXT NOT NULL, tenant TEXT NOT NULL DEFAULT '')"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS review_suggestions ("
+            "review_id INTEGER NOT NULL, project TEXT NOT NULL, created_at REAL NOT NULL, "
+            "category TEXT NOT NULL, type TEXT NOT NULL, tenant TEXT NOT NULL DEFAULT '')"
+        )
+        self._migrate()
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_code_hash ON review_history (code_hash)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_tenant_project ON review_history (tenant, project, id)")
+        # Covering indexes for score trends, per project and across a tenant's projects: the time range
+        # and every score are read from the index alone
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_history_tenant_trend "
+            f"ON review_history (tenant, project, created_at, {SCORE_COLUMNS})"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_history_tenant_trend_all "
+            f"ON review_history (tenant, created_at, {SCORE_COLUMNS})"
+        )
+        for field in SCORE_FIELDS:
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_history_tenant_{field} ON review_history (tenant, project, {field})"
+            )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_suggestions_tenant_category "
+            "ON review_suggestions (tenant, project, created_at, category, type)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_suggestions_tenant_category_all "
+            "ON review_suggestions (tenant, created_at, category, type)"
+        )
+
+    def _migrate(self):
+        # Databases created before tenants: existing rows belong to the "" tenant (no API keys)
+        for table in ("review_history", "review_suggestions"):
+            columns = {row["name"] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            if "tenant" not in columns:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+        for index in LEGACY_INDEXES:
+            self._db.execute(f"DROP INDEX IF EXISTS {index}")
+
+    def add(self, code_hash: str, analysis: dict, profile: str, project: str = "",
+            filename: str | None = None, revision_id: str | None = None, tenant: str = "") -> int:
+        now = time.time()
+        scores = [float(analysis.get(field) or 0.0) for field in SCORE_FIELDS]
+        suggestions = [
+            (suggestion.get("category") or "overall", suggestion.get("type") or "improvement")
+            for suggestion in analysis.get("suggestions") or []
+        ]
+        placeholders = ", ".join("?" for _ in SCORE_FIELDS)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                cursor = self._db.execute(
+                    "INSERT INTO review_history (code_hash, project, filename, profile, revision_id, created_at, "
+                    f"{SCORE_COLUMNS}, analysis, tenant) VALUES (?, ?, ?, ?, ?, ?, {placeholders}, ?, ?)",
+                    (code_hash, project, filename, profile, revision_id, now, *scores, json.dumps(analysis), tenant),
+                )
+                review_id = cursor.lastrowid
+                self._db.executemany(
+                    "INSERT INTO review_suggestions (review_id, project, created_at, category, type, tenant) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(review_id, project, now, category, kind, tenant) for category, kind in suggestions],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return review_id
+
+    def get(self, review_id: int, tenant: str = "") -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM review_history WHERE id = ? AND tenant = ?", (review_id, tenant)
+            ).fetchone()
+        if row is None:
+            return None
+        review = dict(row)
+        del review["tenant"]
+        review["analysis"] = json.loads(review["analysis"])
+        return review
+
+    def search(self, project: str | None = None, code_hash: str | None = None, min_score: float | None = None,
+               max_score: float | None = None, before: int | None = None, limit: int = 50,
+               tenant: str = "") -> list[dict]:
+        # Newest first; pass the last id of a page as `before` to get the next one
+        clauses, params = ["tenant = ?"], [tenant]
+        for clause, value in (("project = ?", project), ("code_hash = ?", code_hash),
+                              ("overall_score >= ?", min_score), ("overall_score <= ?", max_score),
+                              ("id < ?", before)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM review_history WHERE {' AND '.join(clauses)} "
+                "ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _range(tenant: str, project: str | None, since: float) -> tuple[str, tuple]:
+        if project is None:
+            return "tenant = ? AND created_at >= ?", (tenant, since)
+        return "tenant = ? AND project = ? AND created_at >= ?", (tenant, project, since)
+
+    def score_trends(self, project: str | None, since: float, bucket_seconds: int, tenant: str = "") -> list[dict]:
+        averages = ", ".join(f"ROUND(AVG({field}), 2) AS {field}" for field in SCORE_FIELDS)
+        where, params = self._range(tenant, project, since)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT CAST(created_at / ? AS INTEGER) * ? AS bucket_start, COUNT(*) AS reviews, {averages} "
+                f"FROM review_history WHERE {where} GROUP BY 1 ORDER BY 1",
+                (bucket_seconds, bucket_seconds, *params),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def top_categories(self, project: str | None, since: float, limit: int = 10, tenant: str = "") -> list[dict]:
+        where, params = self._range(tenant, project, since)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT category, COUNT(*) AS suggestions, SUM(type = 'error') AS errors, "
+                f"SUM(type = 'warning') AS warnings FROM review_suggestions WHERE {where} "
+                "GROUP BY category ORDER BY suggestions DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def prune(self, max_age: float) -> int:
+        cutoff = time.time() - max_age
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM review_suggestions WHERE created_at < ?", (cutoff,))
+                cursor = self._db.execute("DELETE FROM review_history WHERE created_at < ?", (cutoff,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,51 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class ReviewStore:
+    """SQLite-backed review revisions: the reviewed code and its analysis, used as the base of incremental re-reviews.
+
+    Revision ids are content-addressed, so resubmitting the same code and
+    profile reuses the existing revision instead of adding a new row.
+    """
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.Lock()
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS revisions ("
+            "id TEXT PRIMARY KEY, parent_id TEXT, filename TEXT, profile TEXT NOT NULL, "
+            "code TEXT NOT NULL, analysis TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_revisions_created ON revisions (created_at)")
+
+    def save(self, revision_id: str, code: str, analysis: dict, profile: str,
+             filename: str | None = None, parent_id: str | None = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO revisions (id, parent_id, filename, profile, code, analysis, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (revision_id, parent_id, filename, profile, code, json.dumps(analysis), time.time()),
+            )
+
+    def get(self, revision_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM revisions WHERE id = ?", (revision_id,)).fetchone()
+        if row is None:
+            return None
+        revision = dict(row)
+        revision["analysis"] = json.loads(revision["analysis"])
+        return revision
+
+    def prune(self, max_age: float) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM revisions WHERE created_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Awaitable, Callable
+from openai import AsyncOpenAI
+from utils.rate_limit import UpstreamLimiter, UpstreamThrottled, QueueFull
+
+
+class Backend:
+    """One upstream model endpoint: its client, its own limiter and its observed health and latency.
+
+    max_chars and profiles restrict which reviews are routed here (0 and
+    empty mean any). After unhealthy_after consecutive transient failures
+    the backend is skipped for cooldown seconds, then tried again.
+    """
+
+    def __init__(self, name: str, model: str, client: AsyncOpenAI, limiter: UpstreamLimiter,
+                 max_chars: int = 0, profiles: tuple[str, ...] = (), unhealthy_after: int = 3,
+                 cooldown: float = 30.0, window: int = 200):
+        self.name = name
+        self.model = model
+        self.client = client
+        self.limiter = limiter
+        self.max_chars = max_chars
+        self.profiles = profiles
+        self.unhealthy_after = unhealthy_after
+        self.cooldown = cooldown
+        self.latencies = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self._counters = {"succeeded": 0, "failed": 0, "hedged": 0}
+
+    def accepts(self, chars: int, profile: str | None) -> bool:
+        return (not self.max_chars or chars <= self.max_chars) and (not self.profiles or profile in self.profiles)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def latency_percentile(self, fraction: float, min_samples: int = 1) -> float | None:
+        if len(self.latencies) < max(1, min_samples):
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def record_success(self, latency: float):
+        self._counters["succeeded"] += 1
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def record_hedge(self):
+        self._counters["hedged"] += 1
+
+    def record_failure(self):
+        self._counters["failed"] += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.unhealthy_after:
+            self.unhealthy_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> dict:
+        p50 = self.latency_percentile(0.5)
+        p95 = self.latency_percentile(0.95)
+        return {
+            **self._counters,
+            "model": self.model,
+            "healthy": self.healthy,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+            "limiter": self.limiter.stats(),
+        }
+
+
+class BackendRouter:
+    """Routes completion calls across backends and hedges slow ones.
+
+    Eligible backends (by input size and review profile) are ranked healthy
+    first, then by median latency, so traffic drifts towards whichever
+    answers fastest. When a call has not finished the primary's
+    hedge_percentile latency after getting its limiter slot, a duplicate goes
+    to the next backend (or the same one if it is the only choice), unless
+    that backend's limiter is already full; the first answer wins and the
+    other call is cancelled.
+    """
+
+    def __init__(self, backends: list[Backend], hedge_percentile: float | None = 0.95,
+                 hedge_min_samples: int = 20, hedge_min_delay: float = 1.0):
+        if not backends:
+            raise ValueError("At least one upstream backend is required")
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._counters = {"hedges_fired": 0, "hedges_won": 0, "hedges_skipped": 0}
+
+    @property
+    def default(self) -> Backend:
+        return self.backends[0]
+
+    def candidates(self, chars: int, profile: str | None, model: str | None = None) -> tuple[list[Backend], bool]:
+        # Returns the ranked backends and whether the requested model is one of theirs. A model no
+        # backend lists (e.g. OPENAI_LIGHT_MODEL) is sent to the default backend, which shares its provider.
+        # If nothing accepts the input, every backend is a candidate rather than failing the review.
+        eligible = [backend for backend in self.backends if backend.accepts(chars, profile)] or list(self.backends)
+        serving = [backend for backend in eligible if backend.model == model] if model else []
+        if model and not serving:
+            return [self.default], False
+        ranked = serving or eligible
+
+        def rank(item: tuple[int, Backend]):
+            index, backend = item
+            p50 = backend.latency_percentile(0.5)
+            # Unmeasured backends rank as fast so they get traffic and a latency sample
+            return (not backend.healthy, p50 if p50 is not None else 0.0, index)
+        return [backend for _, backend in sorted(enumerate(ranked), key=rank)], bool(serving)
+
+    def pick(self, chars: int, profile: str | None, model: str | None = None) -> tuple[Backend, str]:
+        # Backend and model for a single, unhedged call (streaming)
+        backends, served = self.candidates(chars, profile, model)
+        backend = backends[0]
+        return backend, backend.model if served or not model else model
+
+    def record(self, backend: Backend, latency: float | None = None, error: Exception | None = None,
+               classify: Callable[[Exception], tuple[str | None, float | None]] | None = None):
+        # Only throttling and transient errors count against health; a rejected request is not the backend's fault
+        if error is None:
+            backend.record_success(latency)
+        elif isinstance(error, (UpstreamThrottled, QueueFull)) or (classify and classify(error)[0]):
+            backend.record_failure()
+
+    def hedge_delay(self, backend: Backend) -> float | None:
+        if self.hedge_percentile is None:
+            return None
+        delay = backend.latency_percentile(self.hedge_percentile, self.hedge_min_samples)
+        return max(delay, self.hedge_min_delay) if delay is not None else None
+
+    async def _attempt(self, backend: Backend, model: str, fn: Callable[[Backend, str], Awaitable], tokens: int,
+                       classify: Callable[[Exception], tuple[str | None, float | None]], order: tuple | None,
+                       started: asyncio.Event | None = None):
+        # Latency of the upstream call itself, without time spent queueing in the limiter;
+        # started is set once the call holds a slot and its budgets
+        latency = 0.0
+
+        async def timed():
+            nonlocal latency
+            if started:
+                started.set()
+            start = time.monotonic()
+            result = await fn(backend, model)
+            latency = time.monotonic() - start
+            return result
+        try:
+            result = await backend.limiter.call(timed, tokens, classify, order)
+        except Exception as e:
+            self.record(backend, error=e, classify=classify)
+            raise
+        self.record(backend, latency)
+        return result
+
+    async def call(self, fn: Callable[[Backend, str], Awaitable], tokens: int,
+                   classify: Callable[[Exception], tuple[str | None, float | None]], chars: int,
+                   profile: str | None = None, model: str | None = None, order: tuple | None = None):
+        # fn(backend, model) performs one completion against the given backend
+        backends, served = self.candidates(chars, profile, model)
+        primary = backends[0]
+
+        def model_for(backend: Backend) -> str:
+            return backend.model if served or not model else model
+
+        started = asyncio.Event()
+        first = asyncio.create_task(self._attempt(primary, model_for(primary), fn, tokens, classify, order, started))
+        tasks = [first]
+        try:
+            delay = self.hedge_delay(primary)
+            if delay is not None:
+                # The delay runs from when the primary reaches the upstream: queueing is not a slow backend
+                slot_granted = asyncio.create_task(started.wait())
+                try:
+                    await asyncio.wait({first, slot_granted}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    slot_granted.cancel()
+                if not first.done():
+                    await asyncio.wait({first}, timeout=delay)
+            if delay is None or first.done():
+                return await first
+
+            secondary = backends[1] if len(backends) > 1 else primary
+            if secondary.limiter.saturated:
+                # A duplicate would only queue behind (or displace) other calls on a busy backend
+                self._counters["hedges_skipped"] += 1
+                return await first
+            self._counters["hedges_fired"] += 1
+            secondary.record_hedge()
+            second = asyncio.create_task(self._attempt(secondary, model_for(secondary), fn, tokens, classify, order))
+            tasks.append(second)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._counters["hedges_won"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # The losing call (or both, if the caller was cancelled) releases its limiter slot
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "healthy_backends": sum(1 for backend in self.backends if backend.healthy),
+            "backends": {backend.name: backend.stats() for backend in self.backends},
+        }
+
+
+def parse_backends(spec: str) -> list[dict]:
+    # UPSTREAM_BACKENDS is a JSON list of objects; name and model are required
+    try:
+        entries = json.loads(spec)
+    except ValueError as e:
+        raise ValueError(f"UPSTREAM_BACKENDS is not valid JSON: {e}") from e
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError("UPSTREAM_BACKENDS must be a JSON list of objects")
+    for entry in entries:
+        if not entry.get("name") or not entry.get("model"):
+            raise ValueError("Every UPSTREAM_BACKENDS entry needs a name and a model")
+    return entries
@@ -1,3 +1,11 @@
+import logging
+import re
+from typing import List, Literal, Optional
+from pydantic import BaseModel, root_validator, validator
+from utils.scoring import SCORE_FIELDS
+
+logger = logging.getLogger(__name__)
+
 # Define the JSON schema for code analysis
 CODE_ANALYSIS_SCHEMA = {
     "type": "object",
@@ -37,4 +45,114 @@ CODE_ANALYSIS_SCHEMA = {
         }
     },
     "required": ["overall_score", "code_quality", "performance", "suggestions"]
-} 
\ No newline at end of file
+}
+
+SUGGESTION_TYPES = ("improvement", "warning", "error")
+CATEGORIES = ("overall", "correctness", "quality", "performance", "security",
+              "consistency", "scalability", "error_handling")
+# Near-miss labels models produce instead of the documented ones
+CATEGORY_ALIASES = {
+    "correctness_functionality": "correctness", "functionality": "correctness", "bug": "correctness",
+    "code_quality_maintainability": "quality", "maintainability": "quality", "readability": "quality",
+    "performance_efficiency": "performance", "efficiency": "performance",
+    "security_vulnerability": "security", "vulnerability": "security",
+    "code_consistency_style": "consistency", "style": "consistency",
+    "scalability_extensibility": "scalability", "extensibility": "scalability",
+    "error_handling_robustness": "error_handling", "robustness": "error_handling",
+}
+TYPE_ALIASES = {"critical": "error", "bug": "error", "suggestion": "improvement", "info": "improvement"}
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def coerce_score(value) -> float:
+    # Accepts 7, "7.5" and "7.5/10"; clamps to the 0-10 scale and rounds to one decimal place
+    if isinstance(value, str):
+        match = NUMBER.search(value)
+        if not match:
+            raise ValueError(f"Not a score: {value!r}")
+        value = match.group()
+    return round(min(max(float(value), 0.0), 10.0), 1)
+
+
+def _label(value) -> str:
+    return str(value).strip().lower().replace("-", "_").replace(" ", "_")
+
+
+class Suggestion(BaseModel):
+    type: Literal["improvement", "warning", "error"] = "improvement"
+    category: Literal["overall", "correctness", "quality", "performance", "security",
+                      "consistency", "scalability", "error_handling"] = "overall"
+    message: str
+    line: Optional[int] = None
+
+    @validator("type", pre=True)
+    def coerce_type(cls, value):
+        value = _label(value)
+        return TYPE_ALIASES.get(value, value if value in SUGGESTION_TYPES else "improvement")
+
+    @validator("category", pre=True)
+    def coerce_category(cls, value):
+        value = _label(value)
+        return CATEGORY_ALIASES.get(value, value if value in CATEGORIES else "overall")
+
+    @validator("line", pre=True)
+    def coerce_line(cls, value):
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+
+class DimensionExplanation(BaseModel):
+    score: Optional[float] = None
+    explanation: str = ""
+    key_findings: List[str] = []
+    improvement_suggestions: List[str] = []
+
+    _score = validator("score", pre=True, allow_reuse=True)(lambda v: None if v is None else coerce_score(v))
+
+
+class ImprovementSummary(BaseModel):
+    critical_improvements: List[str] = []
+    recommended_improvements: List[str] = []
+    positive_aspects: List[str] = []
+
+
+class SuggestedImplementation(BaseModel):
+    code: str = ""
+    improvements: List[str] = []
+    benefits: List[str] = []
+    explanation: str = ""
+
+
+class CodeAnalysis(BaseModel):
+    overall_score: float
+    correctness_functionality: float
+    code_quality_maintainability: float
+    performance_efficiency: float
+    security_vulnerability: float
+    code_consistency_style: float
+    scalability_extensibility: float
+    error_handling_robustness: float
+    suggestions: List[Suggestion] = []
+    dimension_explanations: Optional[dict[str, DimensionExplanation]] = None
+    improvement_summary: Optional[ImprovementSummary] = None
+    suggested_implementation: Optional[SuggestedImplementation] = None
+
+    _scores = validator(*SCORE_FIELDS, pre=True, allow_reuse=True)(coerce_score)
+
+    @validator("suggestions", pre=True)
+    def drop_malformed_suggestions(cls, value):
+        # One bad entry should not fail the whole review
+        return [item for item in value or [] if isinstance(item, dict) and item.get("message")]
+
+    @root_validator(skip_on_failure=True)
+    def sync_explanation_scores(cls, values):
+        # Keep explanation scores consistent with the main scores
+        for dimension, explanation in (values.get("dimension_explanations") or {}).items():
+            score = values.get(dimension)
+            if score is not None and explanation.score is not None and abs(explanation.score - score) > 0.01:
+                logger.warning(f"Score mismatch in {dimension}: {explanation.score} != {score}")
+            if score is not None:
+                explanation.score = score
+        return values
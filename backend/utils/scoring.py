@@ -0,0 +1,74 @@
+# Score fields returned by the model, rounded to one decimal place
+SCORE_FIELDS = [
+    "overall_score", "correctness_functionality", "code_quality_maintainability",
+    "performance_efficiency", "security_vulnerability", "code_consistency_style",
+    "scalability_extensibility", "error_handling_robustness"
+]
+
+
+def weighted_scores(weighted_analyses: list[tuple[dict, float]]) -> dict | None:
+    # Average each score dimension across analyses, weighted by e.g. code size
+    total_weight = sum(weight for _, weight in weighted_analyses)
+    if not total_weight:
+        return None
+    return {
+        field: round(sum(analysis[field] * weight for analysis, weight in weighted_analyses) / total_weight, 1)
+        for field in SCORE_FIELDS
+    }
+
+
+def _marker(text) -> str:
+    # Case, whitespace and trailing-period insensitive form used for de-duplication
+    return " ".join(str(text).lower().split()).rstrip(".")
+
+
+def _dedupe(items: list) -> list:
+    seen = set()
+    unique = []
+    for item in items:
+        marker = _marker(item)
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(item)
+    return unique
+
+
+def merge_analyses(weighted_analyses: list[tuple[dict, float]]) -> dict:
+    # Combine chunk-level reviews of one file into a single analysis
+    merged = weighted_scores(weighted_analyses)
+
+    suggestions = []
+    seen = set()
+    for analysis, _ in weighted_analyses:
+        for suggestion in analysis.get("suggestions") or []:
+            marker = (suggestion.get("type"), suggestion.get("category"), _marker(suggestion.get("message", "")))
+            if marker not in seen:
+                seen.add(marker)
+                suggestions.append(suggestion)
+    merged["suggestions"] = suggestions
+
+    # Each dimension keeps the explanation of its weakest chunk plus all distinct findings
+    explanations = {}
+    for dimension in SCORE_FIELDS[1:]:
+        parts = [
+            (analysis["dimension_explanations"][dimension], analysis[dimension])
+            for analysis, _ in weighted_analyses
+            if (analysis.get("dimension_explanations") or {}).get(dimension)
+        ]
+        if not parts:
+            continue
+        weakest = min(parts, key=lambda part: part[1])[0]
+        explanations[dimension] = {
+            **weakest,
+            "score": merged[dimension],
+            "key_findings": _dedupe([f for part, _ in parts for f in part.get("key_findings") or []]),
+            "improvement_suggestions": _dedupe([s for part, _ in parts for s in part.get("improvement_suggestions") or []]),
+        }
+    merged["dimension_explanations"] = explanations or None
+
+    summaries = [analysis["improvement_summary"] for analysis, _ in weighted_analyses if analysis.get("improvement_summary")]
+    merged["improvement_summary"] = {
+        key: _dedupe([item for summary in summaries for item in summary.get(key) or []])
+        for key in ("critical_improvements", "recommended_improvements", "positive_aspects")
+    } if summaries else None
+    return merged
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one in-flight task.
+
+    Every waiter receives the shared result or exception. A waiter that is
+    cancelled detaches on its own; the shared task is only cancelled once no
+    waiters are left.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        self._counters = {"leaders": 0, "coalesced": 0, "cancelled": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]) -> tuple[object, bool]:
+        # Returns (result, shared) where shared is True if another caller started the call
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self._counters["leaders"] += 1
+        else:
+            self._counters["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self._counters["cancelled"] += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        return {**self._counters, "in_flight": len(self._flights)}
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved when every waiter has already gone
+        if not flight.task.cancelled():
+            flight.task.exception()
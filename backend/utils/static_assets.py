@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from starlette.responses import FileResponse, Response
+
+# Brotli is in requirements.txt; environments without it only build gzip variants
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml",
+                      "image/svg+xml", "application/manifest+json", "application/wasm")
+HASHED_PREFIX = "_next/static/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+@dataclass
+class StaticAsset:
+    path: str
+    file_path: str
+    content_type: str
+    etag: str
+    cache_control: str
+    body: bytes | None = None
+    encodings: dict[str, bytes] = field(default_factory=dict)
+
+
+class StaticManifest:
+    """In-memory index of the static export, built once and rebuilt only when the tree changes.
+
+    Small files are held in memory with precompressed gzip/brotli variants
+    (pre-built .gz/.br files on disk are used when present). Lookups never
+    touch the filesystem, except for files above max_memory_bytes, which are
+    streamed from disk.
+    """
+
+    def __init__(self, root: str, max_memory_bytes: int = 2 * 1024 * 1024, compress_min_bytes: int = 512):
+        self.root = root
+        self.max_memory_bytes = max_memory_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.assets: dict[str, StaticAsset] = {}
+        self.index: StaticAsset | None = None
+        self.signature = None
+
+    def scan_signature(self) -> tuple:
+        # Cheap change detector: file count plus newest mtime and total size
+        count = newest = total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                stat = os.stat(os.path.join(directory, name))
+                count += 1
+                newest = max(newest, stat.st_mtime_ns)
+                total += stat.st_size
+        return count, newest, total
+
+    def build(self):
+        signature = self.scan_signature()
+        assets = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith((".gz", ".br")):
+                    continue
+                file_path = os.path.join(directory, name)
+                path = os.path.relpath(file_path, self.root).replace(os.sep, "/")
+                assets[path] = self._load(path, file_path)
+
+        # Directory-style and extensionless routes of a static Next.js export
+        for path, asset in list(assets.items()):
+            if path.endswith("/index.html"):
+                assets.setdefault(path[:-len("index.html")], asset)
+                assets.setdefault(path[:-len("/index.html")], asset)
+            elif path.endswith(".html"):
+                assets.setdefault(path[:-len(".html")], asset)
+
+        self.assets = assets
+        self.index = assets.get("index.html")
+        self.signature = signature
+
+    def rebuild_if_changed(self) -> bool:
+        if self.scan_signature() == self.signature:
+            return False
+        self.build()
+        return True
+
+    def lookup(self, path: str) -> StaticAsset | None:
+        return self.assets.get(path.lstrip("/"))
+
+    def _load(self, path: str, file_path: str) -> StaticAsset:
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        cache_control = IMMUTABLE if path.startswith(HASHED_PREFIX) else REVALIDATE
+        size = os.path.getsize(file_path)
+
+        digest = hashlib.sha1()
+        if size > self.max_memory_bytes:
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            return StaticAsset(path, file_path, content_type, f'"{digest.hexdigest()[:20]}"', cache_control)
+
+        with open(file_path, "rb") as f:
+            body = f.read()
+        digest.update(body)
+        asset = StaticAsset(path, file_path, content_type, f'"{digest.hexdigest()[:20]}"', cache_control, body)
+
+        if size >= self.compress_min_bytes and content_type.startswith(COMPRESSIBLE_TYPES):
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if os.path.exists(file_path + suffix):
+                    with open(file_path + suffix, "rb") as f:
+                        asset.encodings[encoding] = f.read()
+            if "gzip" not in asset.encodings:
+                asset.encodings["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if "br" not in asset.encodings and brotli is not None:
+                asset.encodings["br"] = brotli.compress(body, quality=9)
+            # Drop variants that do not actually save bytes
+            asset.encodings = {k: v for k, v in asset.encodings.items() if len(v) < len(body)}
+        return asset
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    # "gzip;q=0.8, br, *;q=0" -> {"gzip": 0.8, "br": 1.0, "*": 0.0}; malformed weights count as 0
+    weights = {}
+    for item in header.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+    return weights
+
+
+def preferred_encoding(header: str, available) -> str | None:
+    # Highest-weighted available encoding the client accepts (q > 0), brotli first on ties
+    weights = accepted_encodings(header)
+    best, best_weight = None, 0.0
+    for encoding in ("br", "gzip"):
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if encoding in available and weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def asset_response(asset: StaticAsset, request_headers) -> Response:
+    headers = {"ETag": asset.etag, "Cache-Control": asset.cache_control}
+    if asset.encodings:
+        headers["Vary"] = "Accept-Encoding"
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or asset.etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if asset.body is None:
+        return FileResponse(asset.file_path, media_type=asset.content_type, headers=headers)
+
+    encoding = preferred_encoding(request_headers.get("accept-encoding", ""), asset.encodings)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=asset.encodings[encoding], media_type=asset.content_type, headers=headers)
+    return Response(content=asset.body, media_type=asset.content_type, headers=headers)
@@ -0,0 +1,67 @@
+import json
+
+
+def sse_event(event: str, data) -> str:
+    # Format one Server-Sent Events message with a JSON payload
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class TopLevelFieldParser:
+    """Incrementally parses a streamed JSON object and returns each top-level
+    member as soon as its value is complete.
+
+    Text before the opening brace (e.g. a markdown fence) and after the closing
+    brace is ignored.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member: list[str] = []
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        fields = []
+        for ch in chunk:
+            if self.done:
+                break
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._member.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    self._flush(fields)
+                    continue
+            elif ch == "," and self._depth == 1:
+                self._flush(fields)
+                continue
+            self._member.append(ch)
+        return fields
+
+    def _flush(self, fields: list):
+        text = "".join(self._member).strip()
+        self._member = []
+        if text:
+            member = json.loads("{" + text + "}")
+            fields.extend(member.items())
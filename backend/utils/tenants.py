@@ -0,0 +1,185 @@
+import contextvars
+import hashlib
+import json
+import math
+from utils.rate_limit import TokenBucket
+
+# Bound per request by TenantMiddleware (and per job by the job runner)
+current_tenant = contextvars.ContextVar("current_tenant", default=None)
+# "interactive" or "bulk"; bulk calls wait for quota and queue behind interactive ones
+current_traffic = contextvars.ContextVar("current_traffic", default="interactive")
+
+
+def current_tenant_name() -> str:
+    # Scope for stored reviews and jobs; "" when API keys are not configured
+    tenant = current_tenant.get()
+    return tenant.name if tenant else ""
+
+
+def hash_key(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class Tenant:
+    """An API client with a fair-share weight and optional per-minute request and token quotas (0 = unlimited)."""
+
+    def __init__(self, name: str, weight: float = 1.0, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.name = name
+        self.weight = weight
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._counters = {"requests": 0, "rejected": 0, "tokens": 0, "token_waits": 0}
+
+    def admit(self) -> float:
+        # 0 if the request may proceed, otherwise seconds until the request quota allows it
+        retry_after = self.requests.try_acquire(1) if self.requests else 0.0
+        self._counters["rejected" if retry_after else "requests"] += 1
+        return retry_after
+
+    async def spend_tokens(self, tokens: int, wait: bool = False) -> float:
+        # Interactive callers are refused (returns the retry delay); bulk callers wait for the quota
+        if self.tokens:
+            if wait:
+                if self.tokens.try_acquire(tokens):
+                    self._counters["token_waits"] += 1
+                    await self.tokens.acquire(tokens)
+            else:
+                retry_after = self.tokens.try_acquire(tokens)
+                if retry_after:
+                    self._counters["rejected"] += 1
+                    return retry_after
+        self._counters["tokens"] += tokens
+        return 0.0
+
+    def stats(self) -> dict:
+        return {**self._counters, "weight": self.weight}
+
+
+class TenantRegistry:
+    """API keys and the tenants they belong to.
+
+    Keys are kept only as SHA-256 digests. A tenant configured without keys
+    serves requests that carry none; without one, such requests are refused.
+    An empty registry leaves the API open.
+    """
+
+    def __init__(self, tenants: list[Tenant], keys: dict[str, Tenant], anonymous: Tenant | None = None):
+        self.tenants = {tenant.name: tenant for tenant in tenants}
+        self._keys = keys
+        self.anonymous = anonymous
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.tenants)
+
+    def get(self, name: str | None) -> Tenant | None:
+        return self.tenants.get(name) if name else None
+
+    def authenticate(self, key: str | None) -> Tenant | None:
+        if not key:
+            return self.anonymous
+        return self._keys.get(hash_key(key))
+
+    def stats(self) -> dict:
+        return {name: tenant.stats() for name, tenant in self.tenants.items()}
+
+
+def build_registry(entries: list[dict], workers: int = 1) -> TenantRegistry:
+    # Quotas are held in memory per process, so each worker enforces its share
+    tenants, keys, anonymous = [], {}, None
+    for entry in entries:
+        tenant = Tenant(
+            entry["name"],
+            float(entry.get("weight", 1.0)),
+            float(entry.get("requests_per_minute", 0)) / workers,
+            float(entry.get("tokens_per_minute", 0)) / workers,
+        )
+        tenants.append(tenant)
+        entry_keys = list(entry.get("keys") or []) + ([entry["key"]] if entry.get("key") else [])
+        digests = list(entry.get("key_sha256") or [])
+        if not entry_keys and not digests:
+            if anonymous is not None:
+                raise ValueError("Only one tenant may be configured without API keys")
+            anonymous = tenant
+        for digest in [hash_key(key) for key in entry_keys] + digests:
+            if digest in keys:
+                raise ValueError(f"API key of tenant {entry['name']} is already used by {keys[digest].name}")
+            keys[digest] = tenant
+    return TenantRegistry(tenants, keys, anonymous)
+
+
+def parse_tenants(spec: str) -> list[dict]:
+    # TENANTS is a JSON list of objects; every tenant needs a unique name
+    try:
+        entries = json.loads(spec)
+    except ValueError as e:
+        raise ValueError(f"TENANTS is not valid JSON: {e}") from e
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError("TENANTS must be a JSON list of objects")
+    names = [entry.get("name") for entry in entries]
+    if not all(names) or len(set(names)) != len(names):
+        raise ValueError("Every TENANTS entry needs a unique name")
+    return entries
+
+
+class TenantMiddleware:
+    """ASGI middleware that authenticates API requests and enforces per-tenant request quotas.
+
+    The key is read from "Authorization: Bearer <key>" or "X-API-Key".
+    Unknown keys get 401 and tenants over their request quota 429 with
+    Retry-After; only POST requests count against the quota. The tenant and
+    the traffic class (bulk for paths under bulk_prefixes) are bound to
+    context variables for the upstream scheduler.
+    """
+
+    def __init__(self, app, registry: TenantRegistry, prefix: str = "/api/", bulk_prefixes: tuple[str, ...] = ()):
+        self.app = app
+        self.registry = registry
+        self.prefix = prefix
+        self.bulk_prefixes = bulk_prefixes
+
+    async def __call__(self, scope, receive, send):
+        # CORS preflights carry no credentials
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+        traffic_token = current_traffic.set("bulk" if scope["path"].startswith(self.bulk_prefixes) else "interactive")
+        try:
+            if not self.registry.enabled:
+                return await self.app(scope, receive, send)
+
+            headers = dict(scope["headers"])
+            key = headers.get(b"x-api-key", b"").decode("latin-1").strip() or None
+            authorization = headers.get(b"authorization", b"").decode("latin-1")
+            if not key and authorization.lower().startswith("bearer "):
+                key = authorization[7:].strip() or None
+            tenant = self.registry.authenticate(key)
+            if tenant is None:
+                return await self.respond(send, 401, "Invalid API key" if key else "API key required",
+                                          [(b"www-authenticate", b"Bearer")])
+            if scope["method"] == "POST":
+                retry_after = tenant.admit()
+                if retry_after:
+                    return await self.respond(send, 429, f"Request quota exceeded for tenant {tenant.name}",
+                                              [(b"retry-after", str(math.ceil(retry_after)).encode())])
+
+            tenant_token = current_tenant.set(tenant)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_tenant.reset(tenant_token)
+        finally:
+            current_traffic.reset(traffic_token)
+
+    @staticmethod
+    async def respond(send, status: int, detail: str, headers: list[tuple[bytes, bytes]]):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,130 @@
+import codecs
+import json
+from starlette.datastructures import UploadFile
+from utils.archives import looks_binary
+
+# UTF-32 LE starts with the UTF-16 LE mark, so the longer marks are checked first
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+class UndecodableUpload(ValueError):
+    """The upload is binary or not text in any of the accepted encodings."""
+
+
+def candidate_encodings(head: bytes, fallbacks: list[str]) -> list[str]:
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return [encoding]
+    if looks_binary(head):
+        raise UndecodableUpload("Binary files are not supported")
+    return ["utf-8", *fallbacks]
+
+
+async def decode_upload(upload: UploadFile, fallbacks: list[str], chunk_size: int = 64 * 1024) -> str:
+    # Decode in bounded chunks so only the decoded text is held in memory, never the raw bytes too.
+    # The upload is spooled, so a failed encoding restarts from the beginning with the next one.
+    head = await upload.read(chunk_size)
+    encodings = candidate_encodings(head, fallbacks)
+    for encoding in encodings:
+        decoder = codecs.getincrementaldecoder(encoding)("strict")
+        parts = []
+        chunk = head
+        try:
+            while chunk:
+                parts.append(decoder.decode(chunk))
+                chunk = await upload.read(chunk_size)
+            parts.append(decoder.decode(b"", final=True))
+            return "".join(parts)
+        except UnicodeDecodeError:
+            await upload.seek(0)
+            head = await upload.read(chunk_size)
+    raise UndecodableUpload(f"File is not valid text (tried {', '.join(encodings)})")
+
+
+def decode_bytes(data: bytes, fallbacks: list[str]) -> str:
+    encodings = candidate_encodings(data[:8192], fallbacks)
+    for encoding in encodings:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise UndecodableUpload(f"File is not valid text (tried {', '.join(encodings)})")
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware that rejects request bodies over a per-route size limit with 413.
+
+    Declared Content-Length is checked before anything is read; chunked
+    bodies are counted as they stream in and cut off as soon as they pass
+    the limit. limits maps path prefixes to byte limits (longest prefix
+    wins, 0 disables).
+    """
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def limit_for(self, path: str) -> int:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            return await self.app(scope, receive, send)
+        limit = self.limit_for(scope["path"])
+        if not limit:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            return await self.reject(send, limit)
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Answer now; the app sees a disconnect and its own response is dropped
+                    rejected = True
+                    await self.reject(send, limit)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    @staticmethod
+    async def reject(send, limit: int):
+        body = json.dumps({"detail": f"Request body exceeds the {limit} byte limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,29 @@
+import asyncio
+import os
+import signal
+
+# Standalone job worker: runs reviews from the shared job store without serving HTTP.
+# Run the API with JOB_WORKERS=0 and scale these processes separately.
+os.environ.setdefault("JOB_WORKERS", "4")
+
+from main import job_queue, job_store, client, logger, JOB_DRAIN_TIMEOUT
+
+
+async def run_worker():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await job_queue.start()
+    logger.info("Job worker running")
+    await stop.wait()
+
+    logger.info("Stopping job worker...")
+    await job_queue.stop(JOB_DRAIN_TIMEOUT)
+    job_store.close()
+    await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,13 @@
+"""Python client and CLI for the Dev Diligence code review API."""
+
+__version__ = "0.1.0"
+
+from dev_diligence.client import ReviewClient, ReviewError, Review  # noqa: E402
+from dev_diligence.bulk import FileResult, review_directory, review_file  # noqa: E402
+from dev_diligence.files import find_source_files  # noqa: E402
+from dev_diligence.manifest import Manifest  # noqa: E402
+
+__all__ = [
+    "ReviewClient", "ReviewError", "Review", "FileResult", "review_directory", "review_file",
+    "find_source_files", "Manifest", "__version__",
+]
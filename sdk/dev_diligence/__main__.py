@@ -0,0 +1,4 @@
+import sys
+from dev_diligence.cli import main
+
+sys.exit(main())
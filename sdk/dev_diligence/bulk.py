@@ -0,0 +1,89 @@
+import asyncio
+import os
+from dataclasses import asdict, dataclass
+from dev_diligence.client import ReviewClient, ReviewError
+from dev_diligence.files import find_source_files
+from dev_diligence.manifest import Manifest, content_hash
+
+# Same as the service's default per-file limit for batch reviews (BATCH_MAX_FILE_BYTES)
+DEFAULT_MAX_BYTES = 512 * 1024
+BINARY_SNIFF_BYTES = 8192
+
+
+@dataclass
+class FileResult:
+    path: str
+    # "reviewed", "unchanged" (result from the manifest), "skipped" (not sent) or "failed"
+    status: str
+    sha256: str | None = None
+    analysis: dict | None = None
+    cache: str | None = None
+    review_id: int | None = None
+    error: str | None = None
+    status_code: int | None = None
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+async def review_file(client: ReviewClient, root: str, path: str, manifest: Manifest | None = None,
+                      force: bool = False, max_bytes: int = DEFAULT_MAX_BYTES,
+                      bypass_cache: bool = False) -> FileResult:
+    try:
+        with open(os.path.join(root, path), "rb") as f:
+            content = f.read(max_bytes + 1)
+    except OSError as e:
+        return FileResult(path, "failed", error=f"{type(e).__name__}: {e}")
+    if len(content) > max_bytes:
+        return FileResult(path, "skipped", error=f"larger than {max_bytes} bytes")
+    if b"\0" in content[:BINARY_SNIFF_BYTES]:
+        return FileResult(path, "skipped", error="binary file")
+    if not content.strip():
+        return FileResult(path, "skipped", error="empty file")
+
+    digest = content_hash(content)
+    entry = manifest.unchanged(path, digest) if manifest and not force else None
+    if entry:
+        return FileResult(path, "unchanged", digest, entry["analysis"], review_id=entry.get("review_id"))
+    try:
+        review = await client.review(content, path, bypass_cache=bypass_cache)
+    except ReviewError as e:
+        return FileResult(path, "failed", digest, error=e.detail, status_code=e.status_code)
+    if manifest:
+        manifest.record(path, digest, review.analysis, review.review_id)
+    return FileResult(path, "reviewed", digest, review.analysis, review.cache, review.review_id)
+
+
+async def review_directory(client: ReviewClient, root: str, paths: list[str] | None = None, *,
+                           concurrency: int = 8, manifest: Manifest | None = None, force: bool = False,
+                           max_bytes: int = DEFAULT_MAX_BYTES, bypass_cache: bool = False):
+    """Review files under root concurrently, yielding a FileResult for each as it finishes.
+
+    paths defaults to find_source_files(root). At most concurrency reviews
+    are in flight, all over the client's shared connection pool. With a
+    manifest, unchanged files are answered from it and new results are
+    recorded; the caller saves it.
+    """
+    paths = find_source_files(root) if paths is None else paths
+    pending = iter(paths)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        # Workers pull from one shared iterator, so a slow file never holds up the rest
+        for path in pending:
+            try:
+                result = await review_file(client, root, path, manifest, force, max_bytes, bypass_cache)
+            except Exception as e:
+                result = FileResult(path, "failed", error=f"{type(e).__name__}: {e}")
+            await results.put(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(paths))))]
+    try:
+        for _ in paths:
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    if manifest:
+        manifest.prune(set(paths))
@@ -0,0 +1,119 @@
+"""Review a directory with the Dev Diligence API.
+
+Source files are found with git (or the .gitignore files when the directory
+is not a git work tree), submitted concurrently over one pooled connection,
+and the results written as JSONL (one object per file) or SARIF. Files
+whose content hash matches the manifest from an earlier run are not sent
+again; their stored results are reported with status "unchanged".
+
+Exit status: 0 on success, 1 if any file failed or scored below
+--fail-under, 2 on usage errors.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dev_diligence import __version__
+from dev_diligence.bulk import DEFAULT_MAX_BYTES, review_directory
+from dev_diligence.client import DEFAULT_URL, ReviewClient
+from dev_diligence.files import find_source_files
+from dev_diligence.manifest import DEFAULT_MANIFEST, Manifest
+from dev_diligence.output import jsonl_line, sarif_log
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="dev-diligence", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=".", help="directory to review (default: current directory)")
+    parser.add_argument("--url", default=os.getenv("DEV_DILIGENCE_URL", DEFAULT_URL),
+                        help="service URL (env DEV_DILIGENCE_URL)")
+    parser.add_argument("--api-key", default=os.getenv("DEV_DILIGENCE_API_KEY"),
+                        help="API key (env DEV_DILIGENCE_API_KEY)")
+    parser.add_argument("--profile", help="review profile: scores-only, standard or full (service default if unset)")
+    parser.add_argument("--project", help="project name recorded with each review")
+    parser.add_argument("-j", "--concurrency", type=int, default=8, help="reviews in flight at once (default: 8)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "sarif"],
+                        help="output format (default: sarif for a .sarif output file, otherwise jsonl)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--manifest", help=f"hash manifest path (default: {DEFAULT_MANIFEST} in the reviewed directory)")
+    parser.add_argument("--no-manifest", action="store_true", help="review every file and keep no manifest")
+    parser.add_argument("--force", action="store_true", help="review unchanged files too (the manifest is updated)")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the service's review cache")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only review matching files (repeatable; default: known source extensions)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help="skip matching files (repeatable)")
+    parser.add_argument("--no-git", action="store_true", help="walk the directory instead of asking git for files")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="skip larger files")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds per review request")
+    parser.add_argument("--fail-under", type=float, metavar="SCORE", help="exit 1 if any overall_score is lower")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser
+
+
+async def run(args) -> int:
+    root = os.path.abspath(args.path)
+    exclude = list(args.exclude or []) + [DEFAULT_MANIFEST]
+    paths = find_source_files(root, args.include, exclude, use_git=not args.no_git)
+    manifest = None
+    if not args.no_manifest:
+        manifest = Manifest(args.manifest or os.path.join(root, DEFAULT_MANIFEST), args.profile)
+
+    output_format = args.format or ("sarif" if args.output and args.output.endswith(".sarif") else "jsonl")
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    counts = {"reviewed": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+    results, below = [], []
+    start = time.perf_counter()
+    try:
+        async with ReviewClient(args.url, args.api_key, profile=args.profile, project=args.project,
+                                timeout=args.timeout, max_connections=args.concurrency) as client:
+            async for result in review_directory(client, root, paths, concurrency=args.concurrency,
+                                                 manifest=manifest, force=args.force,
+                                                 max_bytes=args.max_bytes, bypass_cache=args.no_cache):
+                counts[result.status] += 1
+                score = (result.analysis or {}).get("overall_score")
+                if args.fail_under is not None and isinstance(score, (int, float)) and score < args.fail_under:
+                    below.append(result.path)
+                if output_format == "jsonl":
+                    # Streamed, so partial results survive an interrupted run
+                    output.write(jsonl_line(result))
+                    output.flush()
+                else:
+                    results.append(result)
+                if not args.quiet and result.status == "failed":
+                    print(f"failed: {result.path}: {result.error}", file=sys.stderr)
+        if output_format == "sarif":
+            json.dump(sarif_log(results), output, indent=2)
+            output.write("\n")
+    finally:
+        if manifest:
+            manifest.save()
+        if output is not sys.stdout:
+            output.close()
+
+    if not args.quiet:
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+        print(f"{len(paths)} files: {summary} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        if below:
+            print(f"{len(below)} files scored below {args.fail_under}", file=sys.stderr)
+    return 1 if counts["failed"] or below else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.path):
+        print(f"dev-diligence: {args.path} is not a directory", file=sys.stderr)
+        return 2
+    if args.concurrency < 1:
+        print("dev-diligence: --concurrency must be at least 1", file=sys.stderr)
+        return 2
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
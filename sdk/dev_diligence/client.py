@@ -0,0 +1,129 @@
+import asyncio
+import importlib.util
+import json
+import random
+from dataclasses import dataclass, field
+import httpx
+
+DEFAULT_URL = "http://localhost:8000"
+# HTTP/2 multiplexes concurrent reviews over one connection; it needs the optional 'h2' package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ReviewError(Exception):
+    """A review the service refused or could not complete."""
+
+    def __init__(self, detail: str, status_code: int | None = None):
+        super().__init__(f"{status_code}: {detail}" if status_code else detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+@dataclass
+class Review:
+    analysis: dict
+    cache: str | None = None
+    review_id: int | None = None
+    revision_id: str | None = None
+    headers: dict = field(default_factory=dict, repr=False)
+
+
+class ReviewClient:
+    """Async client for /api/analyze-code/ that shares one pooled connection across reviews.
+
+    Use as an async context manager. Requests are retried on 429 and 5xx
+    gateway errors (honouring Retry-After) and on connection failures; other
+    errors raise ReviewError. Concurrency is up to the caller, bounded by
+    max_connections (HTTP/1.1) or the server's stream limit (HTTP/2).
+    """
+
+    def __init__(self, base_url: str = DEFAULT_URL, api_key: str | None = None, *, profile: str | None = None,
+                 project: str | None = None, timeout: float = 300.0, max_connections: int = 16,
+                 http2: bool | None = None, max_retries: int = 3):
+        self.profile = profile
+        self.project = project
+        self.max_retries = max_retries
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            http2=HTTP2_AVAILABLE if http2 is None else http2,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def review(self, code: str | bytes, filename: str | None = None, *, profile: str | None = None,
+                     project: str | None = None, bypass_cache: bool = False) -> Review:
+        # Bytes are uploaded as a file so the service detects the encoding; the filename selects the language
+        data = {"bypass_cache": "true" if bypass_cache else "false"}
+        if profile or self.profile:
+            data["profile"] = profile or self.profile
+        if project or self.project:
+            data["project"] = project or self.project
+        files = None
+        if isinstance(code, bytes) or filename:
+            content = code if isinstance(code, bytes) else code.encode("utf-8")
+            files = {"file": (filename or "code", content, "text/plain")}
+        else:
+            data["code"] = code
+
+        response = await self._post("/api/analyze-code/", data, files)
+        try:
+            analysis = response.json()
+        except ValueError as e:
+            raise ReviewError(f"Invalid JSON in response: {e}", response.status_code) from e
+        review_id = response.headers.get("X-Review-Id")
+        return Review(
+            analysis=analysis,
+            cache=response.headers.get("X-Cache"),
+            review_id=int(review_id) if review_id else None,
+            revision_id=response.headers.get("X-Revision-Id"),
+            headers=dict(response.headers),
+        )
+
+    async def _post(self, path: str, data: dict, files: dict | None) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            retrying = attempt < self.max_retries
+            try:
+                response = await self._http.post(path, data=data, files=files)
+            except httpx.TransportError as e:
+                if not retrying:
+                    raise ReviewError(f"{type(e).__name__}: {e}") from e
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            if response.status_code < 400:
+                return response
+            if response.status_code not in RETRY_STATUSES or not retrying:
+                raise ReviewError(self.error_detail(response), response.status_code)
+            await asyncio.sleep(self.backoff(attempt, response.headers.get("Retry-After")))
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def backoff(attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        # Jittered exponential backoff so concurrent workers do not retry in lockstep
+        return min(2 ** attempt, 30) * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def error_detail(response: httpx.Response) -> str:
+        try:
+            detail = response.json().get("detail")
+        except (ValueError, AttributeError):
+            detail = None
+        if detail is None:
+            return response.text[:500] or response.reason_phrase
+        return detail if isinstance(detail, str) else json.dumps(detail)
@@ -0,0 +1,145 @@
+import fnmatch
+import os
+import re
+import subprocess
+
+# Languages the service has review guidance for (backend/utils/languages.py)
+SOURCE_EXTENSIONS = {
+    ".py", ".pyi", ".pyw", ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts", ".java", ".kt", ".kts",
+    ".go", ".rs", ".c", ".h", ".cc", ".cpp", ".cxx", ".hh", ".hpp", ".hxx", ".cs", ".rb", ".php", ".swift",
+    ".scala", ".sh", ".bash", ".zsh", ".sql",
+}
+SOURCE_FILENAMES = {"dockerfile", "makefile", "gemfile", "rakefile"}
+ALWAYS_SKIPPED = {".git", ".hg", ".svn"}
+
+
+def translate_pattern(pattern: str) -> str:
+    # gitignore glob to regex: * and ? stay within one path segment, ** spans any number of them
+    parts, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            parts.append("[" + ("^" + body[1:] if body[0] == "!" else body).replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """The patterns of one .gitignore file, matched against paths relative to its directory."""
+
+    def __init__(self, lines: list[str]):
+        self.rules = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            negate = line.startswith("!")
+            if negate or line.startswith("\\"):
+                line = line[1:]
+            directory_only = line.endswith("/")
+            line = line.rstrip("/")
+            # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+            anchored = "/" in line
+            regex = ("" if anchored else "(?:.*/)?") + translate_pattern(line.lstrip("/")) + "$"
+            self.rules.append((re.compile(regex), negate, directory_only))
+
+    def match(self, path: str, is_dir: bool) -> bool | None:
+        # True if ignored, False if re-included by a negation, None if no pattern applies; the last match wins
+        result = None
+        for regex, negate, directory_only in self.rules:
+            if (is_dir or not directory_only) and regex.match(path):
+                result = not negate
+        return result
+
+
+def walk_ignoring(root: str):
+    """Yield file paths under root (relative, with forward slashes), skipping what .gitignore files exclude.
+
+    Covers .gitignore files in root and its subdirectories; used when root
+    is not inside a git work tree.
+    """
+    ignores: dict[str, IgnoreRules] = {}
+
+    def ignored(path: str, is_dir: bool) -> bool:
+        result = False
+        for base, rules in ignores.items():
+            if base and not path.startswith(base + "/"):
+                continue
+            match = rules.match(path[len(base) + 1:] if base else path, is_dir)
+            if match is not None:
+                result = match
+        return result
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        relative = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        relative = "" if relative == "." else relative
+        gitignore = os.path.join(dirpath, ".gitignore")
+        if os.path.isfile(gitignore):
+            with open(gitignore, encoding="utf-8", errors="replace") as f:
+                ignores[relative] = IgnoreRules(f.readlines())
+        prefix = relative + "/" if relative else ""
+        # Pruning an ignored directory also drops everything below it, as git does
+        dirnames[:] = sorted(
+            name for name in dirnames
+            if name not in ALWAYS_SKIPPED and not ignored(prefix + name, True)
+        )
+        for name in sorted(filenames):
+            if not ignored(prefix + name, False):
+                yield prefix + name
+
+
+def git_files(root: str) -> list[str] | None:
+    # Tracked plus untracked-but-not-ignored files, as git sees them (nested, global and info/exclude rules)
+    try:
+        result = subprocess.run(
+            ["git", "-C", root, "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            capture_output=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    paths = [path for path in result.stdout.decode("utf-8", "surrogateescape").split("\0") if path]
+    # Deleted files are still in the index until the deletion is staged
+    return sorted(path for path in set(paths) if os.path.isfile(os.path.join(root, path)))
+
+
+def is_source_file(path: str, include: list[str] | None = None, exclude: list[str] | None = None) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    if exclude and any(fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in exclude):
+        return False
+    if include:
+        return any(fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in include)
+    return name.lower() in SOURCE_FILENAMES or os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS
+
+
+def find_source_files(root: str, include: list[str] | None = None, exclude: list[str] | None = None,
+                      use_git: bool = True) -> list[str]:
+    """Source files under root that .gitignore does not exclude, relative to root with forward slashes.
+
+    include and exclude are glob patterns matched against the relative path
+    and the file name; without include, files are selected by extension.
+    """
+    paths = git_files(root) if use_git else None
+    if paths is None:
+        paths = walk_ignoring(root)
+    return [path for path in paths if is_source_file(path, include, exclude)]
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST = ".dev-diligence-manifest.json"
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class Manifest:
+    """Content hashes and results of the last successful review of each file.
+
+    A file whose hash (and the review profile) is unchanged is not sent
+    again; its stored result is reported instead. Saved atomically, so an
+    interrupted run keeps the previous manifest.
+    """
+
+    def __init__(self, path: str | None, profile: str | None = None):
+        self.path = path
+        self.profile = profile
+        self.files: dict[str, dict] = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Results from another profile or manifest format are not comparable; start over
+        if data.get("version") == MANIFEST_VERSION and data.get("profile") == self.profile:
+            self.files = data.get("files") or {}
+
+    def unchanged(self, path: str, digest: str) -> dict | None:
+        entry = self.files.get(path)
+        return entry if entry and entry.get("sha256") == digest else None
+
+    def record(self, path: str, digest: str, analysis: dict, review_id: int | None = None):
+        self.files[path] = {"sha256": digest, "review_id": review_id, "analysis": analysis}
+
+    def prune(self, paths: set[str]):
+        # Drop files that were deleted or are no longer selected
+        self.files = {path: entry for path, entry in self.files.items() if path in paths}
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "profile": self.profile, "files": self.files}, f)
+        os.replace(temporary, self.path)
@@ -0,0 +1,79 @@
+import json
+from dev_diligence import __version__
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+INFORMATION_URI = "https://github.com/tkhongsap/dev-diligence"
+# Suggestion types of the review schema (backend/prompts/review_profiles.py) to SARIF levels
+SARIF_LEVELS = {"error": "error", "warning": "warning", "improvement": "note"}
+CATEGORY_DESCRIPTIONS = {
+    "overall": "General code review finding",
+    "correctness": "Correctness and functionality",
+    "quality": "Code quality and maintainability",
+    "performance": "Performance and efficiency",
+    "security": "Security vulnerability",
+    "consistency": "Code consistency and style",
+    "scalability": "Scalability and extensibility",
+    "error_handling": "Error handling and robustness",
+}
+
+
+def jsonl_line(result) -> str:
+    return json.dumps(result.to_dict(), ensure_ascii=False) + "\n"
+
+
+def sarif_log(results: list) -> dict:
+    """A SARIF 2.1.0 log with one result per review suggestion.
+
+    Each suggestion's category becomes the rule id and its type the level.
+    Files that could not be reviewed are reported as tool execution
+    notifications; scores are kept in the properties of each artifact.
+    """
+    rules = [{"id": category, "shortDescription": {"text": text}} for category, text in CATEGORY_DESCRIPTIONS.items()]
+    rule_index = {category: index for index, category in enumerate(CATEGORY_DESCRIPTIONS)}
+    artifacts, sarif_results, notifications = [], [], []
+    for result in sorted(results, key=lambda result: result.path):
+        if result.status == "failed":
+            notifications.append({
+                "level": "error",
+                "message": {"text": f"{result.path}: {result.error}"},
+                "locations": [{"physicalLocation": {"artifactLocation": {"uri": result.path}}}],
+            })
+        if not result.analysis:
+            continue
+        analysis = result.analysis
+        artifacts.append({
+            "location": {"uri": result.path},
+            "hashes": {"sha-256": result.sha256} if result.sha256 else {},
+            "properties": {"overall_score": analysis.get("overall_score"), "status": result.status},
+        })
+        for suggestion in analysis.get("suggestions") or []:
+            category = suggestion.get("category") if suggestion.get("category") in rule_index else "overall"
+            location = {"artifactLocation": {"uri": result.path, "index": len(artifacts) - 1}}
+            if isinstance(suggestion.get("line"), int) and suggestion["line"] > 0:
+                location["region"] = {"startLine": suggestion["line"]}
+            sarif_results.append({
+                "ruleId": category,
+                "ruleIndex": rule_index[category],
+                "level": SARIF_LEVELS.get(suggestion.get("type"), "note"),
+                "message": {"text": suggestion.get("message") or "(no message)"},
+                "locations": [{"physicalLocation": location}],
+            })
+
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "dev-diligence",
+                "version": __version__,
+                "informationUri": INFORMATION_URI,
+                "rules": rules,
+            }},
+            "invocations": [{
+                "executionSuccessful": not notifications,
+                "toolExecutionNotifications": notifications,
+            }],
+            "artifacts": artifacts,
+            "results": sarif_results,
+        }],
+    }
@@ -0,0 +1,45 @@
+import os
+from dev_diligence.files import IgnoreRules, find_source_files, walk_ignoring
+
+
+def test_patterns_follow_gitignore_rules():
+    rules = IgnoreRules(["# comment", "*.log", "/build", "docs/*.md", "cache/", "**/tmp/**", "!keep.log", "\\#notes"])
+    assert rules.match("debug.log", False) is True
+    assert rules.match("src/debug.log", False) is True
+    assert rules.match("keep.log", False) is False
+    assert rules.match("build", True) is True
+    assert rules.match("src/build", True) is None
+    assert rules.match("docs/a.md", False) is True
+    assert rules.match("docs/sub/a.md", False) is None
+    assert rules.match("cache", True) is True
+    assert rules.match("cache", False) is None
+    assert rules.match("a/tmp/b/c.py", False) is True
+    assert rules.match("#notes", False) is True
+    assert rules.match("main.py", False) is None
+
+
+def write(root, path: str, content: str = "x = 1\n"):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+def test_walk_applies_nested_gitignore_files(tmp_path):
+    write(tmp_path, ".gitignore", "build/\n*.gen.py\n")
+    write(tmp_path, "app/.gitignore", "local_*.py\n!local_keep.py\n")
+    for path in ["main.py", "out.gen.py", "build/x.py", "app/util.py", "app/local_a.py", "app/local_keep.py",
+                 ".git/config", "other/local_b.py"]:
+        write(tmp_path, path)
+    assert list(walk_ignoring(str(tmp_path))) == [
+        ".gitignore", "main.py", "app/.gitignore", "app/local_keep.py", "app/util.py", "other/local_b.py",
+    ]
+
+
+def test_find_source_files_filters_by_extension_and_globs(tmp_path):
+    for path in ["main.py", "README.md", "Dockerfile", "web/app.ts", "tests/test_main.py"]:
+        write(tmp_path, path)
+    root = str(tmp_path)
+    assert find_source_files(root, use_git=False) == ["Dockerfile", "main.py", "tests/test_main.py", "web/app.ts"]
+    assert find_source_files(root, exclude=["tests/*"], use_git=False) == ["Dockerfile", "main.py", "web/app.ts"]
+    assert find_source_files(root, include=["*.md"], use_git=False) == ["README.md"]